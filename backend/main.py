@@ -1,63 +1,153 @@
 # main.py
 
 import os
+import sys
 import uuid
+import time
 import asyncio
 import base64
+import json
 from typing import Dict, List, Optional
 import mimetypes
 
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from google.adk.runners import Runner
-from google.genai import types
-from google.adk.sessions import DatabaseSessionService
 from contextlib import asynccontextmanager
 
-import googlemaps
-import google.generativeai as genai
+# The shared tools live in lens_common/: one level up in the repository, next
+# to main.py in the Docker images
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.isdir(os.path.join(ROOT, "lens_common")) and ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-from nearLens_agent.agent import root_agent 
+# Heavy SDKs (google.adk, google.genai, googlemaps, geopy) and the agent tree are
+# imported by `init_clients()` in the background so the server binds its port first.
+from lens_common.circuit_breaker import (
+    STALE_FLAG, STALE_KEY, CircuitOpenError, breaker_status, get_breaker, location_key,
+)
+from lens_common.admission import AdmissionMiddleware, admission_controller, admission_status
+from lens_common.cache import cache_status, get_cache
+from lens_common.cassette import CassetteMiss, cassette_status, exchange
+from lens_common.costs import charge, charge_event, cost_summary, track_costs
+from lens_common.executor import (
+    content_digest, run_blocking, run_cpu_buffer, shutdown_executors, start_executors,
+)
+from lens_common.jobs import JobQueue, QueueFull
+from lens_common.logs import RequestIdMiddleware, get_logger, log_status, request_context, stop_logging
+from lens_common.metrics import record_stage
+from lens_common.profiling import ADMIN_TOKEN_HEADER, ProfilingMiddleware, is_admin
+from lens_common.pipeline import STOP_AT_TOOL_RESULT, release_session
+from lens_common.upstream import http_session
 
 # ===========================================
 #  1️⃣ LOAD CONFIGURATION
 # ===========================================
 load_dotenv()
 
-DB_URL = "sqlite:///./sessions.db"
+DB_URL = os.getenv("SESSION_DB_URL", "sqlite:///./sessions.db")
 APP_NAME = "NearLens"
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+PREWARM_URLS = ["https://places.googleapis.com/", "https://maps.googleapis.com/"]
+# `/api/label`: client labels below this confidence go through server-side vision instead
+LABEL_MIN_CONFIDENCE = float(os.getenv("LABEL_MIN_CONFIDENCE", "0.6"))
+
+log = get_logger("main")
 
 gmaps = None
-if GOOGLE_MAPS_API_KEY:
+geolocator = None
+
+def init_clients() -> Dict[str, float]:
+    """
+    Import the agent tree and SDKs and configure the upstream clients.
+    Blocking; runs in a worker thread during warm-up. Returns per-step seconds.
+    """
+    global gmaps, geolocator
+    timings = {}
+
+    started = time.perf_counter()
+    from google.adk.runners import Runner  # noqa: F401
+    from nearLens_agent.agent import root_agent  # noqa: F401
+    timings["agents_s"] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    if GOOGLE_MAPS_API_KEY and gmaps is None:
+        try:
+            import googlemaps
+            gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY, requests_session=http_session())
+            log.info("Google Maps client initialized")
+        except Exception as e:
+            log.error("Google Maps client initialization failed", error=str(e))
+
     try:
-        gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
-        print("✅ Google Maps client initialized.")
+        from geopy.geocoders import Nominatim
+        geolocator = Nominatim(user_agent="nearlens", timeout=10)
     except Exception as e:
-        print(f"❌ Google Maps client initialization failed: {str(e)}")
+        log.warning("Nominatim initialization failed", error=str(e))
+    timings["maps_s"] = round(time.perf_counter() - started, 3)
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("✅ Gemini API configured successfully.")
-except Exception as e:
-    print(f"❌ Failed to configure Gemini API: {str(e)}")
+    started = time.perf_counter()
+    try:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        log.info("Gemini API configured")
+    except Exception as e:
+        log.error("Failed to configure Gemini API", error=str(e))
+    timings["gemini_s"] = round(time.perf_counter() - started, 3)
+
+    return timings
+
+def prewarm_connections() -> None:
+    """Open pooled TLS connections to the upstreams so the first request skips the handshakes."""
+    for url in PREWARM_URLS:
+        try:
+            http_session().head(url, timeout=5)
+        except Exception as e:
+            log.warning("Pre-warm failed", url=url, error=str(e))
+
+async def warm_up(app: FastAPI, session_service=None) -> None:
+    started = time.perf_counter()
+    timings = await asyncio.to_thread(init_clients)
+
+    if session_service is None:
+        try:
+            from google.adk.sessions import DatabaseSessionService
+            session_service = await asyncio.to_thread(DatabaseSessionService, db_url=DB_URL)
+            log.info("Database session service initialized")
+        except Exception as e:
+            log.error("Database session service initialization failed", error=str(e))
+    app.state.session_service = session_service
+
+    await asyncio.to_thread(prewarm_connections)
+    timings["total_s"] = round(time.perf_counter() - started, 3)
+    app.state.warmup_timings = timings
+    log.info("Warm-up complete", **timings)
+
+def start_warmup(app: FastAPI, session_service=None) -> None:
+    """Schedule warm-up on the running loop; requests await it via `ensure_ready`."""
+    app.state.warmup = asyncio.create_task(warm_up(app, session_service))
+
+async def ensure_ready(app: FastAPI) -> None:
+    await asyncio.shield(app.state.warmup)
 
 # ===========================================
 #  2️⃣ FASTAPI APP SETUP
 # ===========================================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Application starting up...")
-    try:
-        app.state.session_service = DatabaseSessionService(db_url=DB_URL)
-        print("✅ Database session service initialized")
-    except Exception as e:
-        print(f"❌ Database session service initialization failed: {str(e)}")
+    log.info("Application starting up")
+    start_executors()
+    start_warmup(app)
+    # Jobs recovered from JOB_DB_PATH run now, not when the next one is submitted
+    job_queue.start()
     yield
-    print("Application shutting down...")
+    log.info("Application shutting down")
+    await job_queue.stop()
+    await shutdown_executors()
+    stop_logging()
 
 app = FastAPI(
     title="NearLens API",
@@ -66,6 +156,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Uploads are admitted (or turned away with 429/503) before their body is read
+app.add_middleware(AdmissionMiddleware, paths=("/api/upload", "/api/label"), batch_paths=("/api/jobs",))
+# Opt-in CPU/allocation profiles of single uploads (X-Profile header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -73,6 +167,30 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost: every request gets an ID for its log records and one access log line
+app.add_middleware(RequestIdMiddleware, name=APP_NAME)
+
+# Routes let these propagate: the same 503 and Retry-After wherever they're raised
+async def retry_later(request: Request, exc: Exception) -> JSONResponse:
+    """An open upstream breaker or a full job queue, from any route: 503 with when to retry."""
+    log.warning("Request rejected", path=request.url.path, error=str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"error": str(exc), "retry_after": round(exc.retry_after, 1)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    )
+
+app.add_exception_handler(CircuitOpenError, retry_later)
+app.add_exception_handler(QueueFull, retry_later)
+
+# ===========================================
+#  3️⃣ DATA MODELS
+# ===========================================
+class FollowUpPayload(BaseModel):
+    session: str  # the `session` of an earlier /api/upload response
+    refine: List[str] = []  # "cheaper", "closer", "open_now", "top_rated"
+    message: Optional[str] = None  # free text, searched for the same refinements
+    lang: Optional[str] = None
 
 
 # ===========================================
@@ -82,35 +200,57 @@ def get_location_name(lat: float, lon: float) -> str:
     """
     Get human-readable location name using Nominatim first, then Google Maps as fallback.
     Returns "Unknown location" if neither can determine it.
+    Resolved names are cached for GEOCODE_CACHE_TTL per ~110 m cell, and the
+    lookup is one cassette exchange in record/replay mode.
     """
+    cache_key = location_key(lat, lon)
+    cached = get_cache("geocode").get(cache_key)
+    if cached is not None:
+        return cached[0]
+
+    address = exchange("geocode", {"latitude": lat, "longitude": lon}, lambda: reverse_geocode(lat, lon))
+    if address:
+        get_cache("geocode").put(cache_key, address)
+        return address
+    return "Unknown location"
+
+
+def reverse_geocode(lat: float, lon: float) -> Optional[str]:
+    """Uncached lookup behind `get_location_name`; None if neither service knows the place."""
     try:
-        from geopy.geocoders import Nominatim
-        geolocator = Nominatim(user_agent="nearlens", timeout=10)
+        charge("geocode", geocode_calls=1)
         location = geolocator.reverse((lat, lon))
         if location and location.address:
             return location.address
     except Exception as e:
-        print(f"⚠️ Nominatim failed: {str(e)}")
+        log.warning("Nominatim reverse geocode failed", error=str(e))
 
     if gmaps:
         try:
+            charge("geocode", geocode_calls=1)
             reverse_geocode = gmaps.reverse_geocode((lat, lon))
             if reverse_geocode and len(reverse_geocode) > 0:
                 return reverse_geocode[0].get('formatted_address', 'Unknown location')
         except Exception as e:
-            print(f"⚠️ Google Maps reverse geocode failed: {str(e)}")
+            log.warning("Google Maps reverse geocode failed", error=str(e))
 
-    return "Unknown location"
+    return None
 
 async def get_agent_final_output(
-    session_service, user_id: str, session_id: str, input_message: types.Content
+    session_service, user_id: str, session_id: str, input_message: "types.Content",
+    call_args: Optional[Dict] = None, agent=None,
 ) -> Optional[str]:
     """
     Execute agent pipeline and return ONLY the final user-facing text response.
+    If `call_args` is given it receives the `find_nearby_places` call arguments.
+    `agent` runs a single stage instead of the whole pipeline.
     """
+    from google.adk.runners import Runner
+    from nearLens_agent.agent import root_agent
+
     runner = Runner(
         app_name=APP_NAME,
-        agent=root_agent,
+        agent=agent or root_agent,
         session_service=session_service,
     )
 
@@ -121,33 +261,236 @@ async def get_agent_final_output(
     )
 
     final_text_response = None
-    async for event in events:
-        if event.is_final_response() and event.content and event.content.parts:
-            text_parts = [p.text for p in event.content.parts if p.text]
-            if text_parts:
-                final_text_response = "\n".join(text_parts)
-        # For debugging, uncomment the line below to see all intermediate events
-        # print(f"DEBUG: Agent Event: {event}")
-
-         # 🔹 Process function calls (arguments)
-        calls = event.get_function_calls()
-        if calls:
-            for call in calls:
-                if call.name == "find_nearby_places":
-                    arguments = call.args
-                    # print(f"\n Items arguments: {arguments}")
-
-                  
+    tool_result = None
+    served_stale = False
+    started = time.perf_counter()
+    try:
+        async for event in events:
+            charge_event(event)
+            if event.actions and event.actions.state_delta.get(STALE_FLAG):
+                served_stale = True
+
+            if event.is_final_response() and event.content and event.content.parts:
+                text_parts = [p.text for p in event.content.parts if p.text]
+                if text_parts:
+                    final_text_response = "\n".join(text_parts)
+            # For debugging, uncomment the line below to see all intermediate events
+            # log.debug("Agent event", event=str(event))
+
+            # 🔹 Process function calls (arguments)
+            calls = event.get_function_calls()
+            if calls:
+                for call in calls:
+                    if call.name == "find_nearby_places":
+                        arguments = call.args
+                        if call_args is not None:
+                            call_args.update(arguments or {})
 
             # 🔹 Process function responses (results)
-        responses = event.get_function_responses()
-        if responses:
-            for response in responses:
-                if response.name == "find_nearby_places":
-                    result_dict = response.response
-                    return result_dict
+            responses = event.get_function_responses()
+            if responses:
+                for response in responses:
+                    if response.name == "find_nearby_places":
+                        result_dict = response.response
+                        tool_result = {**result_dict, "stale": True} if served_stale else result_dict
+                        log.payload("Places tool result", tool_result)
+            # With STOP_AT_TOOL_RESULT the tool event is the final one and the run
+            # ends by itself; otherwise stop reading before the summary turn.
+            if tool_result is not None and not STOP_AT_TOOL_RESULT:
+                break
+        return tool_result
+    except (CircuitOpenError, CassetteMiss):
+        # A replay miss is a gap in the recording, not a model failure
+        raise
+    except Exception:
+        # Tool errors come back as dicts, so anything escaping the runner is a model failure
+        get_breaker("gemini").record_failure()
+        raise
+    finally:
+        # Close the run here, in this task, rather than whenever the abandoned
+        # generator gets collected; any model work still pending is cancelled.
+        await events.aclose()
+        record_stage("agent_run", (time.perf_counter() - started) * 1000)
+
+
+def open_results_cursor(search_args: Dict, final_output) -> Optional[str]:
+    """Cursor for `/api/places/next`, or None if the run produced no live places."""
+    if not search_args or not isinstance(final_output, dict) or not final_output.get("places"):
+        return None
+    if final_output.get("stale"):
+        return None
+    from lens_common.pagination import open_cursor
+    return open_cursor(search_args, final_output["places"], final_output.get("search_radius_m"))
+
+
+def save_upload(original_name: str, image_data: bytes) -> str:
+    os.makedirs("uploads", exist_ok=True)
+    filename = f"uploads/{uuid.uuid4()}_{original_name}"
+    with open(filename, "wb") as buffer:
+        buffer.write(image_data)
+    return filename
+
+def read_upload(filename: str) -> bytes:
+    with open(filename, "rb") as f:
+        return f.read()
+
+async def analyze_image(
+    image_data: bytes, mime_type: str, latitude: float, longitude: float,
+    search_args: Optional[Dict] = None, latency_budget_ms: Optional[float] = None,
+) -> Dict:
+    """
+    Run the agent pipeline for one image in a fresh session and build the API response.
+    Raises CircuitOpenError while an upstream breaker is open.
+    If `search_args` is given it receives the `find_nearby_places` call arguments.
+    `latency_budget_ms` (else LATENCY_BUDGET_MS) lets stages drop to a lighter model tier.
+    """
+    from lens_common.followup import open_followup
+    from lens_common.model_tiers import deadline_state
+    await ensure_ready(app)
+    from google.genai import types
+
+    session_service = app.state.session_service
+    user_id = f"user-{uuid.uuid4()}"
+    session_id = f"session-{uuid.uuid4()}"
+
+    # Last-known-good results are keyed by location + image content
+    stale_key = location_key(latitude, longitude, await run_cpu_buffer(content_digest, image_data))
+
+    try:
+        await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            session_id=session_id,
+            state={STALE_KEY: stale_key, **deadline_state(latency_budget_ms)},
+        )
+        log.debug("Created one-shot session", session_id=session_id)
+    except Exception as e:
+        log.error("Session creation failed", error=str(e))
+        return {"error": f"Failed to initialize session: {str(e)}"}
+
+    log.info("Analysing image", latitude=latitude, longitude=longitude, bytes=len(image_data))
+
+    # Construct ADK input message with explicit parts for agent parsing
+    # The prompt now includes raw lat/lon directly for the LLM to use
+    parts = [
+        types.Part.from_text(text="Analyze this image for nearby insights and recommend places."),
+        types.Part.from_text(text=f"User's coordinates for search: Lat={latitude}, Lon={longitude}"), # Pass raw coordinates
+        types.Part.from_bytes(data=image_data, mime_type=mime_type),
+    ]
+
+    input_message = types.Content(
+        role="user",
+        parts=parts
+    )
+
+    search_args = {} if search_args is None else search_args
+    try:
+        final_output = await get_agent_final_output(
+            session_service, user_id, session_id, input_message, call_args=search_args
+        )
+    finally:
+        await release_session(session_service, APP_NAME, user_id, session_id)
+
+    return {
+        "status": "success",
+        "latitude_input": latitude,
+        "longitude_input": longitude,
+        "agent_response": final_output if final_output else "No specific response generated by the agent.",
+        "cursor": open_results_cursor(search_args, final_output),
+        "session": open_followup(search_args, final_output),
+    }
+
+async def analyze_label(
+    label: str, latitude: float, longitude: float, latency_budget_ms: Optional[float] = None,
+) -> Dict:
+    """
+    Find places for an object label the client already has, without the vision
+    stage. A label in TYPE_MAPPING goes straight to the Places tool (no model
+    call); any other runs the recommender stage alone to infer the place types.
+    Raises CircuitOpenError while an upstream breaker is open.
+    """
+    from lens_common.followup import open_followup
+    from nearLens_agent.tools.places_tool import NearbyPlaceRequest, find_nearby_places
+    from lens_common.type_mapping import types_for_label
+
+    included_types = types_for_label(label)
+    if included_types is not None:
+        search_args = {"image_label": label, "latitude": latitude, "longitude": longitude, "included_types": included_types}
+        final_output = await find_nearby_places(NearbyPlaceRequest(**search_args))
+    else:
+        search_args = {}
+        final_output = await recommend_for_label(label, latitude, longitude, search_args, latency_budget_ms)
 
-                  
+    return {
+        "status": "success",
+        "latitude_input": latitude,
+        "longitude_input": longitude,
+        "label": label,
+        "type_source": "mapping" if included_types is not None else "model",
+        "agent_response": final_output if final_output else "No specific response generated by the agent.",
+        "cursor": open_results_cursor(search_args, final_output),
+        "session": open_followup(search_args, final_output),
+    }
+
+async def recommend_for_label(
+    label: str, latitude: float, longitude: float, search_args: Dict, latency_budget_ms: Optional[float] = None,
+):
+    """The recommender stage alone, fed the label as if the vision stage had produced it."""
+    from nearLens_agent.sub_agents.local_recommender_agent import local_recommender_agent
+    from lens_common.model_tiers import deadline_state
+    await ensure_ready(app)
+    from google.genai import types
+
+    session_service = app.state.session_service
+    user_id = f"user-{uuid.uuid4()}"
+    session_id = f"session-{uuid.uuid4()}"
+    await session_service.create_session(
+        app_name=APP_NAME,
+        user_id=user_id,
+        session_id=session_id,
+        # Last-known-good tool arguments are keyed by location + label
+        state={STALE_KEY: location_key(latitude, longitude, label), **deadline_state(latency_budget_ms)},
+    )
+    input_message = types.Content(role="user", parts=[
+        types.Part.from_text(text=f"vision_analyzer_labels: {label}"),
+        types.Part.from_text(text=f"User's coordinates for search: Lat={latitude}, Lon={longitude}"),
+    ])
+    try:
+        return await get_agent_final_output(
+            session_service, user_id, session_id, input_message,
+            call_args=search_args, agent=local_recommender_agent,
+        )
+    finally:
+        await release_session(session_service, APP_NAME, user_id, session_id)
+
+async def run_upload_pipeline(
+    filename: str, image_data: bytes, latitude: float, longitude: float,
+    latency_budget_ms: Optional[float] = None,
+) -> Dict:
+    """
+    Analyse one saved upload from its bytes already in memory. Raises
+    CircuitOpenError while an upstream breaker is open. Removes the file when done.
+    """
+    try:
+        mime_type, _ = mimetypes.guess_type(filename)
+        if not mime_type or not mime_type.startswith('image/'):
+            log.warning("Unknown image MIME type, defaulting to image/jpeg", filename=filename)
+            mime_type = "image/jpeg"
+
+        return await analyze_image(image_data, mime_type, latitude, longitude, latency_budget_ms=latency_budget_ms)
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+async def run_upload_job(payload: Dict) -> Dict:
+    """Job queue handler: the same pipeline as `/api/upload`, fed from the saved file."""
+    filename = payload["filename"]
+    # Batch work waits for its share of the in-flight byte budget
+    async with track_costs("job", detach=True), admission_controller().batch(os.path.getsize(filename)):
+        image_data = await run_blocking(read_upload, filename)
+        return await run_upload_pipeline(filename, image_data, payload["latitude"], payload["longitude"])
+
+job_queue = JobQueue(run_upload_job, app=APP_NAME)
 
 
 # ===========================================
@@ -159,78 +502,305 @@ async def home():
 
 @app.post("/api/upload")
 async def upload_image(
+    request: Request,
     file: UploadFile = File(...),
     latitude: float = Form(...),
     longitude: float = Form(...),
+    lang: Optional[str] = Form(None),
+    latency_budget_ms: Optional[float] = Form(None),
 ):
     """
     Handle image uploads with location info and run AI-based analysis.
-    Returns a single final output from the agent.
+    Returns a single final output from the agent, translated into `lang`
+    (or the Accept-Language) when that isn't English. A tight
+    `latency_budget_ms` (or X-Latency-Budget-Ms header) routes stages to lighter models.
     """
-    session_service = app.state.session_service
-    user_id = f"user-{uuid.uuid4()}"
-    session_id = f"session-{uuid.uuid4()}"
+    from lens_common.model_tiers import LATENCY_BUDGET_HEADER, request_budget_ms
+    from lens_common.translation import localize_response, resolve_language
 
+    user_lang = resolve_language(lang, request.headers.get("accept-language"))
+    budget_ms = request_budget_ms(latency_budget_ms, request.headers.get(LATENCY_BUDGET_HEADER))
     try:
-        await session_service.create_session(
-            app_name=APP_NAME,
-            user_id=user_id,
-            session_id=session_id
-        )
-        print(f"✅ Created one-shot session: {session_id}")
+        async with track_costs("upload"):
+            image_data = await file.read()
+            filename = await run_blocking(save_upload, file.filename, image_data)
+            result = await run_upload_pipeline(filename, image_data, latitude, longitude, budget_ms)
+            return await localize_response(result, user_lang)
+
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        print(f"❌ Session creation failed: {str(e)}")
-        return {"error": f"Failed to initialize session: {str(e)}"}
-
-    try:
-        os.makedirs("uploads", exist_ok=True)
-        filename = f"uploads/{uuid.uuid4()}_{file.filename}"
-        with open(filename, "wb") as buffer:
-            buffer.write(await file.read())
-
-        print(f"📸 Image received: {filename}")
-        print(f"📍 Location: lat={latitude}, lon={longitude}")
+        log.exception("Upload failed", error=str(e))
+        return await localize_response({"error": f"Image upload failed: {str(e)}"}, user_lang)
 
-        # Construct ADK input message with explicit parts for agent parsing
-        # The prompt now includes raw lat/lon directly for the LLM to use
-        parts = [
-            types.Part.from_text(text="Analyze this image for nearby insights and recommend places."),
-            types.Part.from_text(text=f"User's coordinates for search: Lat={latitude}, Lon={longitude}"), # Pass raw coordinates
-        ]
-
-        mime_type, _ = mimetypes.guess_type(filename)
-        if not mime_type or not mime_type.startswith('image/'):
-            print(f"⚠️ Could not determine image MIME type for {filename}, defaulting to image/jpeg.")
-            mime_type = "image/jpeg"
-        
-        with open(filename, "rb") as f:
-            image_bytes = f.read()
-        parts.append(types.Part.from_bytes(data=image_bytes, mime_type=mime_type))
-
-        input_message = types.Content(
-            role="user",
-            parts=parts
+@app.post("/api/label")
+async def search_by_label(
+    request: Request,
+    label: str = Form(...),
+    latitude: float = Form(...),
+    longitude: float = Form(...),
+    confidence: Optional[float] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    lang: Optional[str] = Form(None),
+    latency_budget_ms: Optional[float] = Form(None),
+):
+    """
+    Nearby places for a label from an on-device classifier: skips server-side
+    vision and resolves place types from the label directly. A `confidence`
+    below LABEL_MIN_CONFIDENCE escalates to the full `/api/upload` pipeline on
+    the attached image (422 without one, so the client can resend it).
+    """
+    from lens_common.model_tiers import LATENCY_BUDGET_HEADER, request_budget_ms
+    from lens_common.translation import localize_response, resolve_language
+
+    user_lang = resolve_language(lang, request.headers.get("accept-language"))
+    budget_ms = request_budget_ms(latency_budget_ms, request.headers.get(LATENCY_BUDGET_HEADER))
+    label = label.strip()
+    if not label:
+        return JSONResponse(status_code=422, content={"error": "Empty label."})
+    escalate = confidence is not None and confidence < LABEL_MIN_CONFIDENCE
+    if escalate and file is None:
+        return JSONResponse(
+            status_code=422,
+            content={
+                "error": "Label confidence is below the threshold; resend with the image for server-side vision.",
+                "min_confidence": LABEL_MIN_CONFIDENCE,
+                "escalate": True,
+            },
         )
+    started = time.perf_counter()
+    try:
+        async with track_costs("label"):
+            if escalate:
+                image_data = await file.read()
+                filename = await run_blocking(save_upload, file.filename, image_data)
+                result = await run_upload_pipeline(filename, image_data, latitude, longitude, budget_ms)
+                result = {**result, "label": label, "type_source": "vision", "escalated": True}
+            else:
+                result = await analyze_label(label, latitude, longitude, budget_ms)
+            record_stage(
+                "label_search", (time.perf_counter() - started) * 1000,
+                mapped=int(result.get("type_source") == "mapping"), escalated=int(escalate),
+            )
+            return await localize_response(result, user_lang)
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        log.exception("Label search failed", error=str(e))
+        return await localize_response({"error": f"Label search failed: {str(e)}"}, user_lang)
 
-        final_output = await get_agent_final_output(session_service, user_id, session_id, input_message)
-
+@app.post("/api/jobs", status_code=202)
+async def submit_upload_job(
+    file: UploadFile = File(...),
+    latitude: float = Form(...),
+    longitude: float = Form(...),
+):
+    """
+    Queue an upload for background analysis and return its job ID right away.
+    Poll `/api/jobs/{job_id}` or subscribe to `/api/jobs/{job_id}/events` for the result.
+    """
+    image_data = await file.read()
+    filename = await run_blocking(save_upload, file.filename, image_data)
+    try:
+        return await job_queue.submit({"filename": filename, "latitude": latitude, "longitude": longitude})
+    except QueueFull:
         os.remove(filename)
+        raise
+
+@app.get("/api/jobs/metrics")
+async def job_metrics():
+    """Queue depth, wait time and service time of the upload job queue."""
+    return job_queue.metrics()
+
+@app.get("/api/jobs/{job_id}")
+async def get_upload_job(job_id: str, wait: float = 0):
+    """Job status and, once done, its result. `wait` long-polls up to that many seconds (max 30)."""
+    job = await job_queue.wait(job_id, min(wait, 30.0)) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job."})
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_upload_job(job_id: str):
+    """Server-sent events: the job's status now, and again when it finishes."""
+    if job_queue.get(job_id) is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job."})
+
+    async def events():
+        job = job_queue.get(job_id)
+        yield f"data: {json.dumps(job)}\n\n"
+        while job and job["status"] not in ("done", "failed"):
+            job = await job_queue.wait(job_id, 15.0)
+            if job and job["status"] in ("done", "failed"):
+                yield f"data: {json.dumps(job)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.websocket("/api/live")
+async def live_camera(websocket: WebSocket, latitude: Optional[float] = None, longitude: Optional[float] = None):
+    """
+    Live camera mode. The client streams encoded frames as binary messages and
+    location updates as JSON text (`{"latitude": .., "longitude": ..}`).
 
-        return {
-            "status": "success",
-            "latitude_input": latitude,
-            "longitude_input": longitude,
-            "agent_response": final_output if final_output else "No specific response generated by the agent.",
-        }
+    At most LIVE_ANALYSIS_RATE frames per second are analysed, always the newest
+    one; frames perceptually identical to the last analysed frame are skipped.
+    A `places` message is pushed only when the resolved labels change.
+    """
+    from nearLens_agent.tools.live import (
+        LIVE_MAX_FRAME_BYTES, LIVE_MOVE_THRESHOLD_M, FrameGate, frame_hash, frame_mime_type,
+    )
 
-    except Exception as e:
-        print(f"❌ Upload failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return {"error": f"Image upload failed: {str(e)}"}
+    await websocket.accept()
+    gate = FrameGate()
+    location = {"latitude": latitude, "longitude": longitude}
+    pending: Dict[str, bytes] = {}  # newest frame not yet looked at
+    frame_ready = asyncio.Event()
+
+    async def analyse_frames():
+        # WebSockets bypass RequestIdMiddleware: one ID per connection, tagged with this app
+        with request_context(app=APP_NAME):
+            while True:
+                await frame_ready.wait()
+                await asyncio.sleep(gate.wait_time())
+                frame_ready.clear()
+                image_data = pending.pop("frame")
+
+                try:
+                    hashed = await run_cpu_buffer(frame_hash, image_data)
+                except Exception:
+                    gate.stats["frames_invalid"] += 1
+                    continue
+                if not gate.admit(hashed):
+                    continue
+                if location["latitude"] is None or location["longitude"] is None:
+                    await websocket.send_json({"type": "error", "error": "Send your location before streaming frames."})
+                    continue
+
+                gate.mark_analysed(hashed)
+                search_args: Dict = {}
+                try:
+                    async with track_costs("live"):
+                        result = await analyze_image(
+                            image_data, frame_mime_type(image_data),
+                            location["latitude"], location["longitude"], search_args,
+                        )
+                except CircuitOpenError as e:
+                    await websocket.send_json({"type": "error", "error": str(e), "retry_after": round(e.retry_after, 1)})
+                    continue
+                except Exception as e:
+                    log.error("Live analysis failed", error=str(e))
+                    await websocket.send_json({"type": "error", "error": f"Analysis failed: {str(e)}"})
+                    continue
+
+                if "error" in result:
+                    await websocket.send_json({"type": "error", "error": result["error"]})
+                elif gate.labels_changed(search_args):
+                    req = search_args.get("req", search_args)
+                    await websocket.send_json({
+                        "type": "places",
+                        "label": req.get("image_label"),
+                        "included_types": req.get("included_types"),
+                        **result,
+                        "stats": gate.stats,
+                    })
+
+    analyser = asyncio.create_task(analyse_frames())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                gate.stats["frames_received"] += 1
+                if len(message["bytes"]) > LIVE_MAX_FRAME_BYTES:
+                    gate.stats["frames_invalid"] += 1
+                    continue
+                if "frame" in pending:
+                    gate.stats["frames_throttled"] += 1  # superseded before it was looked at
+                pending["frame"] = message["bytes"]
+                frame_ready.set()
+                continue
+
+            try:
+                update = json.loads(message.get("text") or "{}")
+                new_lat, new_lon = float(update["latitude"]), float(update["longitude"])
+            except (ValueError, KeyError, TypeError):
+                await websocket.send_json({"type": "error", "error": "Expected {\"latitude\": .., \"longitude\": ..}."})
+                continue
+
+            if location["latitude"] is not None:
+                from lens_common.geo import haversine_m
+                moved = float(haversine_m(location["latitude"], location["longitude"], new_lat, new_lon))
+                if moved < LIVE_MOVE_THRESHOLD_M:
+                    continue
+            # A new place makes the same scene worth analysing (and pushing) again
+            location.update(latitude=new_lat, longitude=new_lon)
+            gate.invalidate()
+            gate.reset_labels()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        analyser.cancel()
+        await asyncio.gather(analyser, return_exceptions=True)
+        log.info("Live session closed", **gate.stats)
+
+@app.get("/api/places/next")
+async def next_places(cursor: str):
+    """
+    Fetch the next page of places for a cursor returned by `/api/upload`.
+    Reuses the resolved place types and location; never calls the agent.
+    """
+    from lens_common.pagination import CursorNotFound, next_page
+    from lens_common.places import PlacesAPIError
+
+    try:
+        async with track_costs("next_page"):
+            return await run_blocking(next_page, cursor)
+    except CursorNotFound:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired cursor."})
+    except PlacesAPIError as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+
+@app.post("/api/followup")
+async def follow_up_session(payload: FollowUpPayload, request: Request):
+    """
+    Refine the places of an earlier `/api/upload` by its `session`: cheaper,
+    closer, open now or top rated, given in `refine` or found in `message`.
+    Reuses the label, types, location and Places answer of that run: never
+    calls the agent, and makes at most one Places call.
+    """
+    from lens_common.followup import FollowUpNotFound, follow_up, parse_refinements
+    from lens_common.places import PlacesAPIError
+    from lens_common.translation import localize_response, resolve_language
+
+    refinements = list(payload.refine) + (parse_refinements(payload.message) if payload.message else [])
+    if not refinements:
+        return JSONResponse(status_code=400, content={"error": "No refinement given or recognised in the message."})
+    user_lang = resolve_language(payload.lang, request.headers.get("accept-language"), payload.message or "")
+    try:
+        async with track_costs("followup"):
+            result = await run_blocking(follow_up, payload.session, refinements)
+            return await localize_response(result, user_lang)
+    except FollowUpNotFound:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired session."})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except PlacesAPIError as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: waits for imports, clients and pooled connections to be warm."""
+    await ensure_ready(app)
+    return {"status": "ready", "warmup": app.state.warmup_timings}
 
 @app.get("/api/debug")
 async def debug():
+    await ensure_ready(app)
     lat, lon = 0.3476, 32.5827
     location = get_location_name(lat, lon)
     return {
@@ -240,6 +810,73 @@ async def debug():
         "geocoding": "OK" if location != "Unknown location" else "Failed",
     }
 
+@app.get("/api/breakers")
+async def breakers():
+    """Current state of the per-upstream circuit breakers."""
+    return breaker_status()
+
+@app.get("/api/metrics/stages")
+async def stage_stats():
+    """Latency percentiles and counters of the measured pipeline stages."""
+    from lens_common.metrics import stage_metrics
+    return stage_metrics()
+
+@app.get("/api/cache")
+async def cache_stats():
+    """Backend, hit/miss counters and TTLs of the shared caches."""
+    return await asyncio.to_thread(cache_status)
+
+@app.get("/api/admin/profiles")
+async def list_request_profiles(request: Request):
+    """Stored request profiles, newest first. Requires X-Admin-Token = PROFILE_TOKEN."""
+    from lens_common.profiling import list_profiles
+
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return JSONResponse(status_code=403, content={"error": "Admin token required"})
+    return {"profiles": await asyncio.to_thread(list_profiles)}
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_request_profile(profile_id: str, request: Request, format: str = "json"):
+    """
+    One stored profile: `format=json` for the report (top functions, allocation
+    diff) or `format=folded` for collapsed stacks to feed a flame graph tool.
+    """
+    from lens_common.profiling import profile_file
+
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return JSONResponse(status_code=403, content={"error": "Admin token required"})
+    path = profile_file(profile_id, format)
+    if path is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown profile or format"})
+    media_type = "application/json" if format == "json" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+@app.get("/api/admission")
+async def admission_stats():
+    """In-flight bytes against the budget and admitted/rejected counters."""
+    return admission_status()
+
+@app.get("/api/vision/batching")
+async def vision_batching_stats():
+    """Vision micro-batching: batch sizes, model calls saved, and the wait each image added."""
+    from nearLens_agent.tools.vision_batch import vision_batch_status
+    return vision_batch_status()
+
+@app.get("/api/costs")
+async def cost_stats(window_s: float = 86400):
+    """Gemini tokens, tool calls and Places/geocoding calls per request and per stage over the window."""
+    return await cost_summary(window_s, APP_NAME)
+
+@app.get("/api/logs")
+async def log_stats():
+    """Log level and format, queued records and records dropped because the queue was full."""
+    return log_status()
+
+@app.get("/api/cassette")
+async def cassette_stats():
+    """Record/replay mode, store path and recorded exchanges per upstream."""
+    return await asyncio.to_thread(cassette_status)
+
 # ===========================================
 #  6️⃣ RUN SERVER
 # ===========================================
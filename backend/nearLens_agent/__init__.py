@@ -1,16 +1,23 @@
-# Expose the orchestrator (root) agent directly
-from .agent import root_agent
+# Expose the orchestrator (root) agent directly.
+# Imports are resolved on first attribute access so that importing a helper
+# module (e.g. `.tools.circuit_breaker`) doesn't build the whole agent tree.
+import importlib
 
-# Optional: expose sub-agents for direct import if needed
-from .sub_agents.intro_agent import intro_agent
-from .sub_agents.vision_analyzer_agent import vision_analyzer_agent
-from .sub_agents.local_recommender_agent import local_recommender_agent
-from .sub_agents.translator_agent import translator_agent
+_EXPORTS = {
+    "root_agent": ".agent",
+    # Optional: expose sub-agents for direct import if needed
+    "intro_agent": ".sub_agents.intro_agent",
+    "vision_analyzer_agent": ".sub_agents.vision_analyzer_agent",
+    "local_recommender_agent": ".sub_agents.local_recommender_agent",
+    "translator_agent": ".sub_agents.translator_agent",
+}
 
-__all__ = [
-    "root_agent",
-    "intro_agent",
-    "vision_analyzer_agent",
-    "local_recommender_agent",
-    "translator_agent",
-]
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    if name in ("agent", "sub_agents", "tools"):
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
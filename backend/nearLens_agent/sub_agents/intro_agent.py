@@ -1,10 +1,16 @@
 from google.adk.agents import Agent
 from nearLens_agent.tools.instructions import NEARLENS_INTRO_AGENT_INSTRUCTION
+from lens_common.model_guard import guard_model
+from lens_common.model_tiers import stage_model
 
 
+intro_before_model, intro_after_model = guard_model("intro")
+
 intro_agent = Agent(
     name="nearlens_intro_agent",
-    model="gemini-2.5-flash",
+    model=stage_model("intro"),
     description="Handles initial interaction for NearLens.",
     instruction=NEARLENS_INTRO_AGENT_INSTRUCTION,
+    before_model_callback=intro_before_model,
+    after_model_callback=intro_after_model,
 )
@@ -1,11 +1,19 @@
 from google.adk.agents import Agent
 from nearLens_agent.tools.instructions import VISION_ANALYZER_AGENT_INSTRUCTION
+from lens_common.model_guard import guard_model
+from lens_common.model_tiers import stage_model
+from nearLens_agent.tools.vision_batch import batched_vision
 
 
+vision_before_model, vision_after_model = guard_model("vision")
+
 vision_analyzer_agent = Agent(
     name="nearlens_vision_analyzer",
-    model="gemini-2.5-flash",
+    model=stage_model("vision"),
     description="Analyzes uploaded images for key objects or items.",
     instruction=VISION_ANALYZER_AGENT_INSTRUCTION,
     output_key="vision_analyzer_labels",
+    # The guard answers from cache or the breaker first; otherwise concurrent images may share one call
+    before_model_callback=[vision_before_model, batched_vision(vision_after_model)],
+    after_model_callback=vision_after_model,
 )
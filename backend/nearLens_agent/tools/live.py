@@ -0,0 +1,121 @@
+import io
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+# ===============================
+# CONFIGURATION
+# ===============================
+LIVE_ANALYSIS_RATE = float(os.getenv("LIVE_ANALYSIS_RATE", "0.5"))  # analyses per second per connection
+LIVE_HASH_THRESHOLD = int(os.getenv("LIVE_HASH_THRESHOLD", "6"))  # differing bits (of 64) that count as "unchanged"
+LIVE_MAX_FRAME_BYTES = int(os.getenv("LIVE_MAX_FRAME_BYTES", str(4 * 1024 * 1024)))
+LIVE_MOVE_THRESHOLD_M = float(os.getenv("LIVE_MOVE_THRESHOLD_M", "100"))
+
+HASH_SIZE = 8
+
+
+# ===============================
+# PERCEPTUAL HASH
+# ===============================
+def frame_hash(image_data: bytes) -> int:
+    """
+    64-bit difference hash (dHash) of an encoded image.
+
+    The frame is shrunk to 9x8 greyscale and each bit records whether a pixel is
+    brighter than its right neighbour, so small camera noise, compression and
+    exposure changes leave the hash (almost) untouched while a new scene flips many bits.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_data)) as img:
+        img.draft("L", (HASH_SIZE * 4, HASH_SIZE * 4))  # let JPEG decode at reduced size
+        pixels = list(img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata())
+
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def frame_mime_type(image_data: bytes) -> str:
+    """MIME type from the frame's magic bytes; camera streams are JPEG unless they say otherwise."""
+    if image_data.startswith(b"\x89PNG"):
+        return "image/png"
+    if image_data[:4] == b"RIFF" and image_data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+
+# ===============================
+# FRAME GATE
+# ===============================
+class FrameGate:
+    """
+    Decides which frames of a live camera stream are worth analysing.
+
+    A frame is analysed only if at least `1 / rate` seconds have passed since the
+    previous analysis and its perceptual hash differs from the last analysed frame
+    by more than `threshold` bits (or the user moved). Pushes are gated separately
+    by `labels_changed`, so re-analysing the same scene never re-sends results.
+    """
+
+    def __init__(self, rate: float = LIVE_ANALYSIS_RATE, threshold: int = LIVE_HASH_THRESHOLD):
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self.threshold = threshold
+        self._last_hash: Optional[int] = None
+        self._last_analysis = 0.0
+        self._last_labels: Optional[Tuple] = None
+        self._force = False
+        self.stats: Dict[str, int] = {
+            "frames_received": 0,
+            "frames_unchanged": 0,
+            "frames_throttled": 0,
+            "frames_invalid": 0,
+            "analyses": 0,
+            "pushes": 0,
+        }
+
+    def wait_time(self) -> float:
+        """Seconds until the throttle allows the next analysis."""
+        return max(0.0, self._last_analysis + self.min_interval - time.monotonic())
+
+    def invalidate(self) -> None:
+        """Analyse the next frame even if it looks the same (e.g. the location changed)."""
+        self._force = True
+
+    def admit(self, frame_hash_value: int) -> bool:
+        """True if the frame differs enough from the last analysed one."""
+        if self._force or self._last_hash is None:
+            return True
+        if hamming(frame_hash_value, self._last_hash) <= self.threshold:
+            self.stats["frames_unchanged"] += 1
+            return False
+        return True
+
+    def mark_analysed(self, frame_hash_value: int) -> None:
+        self._last_hash = frame_hash_value
+        self._last_analysis = time.monotonic()
+        self._force = False
+        self.stats["analyses"] += 1
+
+    def labels_changed(self, search_args: Dict) -> bool:
+        """Compare the resolved label/place types with the last pushed ones."""
+        req = search_args.get("req", search_args)
+        labels = (
+            str(req.get("image_label", "")).strip().lower(),
+            tuple(sorted(req.get("included_types") or [])),
+        )
+        if labels == self._last_labels:
+            return False
+        self._last_labels = labels
+        self.stats["pushes"] += 1
+        return True
+
+    def reset_labels(self) -> None:
+        self._last_labels = None
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from lens_common.cassette import CassetteMiss, exchange_async
+from lens_common.circuit_breaker import get_breaker
+from .instructions import VISION_BATCH_INSTRUCTION
+from lens_common.logs import get_logger
+from lens_common.metrics import STAGES, record_stage
+
+log = get_logger("vision_batch")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+VISION_BATCH = os.getenv("VISION_BATCH", "0") == "1"
+# How long the first image of a batch waits for company, and the most images per model call
+VISION_BATCH_WINDOW_MS = float(os.getenv("VISION_BATCH_WINDOW_MS", "15"))
+VISION_BATCH_MAX = int(os.getenv("VISION_BATCH_MAX", "8"))
+VISION_BATCH_TIMEOUT = float(os.getenv("VISION_BATCH_TIMEOUT", "30"))
+
+Labels = Tuple[str, types.GenerateContentResponseUsageMetadata]
+
+
+class _Waiter:
+    __slots__ = ("image", "future", "queued")
+
+    def __init__(self, image: types.Part, future: asyncio.Future):
+        self.image = image
+        self.future = future
+        self.queued = time.perf_counter()
+
+
+# ===============================
+# BATCHER
+# ===============================
+class VisionBatcher:
+    """
+    Collects single-image labelling calls that arrive within `window_ms` of each
+    other (per model and instruction) and sends them as one multi-image request
+    asking for a JSON array of labels, then hands each caller its own entry.
+
+    A batch of one, a failed batch call or an answer of the wrong shape resolves
+    its callers with None: they make their usual single-image call instead, so
+    batching can only add the window to a request's latency, never fail it.
+    """
+
+    def __init__(self, window_ms: float = VISION_BATCH_WINDOW_MS, max_size: int = VISION_BATCH_MAX):
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self._groups: Dict[Tuple[str, str], List[_Waiter]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._running: set = set()
+        self._sizes: Deque[int] = deque(maxlen=1000)
+        self.stats = {
+            "requests": 0, "batches": 0, "failed_batches": 0, "batched_requests": 0, "solo": 0, "fallbacks": 0,
+        }
+        self._client = None
+
+    async def label(self, model: str, instruction: str, image: types.Part) -> Optional[Labels]:
+        """This image's labels and share of the batch's token usage, or None to call the model alone."""
+        loop = asyncio.get_running_loop()
+        key = (model, instruction)
+        waiter = _Waiter(image, loop.create_future())
+        group = self._groups.setdefault(key, [])
+        group.append(waiter)
+        self.stats["requests"] += 1
+        if len(group) >= self.max_size:
+            self._flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await waiter.future
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        waiters = [w for w in self._groups.pop(key, []) if not w.future.done()]
+        if not waiters:
+            return
+        now = time.perf_counter()
+        for waiter in waiters:
+            record_stage("vision_batch_wait", (now - waiter.queued) * 1000, batch_size=len(waiters))
+        if len(waiters) == 1:
+            self.stats["solo"] += 1
+            waiters[0].future.set_result(None)
+            return
+        task = asyncio.ensure_future(self._run(key, waiters))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: Tuple[str, str], waiters: List[_Waiter]) -> None:
+        model, instruction = key
+        started = time.perf_counter()
+        labels, usage = None, None
+        try:
+            labels, usage = await self._call(model, instruction, [w.image for w in waiters])
+        except Exception as e:
+            if not isinstance(e, CassetteMiss):
+                get_breaker("gemini").record_failure()
+            log.warning("Vision batch failed", size=len(waiters), error=str(e))
+
+        self._sizes.append(len(waiters))
+        self.stats["batches"] += 1
+        if labels is None:
+            self.stats["failed_batches"] += 1
+            self.stats["fallbacks"] += len(waiters)
+        else:
+            self.stats["batched_requests"] += len(waiters)
+        record_stage(
+            "vision_batch", (time.perf_counter() - started) * 1000,
+            images=len(waiters), fallback=int(labels is None),
+        )
+
+        share = None
+        if labels is not None and usage is not None:
+            share = types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=(usage.prompt_token_count or 0) // len(waiters),
+                candidates_token_count=(usage.candidates_token_count or 0) // len(waiters),
+            )
+        for i, waiter in enumerate(waiters):
+            if not waiter.future.done():
+                waiter.future.set_result((labels[i], share) if labels is not None else None)
+
+    async def _call(self, model: str, instruction: str, images: List[types.Part]):
+        """One multi-image model call; returns `(labels per image, usage)` or `(None, None)` for a bad answer."""
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client()
+
+        parts = [types.Part.from_text(text=VISION_BATCH_INSTRUCTION.format(count=len(images)))]
+        for i, image in enumerate(images, 1):
+            parts += [types.Part.from_text(text=f"Image {i}:"), image]
+
+        async def generate() -> dict:
+            response = await asyncio.wait_for(
+                self._client.aio.models.generate_content(
+                    model=model,
+                    contents=[types.Content(role="user", parts=parts)],
+                    config=types.GenerateContentConfig(
+                        system_instruction=instruction,
+                        response_mime_type="application/json",
+                        temperature=0,
+                    ),
+                ),
+                VISION_BATCH_TIMEOUT,
+            )
+            usage = response.usage_metadata
+            return {"text": response.text or "", "usage": usage.model_dump(mode="json", exclude_none=True) if usage else None}
+
+        request = {
+            "model": model,
+            "instruction": instruction,
+            "images": [hashlib.sha256(image.inline_data.data).hexdigest() for image in images],
+        }
+        answer = await exchange_async("gemini_vision_batch", request, generate)
+
+        try:
+            labels = json.loads(answer["text"])
+        except ValueError:
+            return None, None
+        if not isinstance(labels, list) or len(labels) != len(images):
+            return None, None
+        labels = [", ".join(map(str, l)) if isinstance(l, list) else str(l) for l in labels]
+        if not all(labels):
+            return None, None
+        usage = answer.get("usage")
+        return labels, types.GenerateContentResponseUsageMetadata.model_validate(usage) if usage else None
+
+    def snapshot(self) -> Dict:
+        sizes = list(self._sizes)
+        requests = self.stats["requests"]
+        answered = self.stats["batches"] - self.stats["failed_batches"]
+        return {
+            **self.stats,
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            # Single-image model calls that batching replaced
+            "model_calls_saved": self.stats["batched_requests"] - answered,
+            "batched_share": round(self.stats["batched_requests"] / requests, 3) if requests else 0.0,
+        }
+
+
+_batcher: Optional[VisionBatcher] = None
+
+
+def vision_batcher() -> VisionBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = VisionBatcher()
+    return _batcher
+
+
+def vision_batch_status() -> Dict:
+    """Batcher counters plus added wait and batch call latency, for throughput vs latency."""
+    stages = STAGES.snapshot()
+    return {
+        "enabled": VISION_BATCH,
+        "window_ms": VISION_BATCH_WINDOW_MS,
+        "max_batch": VISION_BATCH_MAX,
+        **vision_batcher().snapshot(),
+        "added_wait": stages.get("vision_batch_wait", {}),
+        "batch_call": stages.get("vision_batch", {}),
+        "single_call": stages.get("model_vision", {}),
+    }
+
+
+# ===============================
+# AGENT CALLBACK
+# ===============================
+def _single_image(llm_request: LlmRequest) -> Optional[types.Part]:
+    """The request's one inline image, if it has exactly one."""
+    images = [
+        part for content in llm_request.contents for part in (content.parts or [])
+        if part.inline_data and part.inline_data.data
+    ]
+    return images[0] if len(images) == 1 else None
+
+
+def batched_vision(after_model: Callable) -> Callable:
+    """
+    A before-model callback for the vision stage that answers from a micro-batch
+    when VISION_BATCH is on. Runs after `guard_model`'s callback (which routes the
+    model and may already have answered from cache); `after_model` is that guard's
+    bookkeeping, called here because ADK skips it for a response returned early.
+    """
+
+    async def before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        if not VISION_BATCH:
+            return None
+        image = _single_image(llm_request)
+        if image is None:
+            return None
+        instruction = llm_request.config.system_instruction if llm_request.config else None
+        result = await vision_batcher().label(llm_request.model, str(instruction or ""), image)
+        if result is None:
+            return None
+        labels, usage = result
+        llm_response = LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=labels)]),
+            usage_metadata=usage,
+        )
+        after_model(callback_context, llm_response)
+        return llm_response
+
+    return before_model
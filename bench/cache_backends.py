@@ -0,0 +1,183 @@
+"""
+Conformance and speed check for the cache backends.
+
+Runs the same TTL / max-age / stats checks against the in-process LRU, the
+SQLite file backend and the Redis-protocol backend, then times get/set. The
+Redis backend talks to a real server if `--redis-url` is given, otherwise to a
+small in-process stand-in that speaks enough RESP (GET, SET PX/EX, DEL, DBSIZE,
+PING, SELECT, AUTH) for the app's client.
+
+    python bench/cache_backends.py
+    python bench/cache_backends.py --redis-url redis://localhost:6379/0 --ops 5000
+    python bench/cache_backends.py --serve 6380   # just run the stand-in
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import socketserver
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lens_common.cache import Cache, MemoryBackend, RedisBackend, SQLiteBackend  # noqa: E402
+
+
+# ===============================
+# REDIS STAND-IN
+# ===============================
+class _RespHandler(socketserver.StreamRequestHandler):
+    def _reply(self, value) -> None:
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, bytes):
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+        else:
+            self.wfile.write(f"+{value}\r\n".encode())
+
+    def _read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self) -> None:
+        store = self.server.store
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            cmd = args[0].upper()
+            now = time.time()
+            with self.server.lock:
+                for key in [k for k, (_, exp) in store.items() if exp and exp <= now]:
+                    del store[key]
+                if cmd == b"GET":
+                    entry = store.get(args[1])
+                    self._reply(entry[0] if entry else None)
+                elif cmd == b"SET":
+                    expires = None
+                    if len(args) >= 5 and args[3].upper() == b"PX":
+                        expires = now + int(args[4]) / 1000
+                    elif len(args) >= 5 and args[3].upper() == b"EX":
+                        expires = now + int(args[4])
+                    store[args[1]] = (args[2], expires)
+                    self._reply("OK")
+                elif cmd == b"DEL":
+                    self._reply(sum(1 for k in args[1:] if store.pop(k, None) is not None))
+                elif cmd == b"DBSIZE":
+                    self._reply(len(store))
+                elif cmd in (b"PING", b"SELECT", b"AUTH"):
+                    self._reply("PONG" if cmd == b"PING" else "OK")
+                else:
+                    self.wfile.write(b"-ERR unknown command\r\n")
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _RespHandler)
+        self.store = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+
+# ===============================
+# CHECKS
+# ===============================
+def conformance(name: str, backend) -> None:
+    cache = Cache(f"check_{name}", ttl=1.0, backend=backend)
+    cache.put("a", {"places": [1, 2]})
+    value, age = cache.get("a")
+    assert value == {"places": [1, 2]} and age < 0.5, (name, value, age)
+    assert cache.get("missing") is None
+    time.sleep(0.2)
+    assert cache.get("a", max_age=0.1) is None, f"{name}: max_age not applied"
+    cache.put("short", "x", ttl=0.2)
+    time.sleep(1.1)
+    assert cache.get("a") is None, f"{name}: TTL not applied"
+    assert cache.get("short") is None, f"{name}: per-entry TTL not applied"
+    cache.put("d", 1)
+    cache.delete("d")
+    assert cache.get("d") is None
+    stats = cache.snapshot()
+    assert (stats["hits"], stats["sets"], stats["errors"]) == (1, 3, 0), (name, stats)
+    print(f"  {name:<7} conformance OK  {stats}")
+
+
+def timing(name: str, backend, ops: int) -> None:
+    cache = Cache(f"bench_{name}", ttl=60, backend=backend)
+    value = {"places": [{"name": f"Place {i}", "rating": 4.5, "types": ["cafe"]} for i in range(10)]}
+    started = time.perf_counter()
+    for i in range(ops):
+        cache.put(f"k{i % 500}", value)
+    set_us = (time.perf_counter() - started) / ops * 1e6
+    started = time.perf_counter()
+    for i in range(ops):
+        cache.get(f"k{i % 500}")
+    get_us = (time.perf_counter() - started) / ops * 1e6
+    print(f"  {name:<7} set {set_us:8.1f} µs   get {get_us:8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", help="real Redis to test instead of the stand-in")
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--serve", type=int, metavar="PORT", help="only run the Redis stand-in")
+    args = parser.parse_args()
+
+    if args.serve:
+        server = RedisStandIn(args.serve)
+        print(f"Redis stand-in listening on {server.url}")
+        server.serve_forever()
+        return
+
+    standin = None
+    redis_url = args.redis_url
+    if not redis_url:
+        standin = RedisStandIn()
+        threading.Thread(target=standin.serve_forever, daemon=True).start()
+        redis_url = standin.url
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MemoryBackend(),
+            "sqlite": SQLiteBackend(os.path.join(tmp, "cache.db")),
+            "redis": RedisBackend(redis_url),
+        }
+        print("Conformance:")
+        for name, backend in backends.items():
+            conformance(name, backend)
+        print(f"Timing ({args.ops} ops):")
+        for name, backend in backends.items():
+            timing(name, backend, args.ops)
+
+    # A dead Redis must degrade to misses, not errors for the caller
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        dead_port = s.getsockname()[1]
+    dead = Cache("check_dead", ttl=60, backend=RedisBackend(f"redis://127.0.0.1:{dead_port}/0", timeout=0.1))
+    dead.put("a", 1)
+    assert dead.get("a") is None and dead.stats["errors"] == 2
+    print("  unreachable redis degrades to misses OK")
+
+    if standin:
+        standin.shutdown()
+
+
+if __name__ == "__main__":
+    main()
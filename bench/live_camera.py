@@ -0,0 +1,77 @@
+"""
+Stream the screen to the NearLens live camera endpoint.
+
+Captures the primary monitor with `mss` at a fixed frame rate, sends each
+capture as a JPEG over `/api/live` and prints every `places` / `error` push.
+Point a browser or video at something recognisable and pan around; the server
+should analyse only when the picture really changes and push only when the
+labels change.
+
+    python bench/live_camera.py --lat 0.3476 --lon 32.5827 --fps 5
+    python bench/live_camera.py --url ws://localhost:8000/nearlens/api/live --seconds 60
+"""
+import io
+import json
+import time
+import asyncio
+import argparse
+
+
+def grab_jpeg(sct, monitor, width: int) -> bytes:
+    from PIL import Image
+
+    shot = sct.grab(monitor)
+    img = Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+    img.thumbnail((width, width))
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=80)
+    return buf.getvalue()
+
+
+async def stream(args) -> None:
+    import mss
+    import websockets
+
+    url = f"{args.url}?latitude={args.lat}&longitude={args.lon}"
+    async with websockets.connect(url, max_size=None) as ws:
+
+        async def receive():
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg["type"] == "places":
+                    places = (msg.get("agent_response") or {}).get("places") or []
+                    print(f"📍 {msg.get('label')} {msg.get('included_types')}: {len(places)} places | {msg['stats']}")
+                else:
+                    print(f"⚠️ {msg.get('error')}")
+
+        receiver = asyncio.create_task(receive())
+        sent = 0
+        started = time.monotonic()
+        with mss.mss() as sct:
+            monitor = sct.monitors[1]
+            while time.monotonic() - started < args.seconds:
+                frame = grab_jpeg(sct, monitor, args.width)  # mss handles are bound to their thread
+                await ws.send(frame)
+                sent += 1
+                await asyncio.sleep(1.0 / args.fps)
+
+        # Give the last analysis a chance to come back
+        await asyncio.sleep(args.drain)
+        receiver.cancel()
+        print(f"Sent {sent} frames in {time.monotonic() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8000/api/live")
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--fps", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=768, help="longest side of each JPEG")
+    parser.add_argument("--drain", type=float, default=10.0)
+    asyncio.run(stream(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
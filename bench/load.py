@@ -0,0 +1,378 @@
+"""
+Load and soak test for the NearLens / MomentLens `/api/upload` endpoints.
+
+Starts the Gemini/Places stubs (bench/stubs.py) and the app under test in
+separate processes, then drives closed-loop load: at each concurrency level N
+workers send uploads back to back for `--duration` seconds. NearLens gets a
+mix of small/medium/large JPEGs (some repeated, so caches see realistic hits);
+MomentLens gets location/time/weather payloads. Locations are scattered around
+a few cities.
+
+Per level it reports throughput, latency percentiles, error rate (non-200 or an
+`error` body) and, sampled every `--sample-every` seconds across the server's
+process tree, RSS and open file descriptors, including RSS growth per hour.
+
+    python bench/load.py backend --concurrency 20,100,500 --duration 60
+    python bench/load.py host --concurrency 100 --duration 3600 --json soak.json
+    python bench/load.py moments --gemini-error-rate 0.05 --places-latency-ms 400
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stubs  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = {
+    # name: (working dir, uvicorn target, [(kind, upload path)])
+    "backend": ("backend", "main:app", [("image", "/api/upload")]),
+    "moments": ("moments", "main:app", [("moment", "/api/upload")]),
+    "host": (".", "host.main:app", [("image", "/nearlens/api/upload"), ("moment", "/moments/api/upload")]),
+}
+CITIES = [(0.3476, 32.5827), (51.5072, -0.1276), (40.7128, -74.0060), (35.6762, 139.6503), (-1.2921, 36.8219)]
+# (width, height, share of uploads)
+IMAGE_SIZES = [(640, 480, 0.5), (1280, 960, 0.35), (4000, 3000, 0.15)]
+
+
+# ===============================
+# WORKLOAD
+# ===============================
+def make_images(count: int, seed: int = 7) -> list:
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    images = []
+    for i in range(count):
+        width, height, _ = rng.choices(IMAGE_SIZES, weights=[s[2] for s in IMAGE_SIZES])[0]
+        img = Image.new("RGB", (width, height), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(40):
+            x, y = rng.randrange(width), rng.randrange(height)
+            draw.rectangle(
+                [x, y, x + rng.randrange(width // 4), y + rng.randrange(height // 4)],
+                fill=tuple(rng.randrange(256) for _ in range(3)),
+            )
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        images.append((f"load_{i}.jpg", buf.getvalue()))
+    return images
+
+
+def random_location(rng: random.Random):
+    lat, lon = rng.choice(CITIES)
+    # Within ~2 km of the city centre
+    return lat + rng.uniform(-0.02, 0.02), lon + rng.uniform(-0.02, 0.02)
+
+
+async def send_one(session: aiohttp.ClientSession, base_url: str, target, images, rng) -> str:
+    """Issue one upload; returns "ok" or an error category."""
+    kind, path = target
+    lat, lon = random_location(rng)
+    if kind == "image":
+        name, data = rng.choice(images)
+        form = aiohttp.FormData()
+        form.add_field("file", data, filename=name, content_type="image/jpeg")
+        form.add_field("latitude", str(lat))
+        form.add_field("longitude", str(lon))
+        request = session.post(base_url + path, data=form)
+    else:
+        payload = {
+            "latitude": lat,
+            "longitude": lon,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "weather": {"condition": rng.choice(["Clear", "Rain", "Clouds"]), "temp_c": rng.randint(5, 32)},
+        }
+        request = session.post(base_url + path, json=payload)
+
+    async with request as res:
+        body = await res.read()
+    if res.status != 200:
+        return f"http_{res.status}"
+    try:
+        parsed = json.loads(body)
+    except ValueError:
+        return "bad_json"
+    return "error_body" if isinstance(parsed, dict) and "error" in parsed else "ok"
+
+
+# ===============================
+# PROCESS SAMPLING
+# ===============================
+def process_tree(pid: int) -> list:
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    tree, frontier = [pid], [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [p for p, pp in parents.items() if pp == parent]
+        tree.extend(children)
+        frontier.extend(children)
+    return tree
+
+
+def sample_process(pid: int) -> dict:
+    rss_kb = threads = fds = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+                    elif line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+            fds += len(os.listdir(f"/proc/{p}/fd"))
+        except OSError:
+            pass
+    return {"t": time.time(), "rss_mb": round(rss_kb / 1024, 1), "fds": fds, "threads": threads}
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+def growth_per_hour(samples: list) -> float:
+    """Least-squares slope of RSS over time, in MB per hour."""
+    if len(samples) < 2:
+        return 0.0
+    ts = [s["t"] - samples[0]["t"] for s in samples]
+    ys = [s["rss_mb"] for s in samples]
+    mean_t, mean_y = sum(ts) / len(ts), sum(ys) / len(ys)
+    var = sum((t - mean_t) ** 2 for t in ts)
+    if not var:
+        return 0.0
+    slope = sum((t - mean_t) * (y - mean_y) for t, y in zip(ts, ys)) / var
+    return round(slope * 3600, 1)
+
+
+# ===============================
+# LOAD LEVEL
+# ===============================
+async def run_level(base_url: str, targets, images, concurrency: int, duration: float,
+                    sample_every: float, server_pid: int, seed: int) -> dict:
+    latencies, outcomes, samples = [], {}, [sample_process(server_pid)]
+    deadline = time.monotonic() + duration
+    window = {"n": 0, "errors": 0, "lat": []}
+
+    async def worker(i: int, session: aiohttp.ClientSession):
+        rng = random.Random(seed * 1000 + i)
+        while time.monotonic() < deadline:
+            target = targets[(i + window["n"]) % len(targets)]
+            started = time.perf_counter()
+            try:
+                outcome = await send_one(session, base_url, target, images, rng)
+            except Exception as e:
+                outcome = f"exception_{type(e).__name__}"
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            latencies.append(elapsed_ms)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            window["n"] += 1
+            window["lat"].append(elapsed_ms)
+            if outcome != "ok":
+                window["errors"] += 1
+
+    async def sampler():
+        while True:
+            await asyncio.sleep(sample_every)
+            sample = sample_process(server_pid)
+            lat = sorted(window["lat"])
+            sample.update(
+                rps=round(window["n"] / sample_every, 1),
+                p50_ms=percentile(lat, 0.50),
+                p99_ms=percentile(lat, 0.99),
+                errors=window["errors"],
+            )
+            samples.append(sample)
+            window.update(n=0, errors=0, lat=[])
+            print(
+                f"    [{concurrency:>4}] {sample['rps']:7.1f} rps  p50 {sample['p50_ms']:8.1f} ms  "
+                f"p99 {sample['p99_ms']:8.1f} ms  errors {sample['errors']:4d}  "
+                f"rss {sample['rss_mb']:7.1f} MB  fds {sample['fds']:5d}"
+            )
+
+    timeout = aiohttp.ClientTimeout(total=max(120.0, duration))
+    connector = aiohttp.TCPConnector(limit=0)
+    started = time.monotonic()
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        sampling = asyncio.create_task(sampler())
+        await asyncio.gather(*(worker(i, session) for i in range(concurrency)))
+        sampling.cancel()
+    elapsed = time.monotonic() - started
+    samples.append(sample_process(server_pid))
+
+    ordered = sorted(latencies)
+    total = len(latencies)
+    errors = total - outcomes.get("ok", 0)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "duration_s": round(elapsed, 1),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(ordered, 0.50),
+            "p90": percentile(ordered, 0.90),
+            "p99": percentile(ordered, 0.99),
+            "max": round(ordered[-1], 1) if ordered else 0.0,
+        },
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "outcomes": outcomes,
+        "rss_mb": {
+            "start": samples[0]["rss_mb"],
+            "end": samples[-1]["rss_mb"],
+            "max": max(s["rss_mb"] for s in samples),
+            "growth_mb_per_hour": growth_per_hour(samples),
+        },
+        "fds": {"start": samples[0]["fds"], "end": samples[-1]["fds"], "max": max(s["fds"] for s in samples)},
+        "threads_end": samples[-1]["threads"],
+        "samples": samples,
+    }
+
+
+# ===============================
+# PROCESSES
+# ===============================
+def wait_for(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as res:
+                if res.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def start_stubs(args, log) -> subprocess.Popen:
+    cmd = [
+        sys.executable, os.path.join(ROOT, "bench", "stubs.py"), "--port", str(args.stub_port),
+        "--gemini-latency-ms", str(args.gemini_latency_ms), "--gemini-jitter-ms", str(args.gemini_jitter_ms),
+        "--gemini-error-rate", str(args.gemini_error_rate),
+        "--places-latency-ms", str(args.places_latency_ms), "--places-jitter-ms", str(args.places_jitter_ms),
+        "--places-error-rate", str(args.places_error_rate),
+    ]
+    proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+    wait_for(f"http://127.0.0.1:{args.stub_port}/stats", 30)
+    return proc
+
+
+def start_app(args, workdir: str, target: str, tmp: str, log) -> subprocess.Popen:
+    stub = f"http://127.0.0.1:{args.stub_port}"
+    env = {
+        **os.environ,
+        "GOOGLE_GEMINI_BASE_URL": stub,
+        "GOOGLE_API_KEY": "stub",
+        "GOOGLE_GENAI_USE_VERTEXAI": "false",
+        "GEMINI_API_KEY": "stub",
+        "PLACES_ENDPOINT": f"{stub}/v1/places:searchNearby",
+        "GOOGLE_PLACES_API_KEY": "stub",
+        "GOOGLE_MAPS_API_KEY": "",
+        "SESSION_DB_URL": f"sqlite:///{os.path.join(tmp, 'sessions.db')}",
+        "PYTHONUNBUFFERED": "1",
+        # Every worker connects from 127.0.0.1, which admission control would count as one client
+        "ADMISSION_PER_CLIENT": os.environ.get("ADMISSION_PER_CLIENT", "100000"),
+    }
+    cmd = [
+        sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, cwd=os.path.join(ROOT, workdir), env=env, stdout=log, stderr=subprocess.STDOUT)
+    wait_for(f"http://127.0.0.1:{args.port}/ready", args.ready_timeout)
+    return proc
+
+
+def stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def print_level(result: dict) -> None:
+    lat, rss, fds = result["latency_ms"], result["rss_mb"], result["fds"]
+    print(
+        f"  concurrency {result['concurrency']:>4}: {result['requests']} requests, "
+        f"{result['throughput_rps']} rps, p50 {lat['p50']} / p90 {lat['p90']} / p99 {lat['p99']} / "
+        f"max {lat['max']} ms, error rate {result['error_rate']:.2%}"
+    )
+    print(
+        f"                    RSS {rss['start']} -> {rss['end']} MB (max {rss['max']}, "
+        f"{rss['growth_mb_per_hour']:+} MB/h), fds {fds['start']} -> {fds['end']} (max {fds['max']}), "
+        f"outcomes {result['outcomes']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("app", choices=sorted(APPS))
+    parser.add_argument("--concurrency", default="20,100,500", help="comma-separated levels")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds per level (a soak: 3600+)")
+    parser.add_argument("--sample-every", type=float, default=10.0)
+    parser.add_argument("--images", type=int, default=40, help="distinct images in the upload mix")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app under test")
+    parser.add_argument("--port", type=int, default=8191)
+    parser.add_argument("--stub-port", type=int, default=8199)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the full report (with samples) here")
+    stubs.add_arguments(parser)
+    args = parser.parse_args()
+
+    workdir, target, targets = APPS[args.app]
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    images = make_images(args.images) if any(kind == "image" for kind, _ in targets) else []
+
+    report = {"app": args.app, "workers": args.workers, "config": vars(args), "levels": []}
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(tmp, "server.log"), "w") as log:
+        stub_proc = start_stubs(args, log)
+        app_proc = None
+        try:
+            app_proc = start_app(args, workdir, target, tmp, log)
+            base_url = f"http://127.0.0.1:{args.port}"
+            print(f"{args.app}: {len(targets)} upload endpoint(s), {len(images)} images, levels {levels}")
+            for level in levels:
+                result = asyncio.run(run_level(
+                    base_url, targets, images, level, args.duration, args.sample_every, app_proc.pid, args.seed,
+                ))
+                print_level(result)
+                report["levels"].append(result)
+            with urllib.request.urlopen(f"http://127.0.0.1:{args.stub_port}/stats") as res:
+                report["upstream"] = json.loads(res.read())
+            print(f"  upstream calls: {report['upstream']}")
+        finally:
+            if app_proc:
+                stop(app_proc)
+            stop(stub_proc)
+            log.flush()
+            if args.json is None and any(l["error_rate"] for l in report["levels"]):
+                with open(log.name) as f:
+                    print("  last server log lines:\n" + "".join(f.readlines()[-15:]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Cold-start profile for the NearLens / MomentLens APIs.
+
+1. Import-time report: runs `python -X importtime -c "import main"` in the app
+   directory and lists the slowest modules, plus any heavy SDK that is still
+   imported eagerly at module load.
+2. Time to first response: starts uvicorn, then records how long until `/`
+   answers (port bound, startup path) and until `/ready` answers (SDKs imported,
+   clients configured, connections pre-warmed).
+
+    python bench/startup.py backend --runs 5
+    python bench/startup.py moments --json startup.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay off the import path of main.py
+HEAVY_MODULES = ["google.adk", "google.genai", "google.generativeai", "googlemaps", "geopy"]
+
+
+def import_report(app_dir: str, top: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main, sys; print(','.join(sys.modules))"],
+        cwd=app_dir,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+
+    loaded = set(proc.stdout.strip().split(","))
+    main_row = next((r for r in rows if r["module"] == "main"), None)
+    return {
+        "import_main_ms": main_row["cumulative_ms"] if main_row else None,
+        "slowest_self": sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:top],
+        "slowest_cumulative": sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:top],
+        "eager_heavy_modules": [m for m in HEAVY_MODULES if m in loaded],
+    }
+
+
+def wait_for(url: str, deadline: float) -> float:
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=60):
+                return time.monotonic()
+        except Exception:
+            time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def time_to_first_response(app_dir: str, port: int, timeout: float) -> dict:
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=app_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        first = wait_for(f"http://127.0.0.1:{port}/", deadline)
+        ready = wait_for(f"http://127.0.0.1:{port}/ready", deadline)
+        return {"first_response_s": round(first - started, 3), "ready_s": round(ready - started, 3)}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("app", choices=["backend", "moments"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8190)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    app_dir = os.path.join(ROOT, args.app)
+    report = import_report(app_dir, args.top)
+
+    print(f"import main: {report['import_main_ms']:.1f} ms")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for row in report["slowest_cumulative"]:
+        print(f"{row['cumulative_ms']:>14.1f}{row['self_ms']:>10.1f}  {row['module']}")
+    if report["eager_heavy_modules"]:
+        print(f"⚠️ imported eagerly: {', '.join(report['eager_heavy_modules'])}")
+
+    runs = [time_to_first_response(app_dir, args.port, args.timeout) for _ in range(args.runs)]
+    summary = {
+        key: {"median": statistics.median(r[key] for r in runs), "max": max(r[key] for r in runs)}
+        for key in ("first_response_s", "ready_s")
+    }
+    print(f"time to first response: median {summary['first_response_s']['median']}s, max {summary['first_response_s']['max']}s")
+    print(f"time to ready:          median {summary['ready_s']['median']}s, max {summary['ready_s']['max']}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"app": args.app, "imports": report, "runs": runs, "summary": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Local stand-ins for the Gemini and Places APIs, for load tests.
+
+Serves `POST /v1beta/models/<model>:generateContent` (what google-genai calls
+when GOOGLE_GEMINI_BASE_URL points here) and `POST /v1/places:searchNearby`
+(what PLACES_ENDPOINT points at). Each upstream has its own latency
+(mean +- jitter, in ms) and error rate; failures are `503 UNAVAILABLE` like the
+real services under load.
+
+The Gemini stub answers by shape, not content: requests that offer the
+`find_nearby_places` tool get a function call for the coordinates found in the
+prompt, a multi-image request for JSON (a vision micro-batch) gets an array of
+labels, everything else gets a short label text.
+
+    python bench/stubs.py --port 8199 --gemini-latency-ms 900 --gemini-error-rate 0.02
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+import hashlib
+
+from aiohttp import web
+
+PLACE_TYPES = ["cafe", "restaurant", "shoe_store", "book_store", "electronics_store", "park", "clothing_store"]
+STUB_PRICE_LEVELS = ["PRICE_LEVEL_INEXPENSIVE", "PRICE_LEVEL_MODERATE", "PRICE_LEVEL_EXPENSIVE", ""]
+COORDS_RE = re.compile(r"lat=\s*(-?\d+(?:\.\d+)?),\s*lon=\s*(-?\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+class UpstreamProfile:
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def delay(self) -> bool:
+        """Sleep for one simulated call; True if this call should fail."""
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            await asyncio.sleep(max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+        finally:
+            self.stats["in_flight"] -= 1
+        if random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return True
+        return False
+
+
+def _unavailable() -> web.Response:
+    body = {"error": {"code": 503, "message": "Stub upstream overloaded", "status": "UNAVAILABLE"}}
+    return web.json_response(body, status=503)
+
+
+# ===============================
+# GEMINI
+# ===============================
+def _texts(body: dict):
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if part.get("text"):
+                yield part["text"]
+
+
+def _offers_places_tool(body: dict) -> bool:
+    for tool in body.get("tools") or []:
+        for decl in tool.get("functionDeclarations") or tool.get("function_declarations") or []:
+            if decl.get("name") == "find_nearby_places":
+                return True
+    return False
+
+
+def _last_part(body: dict) -> dict:
+    contents = body.get("contents") or [{}]
+    parts = contents[-1].get("parts") or [{}]
+    return parts[-1]
+
+
+def _inline_images(body: dict) -> list:
+    return [
+        part.get("inlineData") or part.get("inline_data")
+        for content in body.get("contents", []) for part in content.get("parts", [])
+        if part.get("inlineData") or part.get("inline_data")
+    ]
+
+
+def _image_label(image: dict) -> str:
+    seed = int(hashlib.md5(image.get("data", "").encode()).hexdigest(), 16)
+    place_type = PLACE_TYPES[seed % len(PLACE_TYPES)]
+    return f"{place_type.replace('_', ' ')}, {place_type}"
+
+
+def _model_reply(body: dict) -> dict:
+    coords = None
+    for text in _texts(body):
+        match = COORDS_RE.search(text)
+        if match:
+            coords = float(match.group(1)), float(match.group(2))
+    seed = int(hashlib.md5(repr(coords).encode()).hexdigest(), 16)
+    place_type = PLACE_TYPES[seed % len(PLACE_TYPES)]
+    label = place_type.replace("_", " ")
+
+    last = _last_part(body)
+    images = _inline_images(body)
+    wants_json = (body.get("generationConfig") or {}).get("responseMimeType") == "application/json"
+    if wants_json and len(images) > 1:
+        # A micro-batched vision request: one label string per image, in order
+        parts = [{"text": json.dumps([_image_label(image) for image in images])}]
+    elif _offers_places_tool(body) and not ("functionResponse" in last or "function_response" in last):
+        lat, lon = coords or (0.0, 0.0)
+        args = {
+            "req": {
+                "image_label": label,
+                "latitude": lat,
+                "longitude": lon,
+                "included_types": [place_type],
+                "radius": 1000,
+                "max_result_count": 10,
+                # MomentLens request fields (ignored by NearLens)
+                "text": f"A good moment for a {label}.",
+                "category": [label],
+                "place_type": place_type,
+                "keywords": [label],
+            }
+        }
+        parts = [{"functionCall": {"name": "find_nearby_places", "args": args}}]
+    else:
+        parts = [{"text": f"{label}, {place_type}"}]
+
+    prompt_tokens = len(json.dumps(body)) // 4
+    return {
+        "candidates": [{"content": {"role": "model", "parts": parts}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": 24,
+            "totalTokenCount": prompt_tokens + 24,
+        },
+        "modelVersion": "stub",
+    }
+
+
+async def generate_content(request: web.Request) -> web.Response:
+    profile: UpstreamProfile = request.app["gemini"]
+    body = await request.json()
+    if await profile.delay():
+        return _unavailable()
+    return web.json_response(_model_reply(body))
+
+
+# ===============================
+# PLACES
+# ===============================
+async def search_nearby(request: web.Request) -> web.Response:
+    profile: UpstreamProfile = request.app["places"]
+    body = await request.json()
+    if await profile.delay():
+        return _unavailable()
+
+    circle = body["locationRestriction"]["circle"]
+    lat, lon = circle["center"]["latitude"], circle["center"]["longitude"]
+    radius = circle.get("radius", 500.0)
+    types = body.get("includedTypes") or ["point_of_interest"]
+    rng = random.Random(f"{lat:.3f}:{lon:.3f}:{types}:{radius}")
+
+    places = []
+    for i in range(int(body.get("maxResultCount", 20))):
+        # ~111 km per degree; scatter inside the circle
+        dlat = rng.uniform(-1, 1) * radius / 111_000
+        dlon = rng.uniform(-1, 1) * radius / 111_000
+        place = {
+            "id": f"stub-{lat:.4f}-{lon:.4f}-{int(radius)}-{i}",
+            "displayName": {"text": f"Stub {types[0].replace('_', ' ').title()} {i + 1}"},
+            "formattedAddress": f"{i + 1} Stub Street",
+            "location": {"latitude": lat + dlat, "longitude": lon + dlon},
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "types": types,
+            "photos": [{"name": f"places/stub-{i}/photos/p{i}"}],
+            "currentOpeningHours": {"openNow": rng.random() < 0.7},
+        }
+        # Like the real API, places without a known price have no priceLevel
+        price_level = rng.choice(STUB_PRICE_LEVELS)
+        if price_level:
+            place["priceLevel"] = price_level
+        places.append(place)
+    return web.json_response({"places": places})
+
+
+async def stats(request: web.Request) -> web.Response:
+    return web.json_response({"gemini": request.app["gemini"].stats, "places": request.app["places"].stats})
+
+
+def build_app(args) -> web.Application:
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["gemini"] = UpstreamProfile(args.gemini_latency_ms, args.gemini_jitter_ms, args.gemini_error_rate)
+    app["places"] = UpstreamProfile(args.places_latency_ms, args.places_jitter_ms, args.places_error_rate)
+    app["started"] = time.time()
+    app.router.add_post("/v1beta/models/{model}", generate_content)
+    app.router.add_post("/v1/places:searchNearby", search_nearby)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--places-latency-ms", type=float, default=150.0)
+    parser.add_argument("--places-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--places-error-rate", type=float, default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8199)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(build_app(args), host="127.0.0.1", port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Throughput versus added latency of vision micro-batching (VISION_BATCH).
+
+Runs the NearLens upload load (bench/load.py) against the stubs once with
+batching off and once per batch window, each at the same concurrency, and
+reports per run: throughput, latency percentiles, Gemini calls per upload, the
+mean batch size and the wait batching added before each image's model call.
+
+    python bench/vision_batch.py --concurrency 50 --duration 30 --windows 5,15,40
+    python bench/vision_batch.py --max-batch 4 --gemini-latency-ms 1500 --json batching.json
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import load  # noqa: E402
+import stubs  # noqa: E402
+
+
+def get_json(url: str) -> dict:
+    with urllib.request.urlopen(url) as res:
+        return json.loads(res.read())
+
+
+def run_config(args, images, window_ms, tmp: str, log) -> dict:
+    """One app process with batching off (`window_ms` None) or on with that window, under load."""
+    os.environ["VISION_BATCH"] = "0" if window_ms is None else "1"
+    os.environ["VISION_BATCH_WINDOW_MS"] = str(window_ms or 0)
+    os.environ["VISION_BATCH_MAX"] = str(args.max_batch)
+    # Every upload should reach the model, not the vision cache
+    os.environ["VISION_CACHE_TTL"] = "0"
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}/stats"
+    calls_before = get_json(stub_url)["gemini"]["requests"]
+    workdir, target, targets = load.APPS["backend"]
+    app_proc = load.start_app(args, workdir, target, tmp, log)
+    try:
+        result = asyncio.run(load.run_level(
+            f"http://127.0.0.1:{args.port}", targets, images, args.concurrency, args.duration,
+            args.duration, app_proc.pid, args.seed,
+        ))
+        batching = get_json(f"http://127.0.0.1:{args.port}/api/vision/batching")
+    finally:
+        load.stop(app_proc)
+    gemini_calls = get_json(stub_url)["gemini"]["requests"] - calls_before
+
+    return {
+        "window_ms": window_ms,
+        "throughput_rps": result["throughput_rps"],
+        "latency_ms": result["latency_ms"],
+        "error_rate": result["error_rate"],
+        "requests": result["requests"],
+        "gemini_calls_per_upload": round(gemini_calls / result["requests"], 2) if result["requests"] else 0.0,
+        "mean_batch_size": batching["mean_batch_size"],
+        "model_calls_saved": batching["model_calls_saved"],
+        "added_wait_ms": {k: v for k, v in batching["added_wait"].items() if k.endswith("_ms")},
+    }
+
+
+def print_row(row: dict) -> None:
+    name = "off" if row["window_ms"] is None else f"{row['window_ms']:g} ms"
+    lat, wait = row["latency_ms"], row["added_wait_ms"]
+    print(
+        f"  {name:>8}: {row['throughput_rps']:7.2f} rps  p50 {lat['p50']:8.1f}  p90 {lat['p90']:8.1f}  "
+        f"p99 {lat['p99']:8.1f} ms  gemini/upload {row['gemini_calls_per_upload']:4.2f}  "
+        f"batch {row['mean_batch_size']:4.2f}  added wait p50 {wait.get('p50_ms', 0.0):6.1f} / "
+        f"p95 {wait.get('p95_ms', 0.0):6.1f} ms  errors {row['error_rate']:.2%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per configuration")
+    parser.add_argument("--windows", default="5,15,40", help="comma-separated batch windows in ms")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--port", type=int, default=8191)
+    parser.add_argument("--stub-port", type=int, default=8199)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the report here")
+    stubs.add_arguments(parser)
+    args = parser.parse_args()
+
+    windows = [None] + [float(w) for w in args.windows.split(",") if w.strip()]
+    images = load.make_images(args.images)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(tmp, "server.log"), "w") as log:
+        stub_proc = load.start_stubs(args, log)
+        try:
+            print(f"backend: concurrency {args.concurrency}, {args.duration:g}s per run, max batch {args.max_batch}")
+            for window_ms in windows:
+                row = run_config(args, images, window_ms, tmp, log)
+                print_row(row)
+                rows.append(row)
+        finally:
+            load.stop(stub_proc)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "runs": rows}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
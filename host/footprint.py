@@ -0,0 +1,118 @@
+"""
+Memory footprint comparison: two single-app processes vs. one host process.
+
+Starts each layout locally with uvicorn, waits until it answers, warms it with a
+few requests, then reads RSS and PSS from /proc (Linux only).
+
+    python host/footprint.py [--warmup 20] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAYOUTS = {
+    "two_processes": [
+        {"cwd": "backend", "app": "main:app", "port": 8101, "paths": ["/", "/api/breakers"]},
+        {"cwd": "moments", "app": "main:app", "port": 8102, "paths": ["/", "/api/breakers"]},
+    ],
+    "single_host": [
+        {
+            "cwd": ".",
+            "app": "host.main:app",
+            "port": 8103,
+            "paths": ["/", "/nearlens/", "/nearlens/api/breakers", "/moments/", "/moments/api/breakers"],
+        },
+    ],
+}
+
+
+def read_memory_kb(pid: int) -> dict:
+    """RSS and PSS in kB for one process (PSS splits shared pages fairly across processes)."""
+    memory = {"rss_kb": 0, "pss_kb": 0}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                memory["rss_kb"] = int(line.split()[1])
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    memory["pss_kb"] = int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return memory
+
+
+def wait_ready(port: int, timeout: float = 120.0) -> float:
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            # /ready answers once warm-up has loaded the agents and clients, so memory is measured after it
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=10):
+                return time.monotonic() - start
+        except Exception:
+            time.sleep(0.2)
+    raise TimeoutError(f"server on port {port} did not become ready")
+
+
+def measure(layout: str, warmup: int) -> dict:
+    procs = []
+    try:
+        for spec in LAYOUTS[layout]:
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", spec["app"], "--port", str(spec["port"])],
+                cwd=os.path.join(ROOT, spec["cwd"]),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            procs.append((spec, proc))
+
+        for spec, _ in procs:
+            wait_ready(spec["port"])
+            for _ in range(warmup):
+                for path in spec["paths"]:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{spec['port']}{path}", timeout=10):
+                        pass
+
+        per_process = [{"app": spec["app"], "cwd": spec["cwd"], **read_memory_kb(proc.pid)} for spec, proc in procs]
+        return {
+            "layout": layout,
+            "processes": per_process,
+            "rss_mb": round(sum(p["rss_kb"] for p in per_process) / 1024, 1),
+            "pss_mb": round(sum(p["pss_kb"] for p in per_process) / 1024, 1),
+        }
+    finally:
+        for _, proc in procs:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--warmup", type=int, default=20, help="requests per path before measuring")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [measure(layout, args.warmup) for layout in LAYOUTS]
+
+    print(f"{'layout':<16}{'processes':>10}{'RSS MB':>10}{'PSS MB':>10}")
+    for r in results:
+        print(f"{r['layout']:<16}{len(r['processes']):>10}{r['rss_mb']:>10}{r['pss_mb']:>10}")
+    split, host = results
+    if split["rss_mb"]:
+        saved = split["rss_mb"] - host["rss_mb"]
+        print(f"single host saves {saved:.1f} MB RSS ({saved / split['rss_mb']:.0%})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
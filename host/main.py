@@ -0,0 +1,125 @@
+# main.py — single-process host for NearLens and MomentLens
+
+import os
+import sys
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from dotenv import load_dotenv
+
+# ===========================================
+#  1️⃣ LOAD CONFIGURATION
+# ===========================================
+load_dotenv()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+MOMENTS_DIR = os.path.join(ROOT, "moments")
+DB_URL = os.getenv("SESSION_DB_URL", "sqlite:///./sessions.db")
+
+# Both apps import their agent package as a top-level module
+for path in (BACKEND_DIR, MOMENTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def load_app_module(name: str, path: str):
+    """Import an app's main.py under a unique module name (both files are called main.py)."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+nearlens_main = load_app_module("nearlens_main", os.path.join(BACKEND_DIR, "main.py"))
+moments_main = load_app_module("moments_main", os.path.join(MOMENTS_DIR, "main.py"))
+
+# ===========================================
+#  2️⃣ SHARED RESOURCES
+# ===========================================
+# Both apps import the one lens_common package: one HTTP pool, one set of rate
+# limiters, breakers, caches and last-known-good stores, one admission budget
+# and one pair of executors
+from lens_common.executor import shutdown_executors, start_executors
+from lens_common.logs import get_logger, stop_logging
+from lens_common.upstream import http_session
+
+log = get_logger("host")
+
+
+async def warm_up_moments(session_service) -> None:
+    # Reuse the Maps client NearLens creates instead of building a second one
+    await nearlens_main.app.state.warmup
+    moments_main.gmaps = nearlens_main.gmaps
+    await moments_main.warm_up(moments_main.app, session_service)
+
+# ===========================================
+#  3️⃣ FASTAPI APP SETUP
+# ===========================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mounted sub-apps don't run their own lifespan, so the host does what each app's
+    # lifespan would (executors, warm-up, job queues, prefetcher) and owns the session backend
+    log.info("Host starting up")
+    start_executors()
+    session_service = None
+    try:
+        from google.adk.sessions import DatabaseSessionService
+        session_service = await asyncio.to_thread(DatabaseSessionService, db_url=DB_URL)
+        log.info("Shared database session service initialized")
+    except Exception as e:
+        log.error("Database session service initialization failed", error=str(e))
+    nearlens_main.start_warmup(nearlens_main.app, session_service)
+    moments_main.app.state.warmup = asyncio.create_task(warm_up_moments(session_service))
+    nearlens_main.job_queue.start()
+    moments_main.job_queue.start()
+    yield
+    log.info("Host shutting down")
+    await nearlens_main.job_queue.stop()
+    await moments_main.job_queue.stop()
+    await moments_main.prefetcher.stop()
+    await shutdown_executors()
+    http_session().close()
+    stop_logging()
+
+app = FastAPI(
+    title="NearLens Host",
+    description="Serves NearLens and MomentLens from one process with shared resources.",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+app.mount("/nearlens", nearlens_main.app)
+app.mount("/moments", moments_main.app)
+
+# ===========================================
+#  4️⃣ ROUTES
+# ===========================================
+@app.get("/")
+async def home():
+    return {
+        "message": "NearLens host 👁️",
+        "status": "running",
+        "apps": {"nearlens": "/nearlens", "moments": "/moments"},
+    }
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe covering both apps."""
+    await nearlens_main.ensure_ready(nearlens_main.app)
+    await moments_main.ensure_ready(moments_main.app)
+    return {
+        "status": "ready",
+        "warmup": {
+            "nearlens": nearlens_main.app.state.warmup_timings,
+            "moments": moments_main.app.state.warmup_timings,
+        },
+    }
+
+# ===========================================
+#  5️⃣ RUN SERVER
+# ===========================================
+# uvicorn host.main:app --reload   (from the repository root)
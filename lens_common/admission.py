@@ -0,0 +1,265 @@
+import os
+import math
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from .metrics import STAGES
+
+# ===============================
+# CONFIGURATION
+# ===============================
+ADMISSION_PER_CLIENT = int(os.getenv("ADMISSION_PER_CLIENT", "4"))  # concurrent uploads per client
+ADMISSION_MAX_BYTES = int(os.getenv("ADMISSION_MAX_BYTES", str(256 * 1024 * 1024)))  # in-flight request bytes
+# Batch (job queue) work may only fill this share of the byte budget; the rest is kept for interactive uploads
+ADMISSION_BATCH_SHARE = float(os.getenv("ADMISSION_BATCH_SHARE", "0.5"))
+# Floor charged per request, for the run's own memory beyond the body
+ADMISSION_REQUEST_BYTES = int(os.getenv("ADMISSION_REQUEST_BYTES", str(256 * 1024)))
+ADMISSION_RETRY_AFTER = float(os.getenv("ADMISSION_RETRY_AFTER", "2"))  # until a run has been timed
+
+CLIENT_ID_HEADER = "x-client-id"
+
+
+class AdmissionRejected(Exception):
+    """
+    A request turned away at the door: 429 for its client's limit, 503/413 for
+    the byte budget, 411 for a body of unknown size.
+    """
+
+    def __init__(self, status: int, message: str, retry_after: float):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+# ===============================
+# CONTROLLER
+# ===============================
+class AdmissionController:
+    """
+    Per-client concurrency limit and a global budget of in-flight request bytes.
+
+    Interactive requests are admitted or rejected immediately and may use the
+    whole budget. Batch work waits for room and only ever takes up to
+    `batch_share` of it, so a backlog of jobs can't starve interactive uploads.
+    """
+
+    def __init__(
+        self,
+        per_client: int = ADMISSION_PER_CLIENT,
+        max_bytes: int = ADMISSION_MAX_BYTES,
+        batch_share: float = ADMISSION_BATCH_SHARE,
+    ):
+        self.per_client = per_client
+        self.max_bytes = max_bytes
+        self.batch_bytes = int(max_bytes * batch_share)
+        self.bytes_in_flight = 0
+        self._clients: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._released: Optional[asyncio.Event] = None
+        self.stats = {
+            "admitted": 0, "batch_admitted": 0, "batch_waits": 0,
+            "rejected_client": 0, "rejected_bytes": 0, "rejected_too_large": 0, "rejected_no_length": 0,
+        }
+
+    def cost(self, nbytes: Optional[int]) -> int:
+        return max(nbytes or 0, ADMISSION_REQUEST_BYTES)
+
+    def retry_after(self) -> float:
+        """About one pipeline run: the median `agent_run` time once measured."""
+        typical_ms = STAGES.percentile("agent_run", 0.5)
+        return max(1.0, math.ceil(typical_ms / 1000)) if typical_ms else ADMISSION_RETRY_AFTER
+
+    def admit(self, client: str, nbytes: Optional[int]) -> int:
+        """
+        Take a slot for an interactive request or raise AdmissionRejected. Returns
+        the bytes charged. `nbytes` is the declared Content-Length: without one
+        (a chunked body) the body could outgrow any charge, so it is refused.
+        """
+        cost = self._sized(nbytes)
+        with self._lock:
+            self._check_client(client)
+            if self.bytes_in_flight + cost > self.max_bytes:
+                self.stats["rejected_bytes"] += 1
+                raise AdmissionRejected(503, "Server is at capacity, try again shortly", self.retry_after())
+            self._clients[client] = self._clients.get(client, 0) + 1
+            self.bytes_in_flight += cost
+            self.stats["admitted"] += 1
+        return cost
+
+    @asynccontextmanager
+    async def submission(self, client: str, nbytes: Optional[int]):
+        """
+        Hold a slot for a batch submission (a job's body, read and stored before
+        it is queued): checked like an interactive request for its size and its
+        client's limit, then waiting in the batch lane for room for the body.
+        """
+        self._sized(nbytes)
+        with self._lock:
+            self._check_client(client)
+            self._clients[client] = self._clients.get(client, 0) + 1
+        try:
+            async with self.batch(nbytes):
+                yield
+        finally:
+            self.release(client, 0)
+
+    def _sized(self, nbytes: Optional[int]) -> int:
+        """The charge for a body of `nbytes`; raises 411 without a length and 413 past the budget."""
+        if nbytes is None:
+            with self._lock:
+                self.stats["rejected_no_length"] += 1
+            raise AdmissionRejected(411, "Content-Length is required", 0)
+        cost = self.cost(nbytes)
+        if cost > self.max_bytes:
+            with self._lock:
+                self.stats["rejected_too_large"] += 1
+            raise AdmissionRejected(413, f"Request of {cost} bytes exceeds the in-flight budget", 0)
+        return cost
+
+    def _check_client(self, client: str) -> None:
+        # Called with the lock held
+        if self._clients.get(client, 0) >= self.per_client:
+            self.stats["rejected_client"] += 1
+            raise AdmissionRejected(
+                429, f"Too many concurrent requests from this client (limit {self.per_client})", self.retry_after()
+            )
+
+    def release(self, client: Optional[str], cost: int) -> None:
+        with self._lock:
+            self.bytes_in_flight -= cost
+            if client is not None:
+                remaining = self._clients.get(client, 1) - 1
+                if remaining:
+                    self._clients[client] = remaining
+                else:
+                    self._clients.pop(client, None)
+        if self._released is not None:
+            self._released.set()
+
+    def _try_batch(self, cost: int) -> bool:
+        with self._lock:
+            # A lone oversized job still runs once nothing else is in flight
+            if self.bytes_in_flight and self.bytes_in_flight + cost > self.batch_bytes:
+                return False
+            self.bytes_in_flight += cost
+            self.stats["batch_admitted"] += 1
+            return True
+
+    @asynccontextmanager
+    async def batch(self, nbytes: Optional[int]):
+        """Hold budget for one batch job, waiting (never rejecting) until there is room."""
+        cost = self.cost(nbytes)
+        if self._released is None:
+            self._released = asyncio.Event()
+        waited = False
+        while True:
+            self._released.clear()
+            if self._try_batch(cost):
+                break
+            if not waited:
+                self.stats["batch_waits"] += 1
+                waited = True
+            await self._released.wait()
+        try:
+            yield
+        finally:
+            self.release(None, cost)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "bytes_in_flight": self.bytes_in_flight,
+                "max_bytes": self.max_bytes,
+                "batch_bytes": self.batch_bytes,
+                "clients_in_flight": len(self._clients),
+                "per_client": self.per_client,
+                **self.stats,
+            }
+
+
+CONTROLLER = AdmissionController()
+
+
+def admission_controller() -> AdmissionController:
+    return CONTROLLER
+
+
+def admission_status() -> Dict[str, Any]:
+    return CONTROLLER.snapshot()
+
+
+# ===============================
+# MIDDLEWARE
+# ===============================
+def _route_path(scope) -> str:
+    path, root = scope.get("path", ""), scope.get("root_path", "")
+    return path[len(root):] if root and path.startswith(root) else path
+
+
+def client_key(peer: Optional[str], client_id: Optional[str] = None) -> str:
+    """
+    Who a request is from: its peer address, with the client's X-Client-Id as
+    a sub-key at most. The header is the client's own claim, so it may tell
+    apart devices behind one address but never stands in for the address.
+    """
+    peer = peer or "unknown"
+    return f"{peer}/{client_id[:64]}" if client_id else peer
+
+
+def _client_and_length(scope) -> Tuple[str, Optional[int]]:
+    headers = dict(scope.get("headers") or [])
+    # Limits are per peer address: a header the client sets itself would let it
+    # take any number of slots, or use up another client's
+    client = client_key((scope.get("client") or (None,))[0])
+    try:
+        length = int(headers.get(b"content-length", b""))
+    except ValueError:
+        length = None
+    if length is not None and length < 0:
+        length = None
+    return client, length
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that admits interactive requests to `paths` before their
+    body is read, answering 429/503 (with Retry-After) straight away when the
+    client's limit or the byte budget is reached. Requests to `batch_paths`
+    (job submissions) pass the same size and client checks, then wait in the
+    batch lane instead. The request's slot is held until its response has been
+    sent. The server holds a body to its declared Content-Length, so requiring
+    one keeps the charge an upper bound.
+    """
+
+    def __init__(self, app, paths=("/api/upload",), batch_paths=()):
+        self.app = app
+        self.paths = set(paths)
+        self.batch_paths = set(batch_paths)
+
+    async def __call__(self, scope, receive, send):
+        path = _route_path(scope)
+        if scope["type"] != "http" or scope.get("method") != "POST" or path not in self.paths | self.batch_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client, length = _client_and_length(scope)
+        controller = admission_controller()
+        try:
+            if path in self.batch_paths:
+                async with controller.submission(client, length):
+                    await self.app(scope, receive, send)
+                return
+            cost = controller.admit(client, length)
+        except AdmissionRejected as e:
+            from starlette.responses import JSONResponse
+
+            headers = {"Retry-After": str(max(1, int(e.retry_after)))} if e.retry_after else {}
+            body = {"error": str(e), "retry_after": round(e.retry_after, 1)}
+            await JSONResponse(status_code=e.status, content=body, headers=headers)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(client, cost)
@@ -0,0 +1,348 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .logs import get_logger
+
+log = get_logger("cache")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory | sqlite | redis
+CACHE_PATH = os.getenv("CACHE_PATH", "./cache.db")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TIMEOUT = float(os.getenv("CACHE_TIMEOUT", "0.5"))
+
+PLACES_CACHE_TTL = float(os.getenv("PLACES_CACHE_TTL", "300"))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", "86400"))
+VISION_CACHE_TTL = float(os.getenv("VISION_CACHE_TTL", "3600"))
+
+SQLITE_PRUNE_EVERY = 200  # writes between expiry/size sweeps of the SQLite file
+
+
+# ===============================
+# BACKENDS
+# ===============================
+# A backend stores `value` under `key` until `expires_at` (wall clock, so every
+# worker agrees) and returns `(stored_at, value)` for live entries. Values must
+# be JSON-serialisable for the shared backends; tuples come back as lists.
+
+class MemoryBackend:
+    """In-process LRU. Fastest, but every uvicorn worker has its own copy."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return stored_at, value
+
+    def set(self, key: str, value: Any, stored_at: float, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (stored_at, stored_at + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def size(self) -> Optional[int]:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    One SQLite file shared by every worker on the host (WAL mode, one connection
+    per thread). When the file holds more than `max_entries`, the oldest writes go first.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT, stored_at REAL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=CACHE_TIMEOUT * 10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        row = self._conn().execute(
+            "SELECT stored_at, value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, key: str, value: Any, stored_at: float, ttl: float) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), stored_at, stored_at + ttl),
+            )
+        self._writes += 1
+        if self._writes % SQLITE_PRUNE_EVERY == 0:
+            self._prune()
+
+    def delete(self, key: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def size(self) -> Optional[int]:
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _prune(self) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY stored_at LIMIT ?)", (excess,)
+                )
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RedisBackend:
+    """
+    Minimal RESP2 client (GET / SET PX / DEL / DBSIZE) for Redis or anything
+    that speaks its protocol, so no client library is needed. Expiry is left to
+    the server (`PX`); each value is stored with its write time to report ages.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_URL, timeout: float = CACHE_TIMEOUT):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    # ---------- protocol ----------
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock, self._local.reader = sock, sock.makefile("rb")
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", str(self.db))
+
+    def _read(self) -> Any:
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read() for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _roundtrip(self, *args: str) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._local.sock.sendall(b"".join(parts))
+        return self._read()
+
+    def _command(self, *args: str) -> Any:
+        if getattr(self._local, "sock", None) is None:
+            self._connect()
+        try:
+            return self._roundtrip(*args)
+        except (OSError, ConnectionError):
+            # Drop the broken connection; the next call reconnects
+            self._local.sock.close()
+            self._local.sock = None
+            raise
+
+    # ---------- backend API ----------
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        raw = self._command("GET", key)
+        if raw is None:
+            return None
+        envelope = json.loads(raw)
+        return envelope["t"], envelope["v"]
+
+    def set(self, key: str, value: Any, stored_at: float, ttl: float) -> None:
+        payload = json.dumps({"t": stored_at, "v": value})
+        self._command("SET", key, payload, "PX", str(max(1, int(ttl * 1000))))
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", key)
+
+    def size(self) -> Optional[int]:
+        return self._command("DBSIZE")
+
+
+_shared_backend = None
+_shared_lock = threading.Lock()
+
+
+def make_backend(max_entries: int = CACHE_MAX_ENTRIES):
+    """Backend for one cache: a private LRU, or the process-wide shared backend."""
+    global _shared_backend
+    if CACHE_BACKEND == "memory":
+        return MemoryBackend(max_entries)
+    with _shared_lock:
+        if _shared_backend is None:
+            if CACHE_BACKEND == "sqlite":
+                _shared_backend = SQLiteBackend(CACHE_PATH)
+            elif CACHE_BACKEND == "redis":
+                _shared_backend = RedisBackend(CACHE_URL)
+            else:
+                raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+    return _shared_backend
+
+
+# ===============================
+# CACHE
+# ===============================
+_ALL: List["Cache"] = []
+
+
+class Cache:
+    """
+    Namespaced TTL cache over a pluggable backend, with the same semantics and
+    stats whatever the backend: `get` returns `(value, age_seconds)` or None once
+    the entry is older than its TTL. Backend failures count as misses/errors and
+    never fail the request. A TTL of 0 disables the cache.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int = CACHE_MAX_ENTRIES, backend=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._backend = backend
+        self.stats = {"hits": 0, "misses": 0, "sets": 0, "errors": 0}
+        _ALL.append(self)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = make_backend(self.max_entries)
+        return self._backend
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """Return `(value, age_seconds)`; `max_age` narrows freshness below the TTL."""
+        if self.ttl <= 0:
+            return None
+        try:
+            entry = self.backend.get(self._key(key))
+        except Exception as e:
+            self.stats["errors"] += 1
+            log.warning("Cache read failed", cache=self.namespace, error=str(e))
+            return None
+        if entry is not None:
+            stored_at, value = entry
+            age = max(0.0, time.time() - stored_at)
+            if age <= (self.ttl if max_age is None else min(self.ttl, max_age)):
+                self.stats["hits"] += 1
+                return value, age
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        try:
+            self.backend.set(self._key(key), value, time.time(), ttl)
+            self.stats["sets"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            log.warning("Cache write failed", cache=self.namespace, error=str(e))
+
+    def delete(self, key: str) -> None:
+        try:
+            self.backend.delete(self._key(key))
+        except Exception as e:
+            self.stats["errors"] += 1
+            log.warning("Cache delete failed", cache=self.namespace, error=str(e))
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "ttl": self.ttl,
+        }
+
+
+# Fresh-result caches (the last-known-good stores live in circuit_breaker.py)
+CACHES: Dict[str, Cache] = {
+    "places": Cache("places", PLACES_CACHE_TTL),
+    "geocode": Cache("geocode", GEOCODE_CACHE_TTL),
+}
+
+
+def get_cache(name: str) -> Cache:
+    return CACHES[name]
+
+
+def cache_status() -> Dict[str, Any]:
+    status: Dict[str, Any] = {"backend": CACHE_BACKEND, "caches": {}}
+    for cache in _ALL:
+        status["caches"][cache.namespace] = cache.snapshot()
+    try:
+        status["entries"] = make_backend().size() if CACHE_BACKEND != "memory" else None
+    except Exception as e:
+        status["entries"] = None
+        status["error"] = str(e)
+    return status
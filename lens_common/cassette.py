@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import zlib
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# "record" captures every upstream exchange, "replay" serves them back without network
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "").lower()
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/upstream.db")
+# Replay with the recorded latency of each exchange (0 answers immediately)
+CASSETTE_TIMING = os.getenv("CASSETTE_TIMING", "1") == "1"
+
+# Request fields that differ between otherwise identical calls (ADK function call ids)
+IGNORED_KEYS = {"id"}
+# Longer strings (inline image data) are stored and matched by digest only
+MAX_INLINE_CHARS = 4096
+
+
+class CassetteMiss(LookupError):
+    """Replay mode got a request that was never recorded."""
+
+
+class ReplayedError(Exception):
+    """A recorded exchange that failed upstream, raised again on replay."""
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items() if k not in IGNORED_KEYS and v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_compact(v) for v in value]
+    if isinstance(value, str) and len(value) > MAX_INLINE_CHARS:
+        return "sha256:" + hashlib.sha256(value.encode()).hexdigest()
+    return value
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode())
+
+
+def _unpack(blob: Optional[bytes]) -> Any:
+    return json.loads(zlib.decompress(blob)) if blob else None
+
+
+# ===============================
+# STORE
+# ===============================
+class CassetteStore:
+    """
+    Recorded exchanges in one SQLite file, as zlib-compressed JSON.
+
+    An exchange is identified by its kind ("gemini", "places", "geocode") and a
+    digest of the compacted request. Identical requests recorded several times
+    are kept in order and replayed round-robin.
+    """
+
+    def __init__(self, path: str = CASSETTE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cursor: Dict[Tuple[str, str], int] = {}
+        self._pending: Dict[str, Any] = {}
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS exchanges ("
+                " kind TEXT, key TEXT, seq INTEGER, request BLOB, response BLOB, error TEXT,"
+                " elapsed_ms REAL, recorded_at REAL, PRIMARY KEY (kind, key, seq))"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def begin(self, request: Any) -> str:
+        """Key for a request; the compacted request is kept until `record` stores it."""
+        compact = _compact(request)
+        key = hashlib.sha256(json.dumps(compact, sort_keys=True, default=str).encode()).hexdigest()[:32]
+        if CASSETTE_MODE == "record":
+            with self._lock:
+                self._pending[key] = compact
+        return key
+
+    def record(self, kind: str, key: str, response: Any, elapsed_ms: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            request = self._pending.pop(key, None)
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT INTO exchanges SELECT ?, ?, COALESCE(MAX(seq) + 1, 0), ?, ?, ?, ?, ?"
+                    " FROM exchanges WHERE kind = ? AND key = ?",
+                    (kind, key, _pack(request), _pack(response), error, elapsed_ms, time.time(), kind, key),
+                )
+            self.stats["recorded"] += 1
+
+    def lookup(self, kind: str, key: str) -> Tuple[Any, Optional[str], float]:
+        """Next recording for this request as `(response, error, elapsed_ms)`; raises CassetteMiss."""
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT response, error, elapsed_ms FROM exchanges WHERE kind = ? AND key = ? ORDER BY seq",
+                (kind, key),
+            ).fetchall()
+            if not rows:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded {kind} exchange for request {key}")
+            index = self._cursor.get((kind, key), 0)
+            self._cursor[(kind, key)] = index + 1
+            self.stats["replayed"] += 1
+        response, error, elapsed_ms = rows[index % len(rows)]
+        return _unpack(response), error, elapsed_ms or 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        rows = self._conn().execute(
+            "SELECT kind, COUNT(*), AVG(elapsed_ms), SUM(LENGTH(response)) FROM exchanges GROUP BY kind"
+        ).fetchall()
+        return {
+            "mode": CASSETTE_MODE or "off",
+            "path": self.path,
+            **self.stats,
+            "kinds": {
+                kind: {"exchanges": count, "avg_ms": round(avg or 0.0, 1), "bytes": size or 0}
+                for kind, count, avg, size in rows
+            },
+        }
+
+
+_store: Optional[CassetteStore] = None
+_store_lock = threading.Lock()
+
+
+def cassette_store() -> CassetteStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CassetteStore()
+    return _store
+
+
+# ===============================
+# EXCHANGES
+# ===============================
+def replay(kind: str, key: str) -> Tuple[Any, float]:
+    """Recorded response and latency for a request; a recorded failure is raised as ReplayedError."""
+    response, error, elapsed_ms = cassette_store().lookup(kind, key)
+    if error:
+        raise ReplayedError(error)
+    return response, elapsed_ms
+
+
+def exchange(kind: str, request: Any, call: Callable[[], Any]) -> Any:
+    """
+    Run one upstream call through the cassette: record its JSON-able result
+    (or failure) and latency, or replay it, sleeping for the recorded time.
+    With CASSETTE_MODE unset this is just `call()`.
+    """
+    if not CASSETTE_MODE:
+        return call()
+    store = cassette_store()
+    key = store.begin(request)
+    if CASSETTE_MODE == "replay":
+        response, error, elapsed_ms = store.lookup(kind, key)
+        if CASSETTE_TIMING:
+            time.sleep(elapsed_ms / 1000)
+        if error:
+            raise ReplayedError(error)
+        return response
+
+    started = time.perf_counter()
+    try:
+        response = call()
+    except Exception as e:
+        store.record(kind, key, None, (time.perf_counter() - started) * 1000, f"{type(e).__name__}: {e}")
+        raise
+    store.record(kind, key, response, (time.perf_counter() - started) * 1000)
+    return response
+
+
+async def exchange_async(kind: str, request: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+    """`exchange` for coroutine calls; replay waits without blocking the event loop."""
+    if not CASSETTE_MODE:
+        return await call()
+    store = cassette_store()
+    key = store.begin(request)
+    if CASSETTE_MODE == "replay":
+        response, error, elapsed_ms = store.lookup(kind, key)
+        if CASSETTE_TIMING:
+            await asyncio.sleep(elapsed_ms / 1000)
+        if error:
+            raise ReplayedError(error)
+        return response
+
+    started = time.perf_counter()
+    try:
+        response = await call()
+    except Exception as e:
+        store.record(kind, key, None, (time.perf_counter() - started) * 1000, f"{type(e).__name__}: {e}")
+        raise
+    store.record(kind, key, response, (time.perf_counter() - started) * 1000)
+    return response
+
+
+def exchange_http(kind: str, request: Any, send: Callable[[], "requests.Response"]) -> "requests.Response":
+    """`exchange` for an HTTP call: status and body are recorded and replayed as a `requests.Response`."""
+    if not CASSETTE_MODE:
+        return send()
+    import requests
+
+    def call():
+        res = send()
+        return {"status": res.status_code, "url": res.url, "body": res.text}
+
+    snapshot = exchange(kind, request, call)
+    res = requests.Response()
+    res.status_code = snapshot["status"]
+    res.url = snapshot["url"]
+    res._content = snapshot["body"].encode()
+    res.encoding = "utf-8"
+    return res
+
+
+def cassette_status() -> Dict[str, Any]:
+    if not CASSETTE_MODE:
+        return {"mode": "off"}
+    return cassette_store().summary()
@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+from .cache import Cache
+from .logs import get_logger
+
+log = get_logger("circuit_breaker")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+STALE_TTL = float(os.getenv("STALE_TTL", "86400"))
+STALE_MAX_ENTRIES = int(os.getenv("STALE_MAX_ENTRIES", "1024"))
+
+# Session state key holding the location/label key of the current request (set by main.py)
+STALE_KEY = "stale_key"
+# Session state flag raised when any stage answered from the last-known-good store
+STALE_FLAG = "served_stale"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the upstream breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is temporarily unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+# ===============================
+# CIRCUIT BREAKER
+# ===============================
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker for one upstream.
+
+    The last `window` outcomes are kept; once at least `min_calls` are recorded
+    and the failure ratio reaches `error_rate`, the breaker opens and `allow()`
+    returns False until `reset_timeout` has elapsed. It then lets exactly one
+    probe through (half-open): success closes it, failure re-opens it. A probe
+    that never reports back (cancelled, or failed outside the recorded paths)
+    is given up on after another `reset_timeout`, and the next call probes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        error_rate: float = BREAKER_ERROR_RATE,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Return True if a call may go to the upstream right now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            now = time.monotonic()
+            if state == HALF_OPEN and (not self._probe_in_flight or now - self._probe_started >= self.reset_timeout):
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._current_state() == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        log.warning("Circuit opened", circuit=self.name, reset_timeout_s=round(self.reset_timeout))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            failures = self._outcomes.count(False)
+        return {
+            "state": state,
+            "calls": calls,
+            "failures": failures,
+            "error_rate": round(failures / calls, 3) if calls else 0.0,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {
+    "places": CircuitBreaker("places"),
+    "gemini": CircuitBreaker("gemini"),
+}
+
+# Last-known-good result per location/label, served while a breaker is open
+STALE_RESULTS: Dict[str, Cache] = {
+    "places": Cache("stale_places", STALE_TTL, STALE_MAX_ENTRIES),
+    "vision": Cache("stale_vision", STALE_TTL, STALE_MAX_ENTRIES),
+    "tool_args": Cache("stale_tool_args", STALE_TTL, STALE_MAX_ENTRIES),
+}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    return BREAKERS[name]
+
+
+def breaker_status() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.snapshot() for name, breaker in BREAKERS.items()}
+
+
+def location_key(latitude: float, longitude: float, *parts: Any) -> str:
+    """Cache key for a location rounded to ~110 m plus any discriminating parts."""
+    suffix = ":".join(str(p).strip().lower() for p in parts if p not in (None, ""))
+    return f"{round(latitude, 3)}:{round(longitude, 3)}:{suffix}"
@@ -0,0 +1,255 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+import contextvars
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set
+
+from .executor import run_blocking
+from .logs import current_app, current_request_id, get_logger
+
+log = get_logger("costs")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# Off unless asked for: when on, every request is written to a SQLite file
+COST_LEDGER = os.getenv("COST_LEDGER", "0") == "1"
+COST_DB_PATH = os.getenv("COST_DB_PATH", "./costs.db")
+COST_RETENTION_S = float(os.getenv("COST_RETENTION_S", str(7 * 86400)))
+
+# What one request is charged, per stage
+COUNTERS = (
+    "model_calls", "prompt_tokens", "output_tokens", "cached_tokens",
+    "tool_calls", "places_calls", "geocode_calls",
+)
+_current: contextvars.ContextVar[Optional["RequestCost"]] = contextvars.ContextVar("request_cost", default=None)
+
+
+# ===============================
+# PER-REQUEST ACCOUNT
+# ===============================
+class RequestCost:
+    """Counters charged to one request, per stage (agent name, or the upstream called)."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        # Ledger rows of both apps can share one file (single-process host)
+        self.app = current_app() or "unknown"
+        self.request_id = current_request_id()
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.closed = False
+        self.stages: Dict[str, Dict[str, int]] = {}
+        # Places rings and the I/O pool charge from other threads
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, **counters: int) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(stage, dict.fromkeys(COUNTERS, 0))
+            for name, value in counters.items():
+                entry[name] += value
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: sum(entry[name] for entry in self.stages.values()) for name in COUNTERS}
+
+
+def charge(stage: str, **counters: int) -> None:
+    """Add to the current request's account; a no-op outside `track_costs`."""
+    cost = _current.get()
+    if cost is not None:
+        cost.add(stage, **counters)
+
+
+def charge_event(event) -> None:
+    """Model usage and tool calls of one ADK event, charged to the agent that produced it."""
+    cost = _current.get()
+    if cost is None:
+        return
+    stage = event.author or "unknown"
+    usage = event.usage_metadata
+    if usage is not None:
+        cost.add(
+            stage, model_calls=1,
+            prompt_tokens=usage.prompt_token_count or 0,
+            output_tokens=usage.candidates_token_count or 0,
+            cached_tokens=usage.cached_content_token_count or 0,
+        )
+    calls = event.get_function_calls()
+    if calls:
+        cost.add(stage, tool_calls=len(calls))
+
+
+@asynccontextmanager
+async def track_costs(kind: str, detach: bool = False):
+    """
+    Account everything charged inside the block to one ledger entry of `kind`
+    ("upload", "job", ...). A block inside another adds to the outer entry,
+    unless `detach` is set: background work (job workers, prefetches) inherits
+    the context of whichever request started it and must not charge that one.
+    """
+    outer = _current.get()
+    if not COST_LEDGER or (outer is not None and not outer.closed and not detach):
+        yield outer
+        return
+    cost = RequestCost(kind)
+    token = _current.set(cost)
+    started = time.perf_counter()
+    try:
+        yield cost
+    finally:
+        _current.reset(token)
+        cost.duration_ms = (time.perf_counter() - started) * 1000
+        cost.closed = True
+        _enqueue(cost)
+
+
+# ===============================
+# SQLITE LEDGER
+# ===============================
+class CostLedger:
+    """One `cost_requests` row per request and one `cost_stages` row per stage it was charged in."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        columns = ", ".join(f"{name} INTEGER" for name in COUNTERS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cost_requests ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL, app TEXT, kind TEXT,"
+                f" request_id TEXT, duration_ms REAL, {columns})"
+            )
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS cost_stages (entry_id INTEGER, stage TEXT, {columns})")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cost_requests_ts ON cost_requests (app, ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cost_stages_entry ON cost_stages (entry_id)")
+
+    def write(self, costs: List[RequestCost]) -> None:
+        placeholders = ", ".join("?" for _ in COUNTERS)
+        with self._lock, self._conn:
+            for cost in costs:
+                totals = cost.totals()
+                entry_id = self._conn.execute(
+                    f"INSERT INTO cost_requests (ts, app, kind, request_id, duration_ms, {', '.join(COUNTERS)})"
+                    f" VALUES (?, ?, ?, ?, ?, {placeholders})",
+                    (cost.started_at, cost.app, cost.kind, cost.request_id, round(cost.duration_ms, 1),
+                     *(totals[name] for name in COUNTERS)),
+                ).lastrowid
+                self._conn.executemany(
+                    f"INSERT INTO cost_stages VALUES (?, ?, {placeholders})",
+                    [(entry_id, stage, *(entry[name] for name in COUNTERS)) for stage, entry in cost.stages.items()],
+                )
+            before = time.time() - COST_RETENTION_S
+            self._conn.execute(
+                "DELETE FROM cost_stages WHERE entry_id IN (SELECT id FROM cost_requests WHERE ts < ?)", (before,)
+            )
+            self._conn.execute("DELETE FROM cost_requests WHERE ts < ?", (before,))
+
+    def summary(self, window_s: float, app: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Per-request distribution, totals, and per-kind and per-stage means over
+        the last `window_s`, of one app's requests (or all of them).
+        """
+        since = time.time() - window_s
+        where, args = ("r.app = ? AND r.ts >= ?", (app, since)) if app else ("r.ts >= ?", (since,))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT r.kind, {', '.join(f'r.{name}' for name in COUNTERS)} FROM cost_requests r WHERE {where}", args
+            ).fetchall()
+            stage_rows = self._conn.execute(
+                f"SELECT s.stage, {', '.join(f'SUM(s.{name})' for name in COUNTERS)}"
+                f" FROM cost_stages s JOIN cost_requests r ON r.id = s.entry_id WHERE {where} GROUP BY s.stage",
+                args,
+            ).fetchall()
+
+        count = len(rows)
+        totals, per_request = {}, {}
+        for i, name in enumerate(COUNTERS, 1):
+            values = sorted(row[i] for row in rows)
+            totals[name] = sum(values)
+            per_request[name] = _distribution(values)
+
+        kinds: Dict[str, List] = {}
+        for row in rows:
+            kinds.setdefault(row[0], []).append(row[1:])
+
+        return {
+            "enabled": COST_LEDGER,
+            "app": app,
+            "window_s": window_s,
+            "requests": count,
+            "totals": totals,
+            "per_request": per_request,
+            "kinds": {
+                kind: {"requests": len(entries), "mean": _means(entries, len(entries))}
+                for kind, entries in sorted(kinds.items())
+            },
+            # What each stage adds to an average request of the window
+            "stages": {
+                row[0]: {
+                    "total": {name: value for name, value in zip(COUNTERS, row[1:]) if value},
+                    "per_request": {name: value for name, value in _means([row[1:]], count).items() if value},
+                }
+                for row in sorted(stage_rows, key=lambda r: -(r[2] + r[3]))
+            },
+        }
+
+
+def _distribution(values: List[int]) -> Dict[str, float]:
+    """Mean and percentiles of a sorted list."""
+    if not values:
+        return {"mean": 0.0, "p50": 0, "p95": 0, "max": 0}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"mean": round(sum(values) / len(values), 2), "p50": pick(0.50), "p95": pick(0.95), "max": values[-1]}
+
+
+def _means(entries: List, count: int) -> Dict[str, float]:
+    if not count:
+        return dict.fromkeys(COUNTERS, 0.0)
+    return {name: round(sum(entry[i] for entry in entries) / count, 2) for i, name in enumerate(COUNTERS)}
+
+
+_ledger: Optional[CostLedger] = None
+_ledger_lock = threading.Lock()
+_pending: List[RequestCost] = []
+_flushing: Set[asyncio.Task] = set()
+
+
+def cost_ledger() -> CostLedger:
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = CostLedger(COST_DB_PATH)
+    return _ledger
+
+
+def _enqueue(cost: RequestCost) -> None:
+    """Queue an entry; one flush at a time writes everything queued so far off the loop."""
+    _pending.append(cost)
+    if not _flushing:
+        task = asyncio.ensure_future(_flush())
+        _flushing.add(task)
+        task.add_done_callback(_flushing.discard)
+
+
+async def _flush() -> None:
+    while _pending:
+        batch = _pending[:]
+        del _pending[:len(batch)]
+        try:
+            await run_blocking(cost_ledger().write, batch)
+        except Exception as e:
+            log.warning("Cost ledger write failed", entries=len(batch), error=str(e))
+
+
+async def cost_summary(window_s: float = 86400, app: Optional[str] = None) -> Dict[str, Any]:
+    if not COST_LEDGER:
+        # Don't create the ledger file just to report that nothing is recorded
+        return {"enabled": False, "app": app, "window_s": window_s}
+    summary = await run_blocking(cost_ledger().summary, window_s, app)
+    return {**summary, "path": COST_DB_PATH, "unwritten": len(_pending)}
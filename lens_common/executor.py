@@ -0,0 +1,154 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from .logs import get_logger
+from .metrics import record_stage
+
+log = get_logger("executor")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# "thread" suits the helpers here (hashlib, PIL and zlib release the GIL); "process" sidesteps the GIL entirely
+CPU_EXECUTOR = os.getenv("CPU_EXECUTOR", "thread").lower()
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+IO_WORKERS = int(os.getenv("IO_WORKERS", "32"))  # blocking calls (the Places tool, file writes)
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "250"))  # 0 disables the lag monitor
+
+
+# ===============================
+# POOLS
+# ===============================
+class Executors:
+    """The CPU pool, the blocking-I/O thread pool and the event loop lag monitor of one app."""
+
+    def __init__(self):
+        self.cpu: Optional[Executor] = None
+        self.io: Optional[ThreadPoolExecutor] = None
+        self.lag_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    def ensure(self) -> None:
+        if self.cpu is not None and self.io is not None:
+            return
+        with self._lock:
+            if self.cpu is None:
+                if CPU_EXECUTOR == "process":
+                    # Spawned, not forked: the parent has threads (and their locks) a fork would copy mid-use
+                    self.cpu = ProcessPoolExecutor(CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self.cpu = ThreadPoolExecutor(CPU_WORKERS, thread_name_prefix="cpu")
+            if self.io is None:
+                self.io = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="blocking-io")
+
+    def start(self) -> None:
+        """Create the pools and start the lag monitor on the running loop (from the app's lifespan)."""
+        self.ensure()
+        if LOOP_LAG_INTERVAL_MS > 0 and self.lag_task is None:
+            self.lag_task = asyncio.create_task(monitor_loop_lag(LOOP_LAG_INTERVAL_MS / 1000))
+        log.info("Executors started", cpu=CPU_EXECUTOR, cpu_workers=CPU_WORKERS, io_workers=IO_WORKERS)
+
+    async def shutdown(self) -> None:
+        if self.lag_task is not None:
+            self.lag_task.cancel()
+            await asyncio.gather(self.lag_task, return_exceptions=True)
+            self.lag_task = None
+        with self._lock:
+            pools, self.cpu, self.io = [self.cpu, self.io], None, None
+        for pool in pools:
+            if pool is not None:
+                await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+
+EXECUTORS = Executors()
+
+
+def start_executors() -> None:
+    EXECUTORS.start()
+
+
+async def shutdown_executors() -> None:
+    await EXECUTORS.shutdown()
+
+
+# ===============================
+# OFFLOADING
+# ===============================
+async def run_blocking(func: Callable, *args: Any) -> Any:
+    """Run a blocking call on the I/O pool, keeping the caller's context (request ID)."""
+    EXECUTORS.ensure()
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(EXECUTORS.io, partial(context.run, func, *args))
+
+
+async def run_cpu(func: Callable, *args: Any) -> Any:
+    """Run a CPU-bound function on the CPU pool; with processes, `func` and `args` must pickle."""
+    EXECUTORS.ensure()
+    if CPU_EXECUTOR != "process":
+        func = partial(contextvars.copy_context().run, func)
+    return await asyncio.get_running_loop().run_in_executor(EXECUTORS.cpu, func, *args)
+
+
+async def run_cpu_buffer(func: Callable, data: bytes, *args: Any) -> Any:
+    """
+    `func(buffer, *args)` on the CPU pool without copying `data` per call where
+    possible: threads get a memoryview of it, and a process reads it from one
+    shared-memory block instead of having it pickled through the pool's pipe.
+    """
+    if CPU_EXECUTOR != "process":
+        return await run_cpu(func, memoryview(data), *args)
+
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        block.buf[:len(data)] = data
+        return await run_cpu(_call_on_shared, block.name, len(data), func, *args)
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _call_on_shared(name: str, size: int, func: Callable, *args: Any) -> Any:
+    """Worker side of `run_cpu_buffer`: attach to the block and hand `func` a view of it."""
+    from multiprocessing import shared_memory
+
+    # Spawned workers share the parent's resource tracker, so attaching here doesn't take ownership
+    block = shared_memory.SharedMemory(name=name)
+    view = block.buf[:size]
+    try:
+        return func(view, *args)
+    finally:
+        view.release()
+        block.close()
+
+
+# ===============================
+# CPU HELPERS
+# ===============================
+def content_digest(buffer, length: int = 16) -> str:
+    """Hex SHA-256 prefix of a bytes-like object (hashlib releases the GIL for large inputs)."""
+    return hashlib.sha256(buffer).hexdigest()[:length]
+
+
+# ===============================
+# EVENT LOOP LAG
+# ===============================
+async def monitor_loop_lag(interval: float) -> None:
+    """
+    Record how late the loop wakes up from a sleep of `interval` as the
+    `event_loop_lag` stage: anything blocking the loop shows up here.
+    """
+    while True:
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        record_stage("event_loop_lag", max(0.0, (time.perf_counter() - expected) * 1000))
+
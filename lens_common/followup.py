@@ -0,0 +1,163 @@
+import os
+import secrets
+from typing import Dict, List, Optional
+
+from .cache import Cache, get_cache
+from .circuit_breaker import CircuitOpenError
+from .geo import rank_places
+from .places import (
+    PLACES_MAX_RESULTS, PRICE_LEVELS, PlacesAPIError, format_place, get_api_key, places_cache_key, search_nearby,
+)
+
+# ===============================
+# CONFIGURATION
+# ===============================
+FOLLOWUP_TTL = float(os.getenv("FOLLOWUP_TTL", "1800"))
+FOLLOWUP_MAX_ENTRIES = int(os.getenv("FOLLOWUP_MAX_ENTRIES", "5000"))
+
+SESSIONS = Cache("followups", FOLLOWUP_TTL, FOLLOWUP_MAX_ENTRIES)
+
+# Refinement -> phrases of a free-text follow-up that ask for it
+REFINEMENTS = {
+    "cheaper": ("cheap", "budget", "affordable", "inexpensive", "less expensive"),
+    "closer": ("closer", "nearer", "nearest", "walking distance"),
+    "open_now": ("open now", "open right now", "still open", "currently open"),
+    "top_rated": ("top rated", "best rated", "highest rated", "better rated", "best reviewed"),
+}
+# Both re-rank by one end of the distance/rating blend, so asking for one drops the other
+ORDERINGS = {"closer": 1.0, "top_rated": 0.0}
+
+
+class FollowUpNotFound(KeyError):
+    """The follow-up session is unknown or has expired."""
+
+
+# ===============================
+# SESSIONS
+# ===============================
+def open_followup(args: Dict, final_output) -> Optional[str]:
+    """
+    Remember what a pipeline run resolved (label, location, types, radius) and
+    the raw Places answer its places came from, so refinements can be answered
+    without the agent. `args` are the `find_nearby_places` call arguments.
+    """
+    if not isinstance(final_output, dict) or not final_output.get("places") or final_output.get("stale"):
+        return None
+    req = args.get("req", args)
+    if not req.get("included_types") or req.get("latitude") is None or req.get("longitude") is None:
+        return None
+
+    state = {
+        "label": req.get("image_label"),
+        "latitude": float(req["latitude"]),
+        "longitude": float(req["longitude"]),
+        "included_types": list(req["included_types"]),
+        "radius": float(final_output.get("search_radius_m") or req.get("radius") or 500.0),
+        "page_size": int(req.get("max_result_count") or 10),
+        "distance_weight": req.get("distance_weight"),
+        "refinements": [],
+    }
+    # The run's own search answer, while the Places cache still holds it
+    cached = get_cache("places").get(places_cache_key(
+        state["latitude"], state["longitude"], state["included_types"], state["radius"], state["page_size"],
+    ))
+    state["candidates"] = cached[0] if cached else None
+    state["full_page"] = state["page_size"] >= PLACES_MAX_RESULTS
+
+    token = secrets.token_urlsafe(16)
+    SESSIONS.put(token, state)
+    return token
+
+
+def parse_refinements(message: str) -> List[str]:
+    """Refinements asked for in a free-text follow-up, by phrase (no model call)."""
+    text = message.lower()
+    return [name for name, phrases in REFINEMENTS.items() if any(phrase in text for phrase in phrases)]
+
+
+def follow_up(token: str, refinements: List[str]) -> Dict:
+    """
+    Answer a follow-up to a session: add `refinements` to the ones asked for
+    before and re-rank/filter the session's places by all of them. The answer
+    carries a new session for the next turn; the old one stays as it was, so
+    a session shared by several clients (a prefetched answer) never mixes turns.
+
+    The stored Places answer is reused as is. Only when it is missing (evicted
+    from the Places cache) or too short for the filters does one full-page
+    search of the same ring replace it. A failed search falls back to the stored answer.
+    """
+    unknown = [r for r in refinements if r not in REFINEMENTS]
+    if unknown:
+        raise ValueError(f"Unknown refinement {', '.join(unknown)}; expected one of {', '.join(REFINEMENTS)}")
+
+    cached = SESSIONS.get(token)
+    if cached is None:
+        raise FollowUpNotFound(token)
+    state = dict(cached[0])
+
+    active = _merge(state["refinements"], refinements)
+    api_key = get_api_key()
+    upstream_calls = 0
+    candidates = state["candidates"]
+    if candidates is None or (not state["full_page"] and len(_refine(candidates, state, active)) < state["page_size"]):
+        try:
+            candidates = search_nearby(
+                state["latitude"], state["longitude"], state["included_types"],
+                state["radius"], PLACES_MAX_RESULTS, api_key,
+            )
+            upstream_calls = 1
+            state["candidates"], state["full_page"] = candidates, True
+        except (CircuitOpenError, PlacesAPIError):
+            if candidates is None:
+                raise
+
+    places = _refine(candidates, state, active)[:state["page_size"]]
+    state["refinements"] = active
+    token = secrets.token_urlsafe(16)
+    SESSIONS.put(token, state)
+
+    return {
+        "status": "success",
+        "session": token,
+        "label": state["label"],
+        "refinements": active,
+        "agent_response": {"places": [format_place(p, api_key) for p in places]}
+        if places else {"message": "No places match these refinements."},
+        "upstream_calls": upstream_calls,
+    }
+
+
+# ===============================
+# REFINEMENTS
+# ===============================
+def _merge(active: List[str], new: List[str]) -> List[str]:
+    if any(r in ORDERINGS for r in new):
+        active = [r for r in active if r not in ORDERINGS]
+    merged = list(active)
+    for r in new:
+        if r not in merged:
+            merged.append(r)
+    return merged
+
+
+def _refine(candidates: List[Dict], state: Dict, active: List[str]) -> List[Dict]:
+    weight = state["distance_weight"]
+    for r in active:
+        weight = ORDERINGS.get(r, weight)
+    places = rank_places(candidates, state["latitude"], state["longitude"], state["radius"], weight)
+    if "open_now" in active:
+        places = [p for p in places if (p.get("currentOpeningHours") or {}).get("openNow")]
+    if "cheaper" in active:
+        places = _cheaper(places)
+    return places
+
+
+def _cheaper(places: List[Dict]) -> List[Dict]:
+    """Places priced at or below the median price level, cheapest first; unpriced ones are dropped."""
+    levels = sorted(PRICE_LEVELS[p["priceLevel"]] for p in places if p.get("priceLevel") in PRICE_LEVELS)
+    if not levels:
+        return places
+    cutoff = levels[(len(levels) - 1) // 2]
+    priced = [p for p in places if PRICE_LEVELS.get(p.get("priceLevel"), cutoff + 1) <= cutoff]
+    # Stable: within a price level the ranking order holds
+    return sorted(priced, key=lambda p: PRICE_LEVELS[p["priceLevel"]])
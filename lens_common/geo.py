@@ -0,0 +1,61 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+# 1.0 ranks purely by distance, 0.0 purely by rating
+RANK_DISTANCE_WEIGHT = float(os.getenv("RANK_DISTANCE_WEIGHT", "0.5"))
+
+
+# ===============================
+# DISTANCE
+# ===============================
+def haversine_m(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in metres from one point to arrays of points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# ===============================
+# RANKING
+# ===============================
+def rank_places(
+    places: List[Dict],
+    latitude: float,
+    longitude: float,
+    radius: float,
+    distance_weight: Optional[float] = None,
+) -> List[Dict]:
+    """
+    Order raw Places API results by a blend of proximity and rating.
+
+    Proximity is `1 - distance / radius` (clipped to 0..1) and rating is `rating / 5`;
+    unrated places get the mean rating of the batch. Each returned place carries a
+    `distance_m` key. Ties keep Google's original order.
+    """
+    if not places:
+        return []
+    weight = RANK_DISTANCE_WEIGHT if distance_weight is None else min(max(distance_weight, 0.0), 1.0)
+
+    lats = np.array([p.get("location", {}).get("latitude", np.nan) for p in places], dtype=float)
+    lons = np.array([p.get("location", {}).get("longitude", np.nan) for p in places], dtype=float)
+    ratings = np.array([p.get("rating", np.nan) for p in places], dtype=float)
+
+    distances = haversine_m(latitude, longitude, lats, lons)
+    proximity = np.nan_to_num(1.0 - distances / max(radius, 1.0), nan=0.0).clip(0.0, 1.0)
+    rating_score = ratings / 5.0
+    fill = np.nanmean(rating_score) if np.isfinite(rating_score).any() else 0.5
+    rating_score = np.where(np.isnan(rating_score), fill, rating_score)
+
+    score = weight * proximity + (1.0 - weight) * rating_score
+    order = np.argsort(-score, kind="stable")
+
+    ranked = []
+    for i in order:
+        place = dict(places[i])
+        place["distance_m"] = None if np.isnan(distances[i]) else int(round(distances[i]))
+        ranked.append(place)
+    return ranked
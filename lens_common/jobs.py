@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from .logs import get_logger, request_context
+from .metrics import latency_percentiles
+
+log = get_logger("jobs")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "600"))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "")  # empty = in-memory only
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """Raised by `submit` when the queue is at capacity and the job is shed."""
+
+    def __init__(self, depth: int, retry_after: float):
+        super().__init__(f"Job queue is full ({depth} waiting)")
+        self.depth = depth
+        self.retry_after = retry_after
+
+
+# ===============================
+# DURABLE STORE
+# ===============================
+class SQLiteJobStore:
+    """Optional durable copy of every job so queued work survives a restart."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT, payload TEXT, result TEXT, error TEXT,"
+                " submitted_at REAL, started_at REAL, finished_at REAL)"
+            )
+
+    def save(self, job: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job["id"], job["status"], json.dumps(job["payload"]),
+                    json.dumps(job.get("result")), job.get("error"),
+                    job["submitted_at"], job.get("started_at"), job.get("finished_at"),
+                ),
+            )
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Jobs that were queued or running when the process stopped, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY submitted_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def purge(self, before: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (before,))
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        job_id, status, payload, result, error, submitted_at, started_at, finished_at = row
+        return {
+            "id": job_id, "status": status, "payload": json.loads(payload),
+            "result": json.loads(result) if result else None, "error": error,
+            "submitted_at": submitted_at, "started_at": started_at, "finished_at": finished_at,
+        }
+
+
+# ===============================
+# JOB QUEUE
+# ===============================
+class JobQueue:
+    """
+    Bounded in-process job queue served by a fixed pool of asyncio workers.
+
+    `submit` returns a job ID immediately or raises QueueFull (load shedding).
+    `handler(payload)` runs the actual work; its return value becomes the result.
+    Workers start on the first submit, so the queue also works when the app is
+    mounted under a host that doesn't run its lifespan. `app` names the app
+    whose jobs these are in their log records and cost entries.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        workers: int = JOB_WORKERS,
+        max_depth: int = JOB_QUEUE_MAX,
+        result_ttl: float = JOB_RESULT_TTL,
+        db_path: str = JOB_DB_PATH,
+        app: Optional[str] = None,
+    ):
+        self.handler = handler
+        self.app = app
+        self.workers = workers
+        self.max_depth = max_depth
+        self.result_ttl = result_ttl
+        self.store = SQLiteJobStore(db_path) if db_path else None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._busy = 0
+        self._saving = 0  # submissions admitted but not yet queued
+        self._wait_ms: Deque[float] = deque(maxlen=1000)
+        self._service_ms: Deque[float] = deque(maxlen=1000)
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "shed": 0, "recovered": 0}
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.store:
+            for job in self.store.pending():
+                job["status"] = QUEUED
+                self._track(job)
+                self._queue.put_nowait(job["id"])
+                self.counters["recovered"] += 1
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    # ---------- API ----------
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.start()
+        await self._evict()
+        depth = self._queue.qsize() + self._saving
+        if depth >= self.max_depth:
+            self.counters["shed"] += 1
+            raise QueueFull(depth, self._estimated_wait_s(depth))
+
+        job = {
+            "id": f"job-{uuid.uuid4()}",
+            "status": QUEUED,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._track(job)
+        # Stored before it is acknowledged, off the loop
+        self._saving += 1
+        try:
+            await asyncio.to_thread(self._persist, job)
+        except BaseException:
+            self._jobs.pop(job["id"], None)
+            self._done_events.pop(job["id"], None)
+            raise
+        finally:
+            self._saving -= 1
+        self._queue.put_nowait(job["id"])
+        self.counters["submitted"] += 1
+        return {"job_id": job["id"], "status": QUEUED, "queue_depth": depth + 1}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None and self.store:
+            job = self.store.load(job_id)
+        return self._public(job) if job else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Block until the job finishes or `timeout` elapses, then return its current view."""
+        event = self._done_events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_depth": self.max_depth,
+            "workers": self.workers,
+            "busy_workers": self._busy,
+            "durable": self.store is not None,
+            **self.counters,
+            "wait_time": latency_percentiles(self._wait_ms),
+            "service_time": latency_percentiles(self._service_ms),
+        }
+
+    # ---------- internals ----------
+    def _track(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = job
+        self._done_events[job["id"]] = asyncio.Event()
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        if self.store:
+            self.store.save(job)
+
+    def _estimated_wait_s(self, depth: int) -> float:
+        service = latency_percentiles(self._service_ms)["p50_ms"] / 1000 or 5.0
+        return max(1.0, depth * service / max(1, self.workers))
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            job["status"] = RUNNING
+            job["started_at"] = time.time()
+            self._wait_ms.append((job["started_at"] - job["submitted_at"]) * 1000)
+            self._busy += 1
+            await asyncio.to_thread(self._persist, job)
+            try:
+                # The job's records carry its ID in place of a request ID
+                with request_context(job_id, self.app):
+                    job["result"] = await self.handler(job["payload"])
+                job["status"] = DONE
+                self.counters["completed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job["status"] = FAILED
+                job["error"] = str(e)
+                self.counters["failed"] += 1
+                log.warning("Job failed", job_id=job_id, error=str(e))
+            finally:
+                self._busy -= 1
+                job["finished_at"] = time.time()
+                self._service_ms.append((job["finished_at"] - job["started_at"]) * 1000)
+                self._done_events[job_id].set()
+            await asyncio.to_thread(self._persist, job)
+            await self._evict()
+
+    async def _evict(self) -> None:
+        """Forget jobs finished more than `result_ttl` ago; runs after each job and on each submit."""
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._done_events.pop(job_id, None)
+        if expired and self.store:
+            await asyncio.to_thread(self.store.purge, cutoff)
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        view = {
+            "job_id": job["id"],
+            "status": job["status"],
+            "submitted_at": job["submitted_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+        if job["status"] == DONE:
+            view["result"] = job["result"]
+        if job["status"] == FAILED:
+            view["error"] = job["error"]
+        return view
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import copy
+import atexit
+import random
+import logging
+import threading
+import contextvars
+import logging.handlers
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# ===============================
+# CONFIGURATION
+# ===============================
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" (one object per line) or "text"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records beyond this are dropped, never waited on
+# Share of verbose payloads (full tool results and the like) that are logged at DEBUG
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+REQUEST_ID_HEADER = "x-request-id"
+# Every logger of both apps hangs below this package; records name the app they were logged for
+ROOT_LOGGER = __name__.split(".")[0]
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_app: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("app", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def current_app() -> Optional[str]:
+    return _app.get()
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None, app: Optional[str] = None):
+    """
+    Tag every record logged inside the block (and tasks/threads started from
+    it) with `request_id`, and with `app` when given (else the enclosing one).
+    """
+    token = _request_id.set(request_id or uuid.uuid4().hex[:16])
+    app_token = _app.set(app or _app.get())
+    try:
+        yield _request_id.get()
+    finally:
+        _app.reset(app_token)
+        _request_id.reset(token)
+
+
+# ===============================
+# FORMATTING
+# ===============================
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, app, request ID and the call's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.app:
+            entry["app"] = record.app
+        if record.request_id:
+            entry["request_id"] = record.request_id
+        entry.update(record.fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        rid = f" [{record.request_id}]" if record.request_id else ""
+        app = f" {record.app}" if record.app else ""
+        fields = " ".join(f"{k}={v}" for k, v in record.fields.items())
+        line = f"{stamp} {record.levelname:<7}{app} {record.name}{rid}: {record.getMessage()}"
+        line = f"{line} {fields}" if fields else line
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        return line
+
+
+# ===============================
+# NON-BLOCKING HANDLER
+# ===============================
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread through a bounded queue. A full queue
+    drops the record (and counts it) instead of blocking the caller.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolved on the calling thread: the request ID and app live in its context,
+        # and args or tracebacks may not survive until the listener gets to them
+        record = copy.copy(record)
+        record.request_id = _request_id.get()
+        record.app = _app.get()
+        record.fields = getattr(record, "fields", None) or {}
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_traceback = logging.Formatter()
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging() -> None:
+    """Attach the queue handler to the shared root logger and start the writer thread (idempotent)."""
+    global _handler, _listener
+    if _listener is not None:
+        return
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+        _handler = DroppingQueueHandler(_queue)
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(_queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush the queue and stop the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+
+
+def log_status() -> Dict[str, Any]:
+    return {
+        "level": LOG_LEVEL,
+        "format": LOG_FORMAT,
+        "queued": _queue.qsize(),
+        "queue_size": LOG_QUEUE_SIZE,
+        "dropped": _handler.dropped if _handler else 0,
+        "payload_sample_rate": LOG_PAYLOAD_SAMPLE_RATE,
+    }
+
+
+# ===============================
+# LOGGERS
+# ===============================
+class StructuredLogger(logging.LoggerAdapter):
+    """`log.info("message", key=value, ...)`: keyword arguments become fields of the record."""
+
+    def process(self, msg, kwargs):
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in ("exc_info", "stack_info", "stacklevel", "extra")}
+        kwargs["extra"] = {**(kwargs.get("extra") or {}), "fields": fields}
+        return msg, kwargs
+
+    def payload(self, msg: str, payload: Any, **fields) -> None:
+        """Log a verbose payload at DEBUG for a LOG_PAYLOAD_SAMPLE_RATE share of calls, truncated."""
+        if not self.isEnabledFor(logging.DEBUG) or random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+            return
+        text = json.dumps(payload, default=str, ensure_ascii=False)
+        if len(text) > LOG_PAYLOAD_MAX_CHARS:
+            text = text[:LOG_PAYLOAD_MAX_CHARS] + "…"
+        self.debug(msg, payload=text, **fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    setup_logging()
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"), {})
+
+
+# ===============================
+# MIDDLEWARE
+# ===============================
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving every HTTP request an ID (the client's X-Request-Id,
+    or a new one) that is attached to its log records and echoed in the
+    response, and logging one line per request with status and duration.
+    `name` tags the request's records (and cost entries) with the app serving it.
+    """
+
+    def __init__(self, app, name: Optional[str] = None):
+        self.app = app
+        self.name = name
+        self.log = get_logger("http")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER.encode(), b"").decode(errors="ignore")
+        status = None
+        started = time.perf_counter()
+        with request_context(header[:64] or None, self.name) as request_id:
+
+            async def send_with_id(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                self.log.info(
+                    "request",
+                    method=scope.get("method"), path=scope.get("path"), status=status,
+                    ms=round((time.perf_counter() - started) * 1000, 1),
+                )
@@ -0,0 +1,64 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+# ===============================
+# CONFIGURATION
+# ===============================
+STAGE_SAMPLES = 1000  # recent samples kept per stage for percentiles
+
+
+def latency_percentiles(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50_ms": round(pick(0.50), 1), "p95_ms": round(pick(0.95), 1), "max_ms": round(ordered[-1], 1)}
+
+
+# ===============================
+# STAGE METRICS
+# ===============================
+class StageMetrics:
+    """Per-stage latency samples plus free-form counters (calls, cache hits, tokens...)."""
+
+    def __init__(self, max_samples: int = STAGE_SAMPLES):
+        self.max_samples = max_samples
+        self._latency: Dict[str, Deque[float]] = {}
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, elapsed_ms: float, **counters: float) -> None:
+        with self._lock:
+            self._latency.setdefault(stage, deque(maxlen=self.max_samples)).append(elapsed_ms)
+            totals = self._counters.setdefault(stage, {"count": 0})
+            totals["count"] += 1
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+
+    def percentile(self, stage: str, q: float) -> Optional[float]:
+        """Recent `q`-quantile latency of one stage, or None before its first sample."""
+        with self._lock:
+            samples = self._latency.get(stage)
+            if not samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                stage: {**self._counters[stage], **latency_percentiles(samples)}
+                for stage, samples in self._latency.items()
+            }
+
+
+STAGES = StageMetrics()
+
+
+def record_stage(stage: str, elapsed_ms: float, **counters: float) -> None:
+    STAGES.record(stage, elapsed_ms, **counters)
+
+
+def stage_metrics() -> Dict[str, Dict[str, Any]]:
+    return STAGES.snapshot()
@@ -0,0 +1,190 @@
+import time
+import asyncio
+from typing import Callable, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .cache import VISION_CACHE_TTL
+from .cassette import CASSETTE_MODE, CASSETTE_TIMING, cassette_store, replay
+from .circuit_breaker import STALE_FLAG, STALE_KEY, STALE_RESULTS, CircuitOpenError, get_breaker
+from .metrics import record_stage
+from .model_tiers import DEADLINE_KEY, route_model, stage_model
+
+DEGRADED_INTRO_TEXT = "Model service is recovering; continuing with cached results."
+# Invocation-scoped state key (not persisted) holding when the current model call started
+MODEL_STARTED_KEY = "temp:model_started"
+# Model the current call was routed to (see model_tiers.route_model)
+MODEL_NAME_KEY = "temp:model"
+# Cassette key of the current model request (record/replay mode only)
+CASSETTE_KEY = "temp:cassette_key"
+
+
+def _text_of(llm_response: LlmResponse) -> str:
+    if not llm_response.content or not llm_response.content.parts:
+        return ""
+    return "".join(p.text for p in llm_response.content.parts if p.text)
+
+
+def _function_call_of(llm_response: LlmResponse) -> Optional[types.FunctionCall]:
+    if not llm_response.content or not llm_response.content.parts:
+        return None
+    for part in llm_response.content.parts:
+        if part.function_call:
+            return part.function_call
+    return None
+
+
+def _record_model_call(stage: str, callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+    """
+    Per-stage model latency and token counters, overall (`model_<stage>`, with
+    how many calls were routed off the stage's configured model) and per model
+    tier (`model_<stage>@<model>`). A recommender answer without a function
+    call is the summary turn, recorded as `model_recommender_summary`.
+    """
+    started = callback_context.state.get(MODEL_STARTED_KEY)
+    elapsed_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+    model = callback_context.state.get(MODEL_NAME_KEY) or stage_model(stage)
+    rerouted = 1 if model != stage_model(stage) else 0
+    if stage == "recommender" and _function_call_of(llm_response) is None:
+        stage = "recommender_summary"
+    usage = llm_response.usage_metadata
+    counters = {
+        "prompt_tokens": (usage.prompt_token_count or 0) if usage else 0,
+        "output_tokens": (usage.candidates_token_count or 0) if usage else 0,
+        "errors": 1 if llm_response.error_code else 0,
+    }
+    record_stage(f"model_{stage}", elapsed_ms, rerouted=rerouted, **counters)
+    record_stage(f"model_{stage}@{model}", elapsed_ms, **counters)
+
+
+def _cassette_request(llm_request: LlmRequest) -> dict:
+    """What identifies a model call for record/replay: model, instruction and conversation."""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    return {
+        "model": llm_request.model,
+        "system_instruction": str(instruction) if instruction else None,
+        "contents": [c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents],
+    }
+
+
+def _record_cassette(callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+    key = callback_context.state.get(CASSETTE_KEY)
+    if CASSETTE_MODE != "record" or not key:
+        return
+    started = callback_context.state.get(MODEL_STARTED_KEY)
+    elapsed_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+    cassette_store().record("gemini", key, llm_response.model_dump(mode="json", exclude_none=True), elapsed_ms)
+
+
+def _stale_response(stage: str, callback_context: CallbackContext) -> Optional[LlmResponse]:
+    """Build a model response from the last known good output of this stage, if any."""
+    if stage == "intro":
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=DEGRADED_INTRO_TEXT)]))
+
+    key = callback_context.state.get(STALE_KEY)
+    if not key:
+        return None
+
+    if stage == "vision":
+        cached = STALE_RESULTS["vision"].get(key)
+        if cached is None:
+            return None
+        labels, _ = cached
+        callback_context.state[STALE_FLAG] = True
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=labels)]))
+
+    if stage == "recommender":
+        cached = STALE_RESULTS["tool_args"].get(key)
+        if cached is None:
+            return None
+        # (value, age); JSON-encoding backends (sqlite, redis) hand the pair back as a list
+        (name, args), _ = cached
+        callback_context.state[STALE_FLAG] = True
+        call = types.FunctionCall(name=name, args=args)
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+    return None
+
+
+def _cached_vision(callback_context: CallbackContext) -> Optional[LlmResponse]:
+    """Labels stored for this location/image within VISION_CACHE_TTL, so the model call can be skipped."""
+    key = callback_context.state.get(STALE_KEY)
+    cached = STALE_RESULTS["vision"].get(key, max_age=VISION_CACHE_TTL) if key else None
+    if cached is None:
+        return None
+    labels, _ = cached
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=labels)]))
+
+
+def guard_model(stage: str) -> Tuple[Callable, Callable]:
+    """
+    Return `(before_model_callback, after_model_callback)` that put the Gemini
+    circuit breaker in front of one agent stage, and route each call to the
+    stage's model tier for the run's latency budget (see model_tiers).
+
+    The vision stage reuses labels stored within VISION_CACHE_TTL without calling
+    the model. While the breaker is open a stage answers from its last known good
+    output for the current location/label (or fails fast with CircuitOpenError).
+    Successful responses feed the breaker and refresh the stored output.
+    Failed calls surface as exceptions from the runner and are recorded by main.py.
+
+    With CASSETTE_MODE set, model calls are recorded to (or replayed from) the
+    cassette store; a replayed response goes through the same bookkeeping as a live one.
+    """
+
+    async def before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        if stage == "vision":
+            cached = _cached_vision(callback_context)
+            if cached is not None:
+                return cached
+
+        breaker = get_breaker("gemini")
+        if breaker.allow():
+            callback_context.state[MODEL_STARTED_KEY] = time.perf_counter()
+            llm_request.model = route_model(stage, callback_context.state.get(DEADLINE_KEY))
+            callback_context.state[MODEL_NAME_KEY] = llm_request.model
+            if not CASSETTE_MODE:
+                return None
+            key = cassette_store().begin(_cassette_request(llm_request))
+            callback_context.state[CASSETTE_KEY] = key
+            if CASSETTE_MODE != "replay":
+                return None
+            recorded, elapsed_ms = replay("gemini", key)
+            if CASSETTE_TIMING:
+                await asyncio.sleep(elapsed_ms / 1000)
+            llm_response = LlmResponse.model_validate(recorded)
+            # ADK skips after_model_callback for a response returned from here
+            after_model(callback_context, llm_response)
+            return llm_response
+        stale = _stale_response(stage, callback_context)
+        if stale is None:
+            raise CircuitOpenError("gemini", breaker.retry_after())
+        return stale
+
+    def after_model(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        _record_model_call(stage, callback_context, llm_response)
+        _record_cassette(callback_context, llm_response)
+        breaker = get_breaker("gemini")
+        if llm_response.error_code:
+            breaker.record_failure()
+            return None
+        breaker.record_success()
+
+        key = callback_context.state.get(STALE_KEY)
+        if not key:
+            return None
+        if stage == "vision":
+            text = _text_of(llm_response)
+            if text:
+                STALE_RESULTS["vision"].put(key, text)
+        elif stage == "recommender":
+            call = _function_call_of(llm_response)
+            if call and call.name:
+                STALE_RESULTS["tool_args"].put(key, (call.name, dict(call.args or {})))
+        return None
+
+    return before_model, after_model
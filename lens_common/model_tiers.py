@@ -0,0 +1,82 @@
+import os
+import time
+from typing import Dict, Optional
+
+from .metrics import STAGES
+
+# ===============================
+# CONFIGURATION
+# ===============================
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+LIGHT_MODEL = os.getenv("GEMINI_LIGHT_MODEL", "gemini-2.5-flash-lite")
+# Per-stage model (<STAGE>_MODEL) and the lighter tier used when the latency budget is
+# tight (<STAGE>_LIGHT_MODEL; empty never downgrades that stage). The intro only
+# formats a greeting, so it runs on the light tier by default; vision is never downgraded.
+STAGE_DEFAULTS = {
+    "intro": (LIGHT_MODEL, LIGHT_MODEL),
+    "vision": (DEFAULT_MODEL, ""),
+    "recommender": (DEFAULT_MODEL, LIGHT_MODEL),
+    "translator": (DEFAULT_MODEL, LIGHT_MODEL),
+}
+# Model calls of one pipeline run, in order
+PIPELINE_STAGES = ("intro", "vision", "recommender")
+# Expected latency of a stage/model pair before any call has been measured
+EXPECTED_MODEL_MS = float(os.getenv("EXPECTED_MODEL_MS", "1500"))
+# Budget for runs that don't bring their own (0 = no budget, never downgrade)
+LATENCY_BUDGET_MS = float(os.getenv("LATENCY_BUDGET_MS", "0"))
+
+# Session state key holding the run's deadline (epoch seconds)
+DEADLINE_KEY = "latency_deadline"
+# Per-request budget, when not given as a `latency_budget_ms` field
+LATENCY_BUDGET_HEADER = "x-latency-budget-ms"
+
+
+def stage_model(stage: str) -> str:
+    return os.getenv(f"{stage.upper()}_MODEL", STAGE_DEFAULTS.get(stage, (DEFAULT_MODEL, ""))[0])
+
+
+def light_model(stage: str) -> str:
+    return os.getenv(f"{stage.upper()}_LIGHT_MODEL", STAGE_DEFAULTS.get(stage, (DEFAULT_MODEL, ""))[1])
+
+
+def request_budget_ms(explicit: Optional[float], header: Optional[str]) -> Optional[float]:
+    """A request's latency budget: the explicit field, else the header; None if neither parses."""
+    if explicit is not None:
+        return explicit
+    try:
+        return float(header) if header else None
+    except ValueError:
+        return None
+
+
+def deadline_state(budget_ms: Optional[float] = None) -> Dict[str, float]:
+    """Initial session state for a run with `budget_ms` (else LATENCY_BUDGET_MS) to finish."""
+    budget_ms = budget_ms if budget_ms is not None else LATENCY_BUDGET_MS
+    return {DEADLINE_KEY: time.time() + budget_ms / 1000} if budget_ms and budget_ms > 0 else {}
+
+
+def expected_ms(stage: str, model: str) -> float:
+    """Median recent latency of `stage` on `model` (see `model_<stage>@<model>` in the stage metrics)."""
+    measured = STAGES.percentile(f"model_{stage}@{model}", 0.5)
+    return measured if measured is not None else EXPECTED_MODEL_MS
+
+
+# ===============================
+# ROUTING
+# ===============================
+def route_model(stage: str, deadline: Optional[float]) -> str:
+    """
+    Model for this stage of a run. Without a deadline it is the stage's
+    configured model; with one, the light tier is picked when the time left is
+    less than this and the remaining pipeline stages usually take on their
+    configured models.
+    """
+    model = stage_model(stage)
+    light = light_model(stage)
+    if not deadline or not light or light == model:
+        return model
+
+    remaining_ms = (deadline - time.time()) * 1000
+    later = PIPELINE_STAGES[PIPELINE_STAGES.index(stage):] if stage in PIPELINE_STAGES else (stage,)
+    needed_ms = sum(expected_ms(s, stage_model(s)) for s in later)
+    return light if remaining_ms < needed_ms else model
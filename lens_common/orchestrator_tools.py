@@ -0,0 +1,165 @@
+import json
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+from google.adk.runners import InMemoryRunner
+from google.adk.agents.run_config import RunConfig
+from google.genai.types import Part, Content
+
+from .logs import get_logger
+from .metrics import record_stage
+
+log = get_logger("orchestrator")
+
+
+class _PooledWorker:
+    """A warm runner plus the fresh session its next call will use."""
+
+    def __init__(self, runner: InMemoryRunner, session):
+        self.runner = runner
+        self.session = session
+        self.calls = 0
+
+
+class WorkerAgentTool:
+    """
+    Runs a worker agent on behalf of an orchestrator.
+
+    Keeps up to `pool_size` warm `InMemoryRunner`s. Each call takes a runner with
+    a ready session; afterwards the used session is deleted and a new one is
+    created in the background, so calls never see each other's history and never
+    wait for setup. `gather()` fans several queries out concurrently.
+    """
+
+    def __init__(self, app_name, agent, pool_size: int = 4, user_id: str = "subagent"):
+        self.app_name = app_name
+        self.agent = agent
+        self.pool_size = pool_size
+        self.user_id = user_id
+        self.run_config = RunConfig(response_modalities=["TEXT"])  # No audio here
+        self._idle: Optional[asyncio.Queue] = None
+        self._created = 0
+        self._create_lock: Optional[asyncio.Lock] = None
+        self._recycling: Set[asyncio.Task] = set()
+        self.stats: Dict[str, float] = {
+            "calls": 0,
+            "errors": 0,
+            "runners_created": 0,
+            "sessions_recycled": 0,
+            "wait_ms_total": 0.0,
+            "run_ms_total": 0.0,
+            "run_ms_max": 0.0,
+        }
+
+    # ===============================
+    # POOL
+    # ===============================
+    async def _new_session(self, runner: InMemoryRunner):
+        return await runner.session_service.create_session(app_name=self.app_name, user_id=self.user_id)
+
+    async def _acquire(self) -> _PooledWorker:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._create_lock = asyncio.Lock()
+
+        while True:
+            if self._idle.empty():
+                async with self._create_lock:
+                    if self._created < self.pool_size:
+                        self._created += 1
+                        try:
+                            runner = InMemoryRunner(app_name=self.app_name, agent=self.agent)
+                            worker = _PooledWorker(runner, await self._new_session(runner))
+                        except BaseException:
+                            self._created -= 1
+                            raise
+                        self.stats["runners_created"] += 1
+                        return worker
+            worker = await self._idle.get()
+            # None: a recycle failed and freed its slot, so build the replacement here
+            if worker is not None:
+                return worker
+
+    async def _recycle(self, worker: _PooledWorker) -> None:
+        """Swap the used session for a fresh one, then return the worker to the pool."""
+        try:
+            await worker.runner.session_service.delete_session(
+                app_name=self.app_name, user_id=self.user_id, session_id=worker.session.id
+            )
+            worker.session = await self._new_session(worker.runner)
+            self.stats["sessions_recycled"] += 1
+        except Exception as e:
+            # Drop the worker and wake one waiting (or the next) acquire to build a replacement
+            log.warning("Worker session recycle failed", error=str(e))
+            self._created -= 1
+            self._idle.put_nowait(None)
+            return
+        self._idle.put_nowait(worker)
+
+    # ===============================
+    # CALLS
+    # ===============================
+    async def _run(self, worker: _PooledWorker, user_query: str) -> Any:
+        final_text = None
+        async for event in worker.runner.run_async(
+            user_id=self.user_id,
+            session_id=worker.session.id,
+            new_message=Content(role="user", parts=[Part.from_text(text=user_query)]),
+            run_config=self.run_config,
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                final_text = "".join(p.text for p in event.content.parts if p.text) or final_text
+
+        if final_text is None:
+            return None
+        try:
+            return json.loads(final_text)  # This should be JSON (validated by worker agent schema)
+        except ValueError:
+            return final_text
+
+    async def __call__(self, user_query: str) -> dict:
+        """
+        Runs the worker agent on a pooled runner to fetch JSON item results.
+        Returns raw tool-compatible output to the orchestrator agent.
+        """
+        requested = time.perf_counter()
+        worker = await self._acquire()
+        started = time.perf_counter()
+        wait_ms = (started - requested) * 1000
+        self.stats["calls"] += 1
+        self.stats["wait_ms_total"] += wait_ms
+        failed = False
+        try:
+            return await self._run(worker, user_query)
+        except Exception:
+            self.stats["errors"] += 1
+            failed = True
+            raise
+        finally:
+            run_ms = (time.perf_counter() - started) * 1000
+            self.stats["run_ms_total"] += run_ms
+            self.stats["run_ms_max"] = max(self.stats["run_ms_max"], run_ms)
+            # Per worker agent in /api/metrics/stages; cold starts are calls on a runner built for them
+            record_stage(
+                f"worker_{self.agent.name}", run_ms,
+                wait_ms=round(wait_ms, 1), errors=int(failed), cold_starts=int(worker.calls == 0),
+            )
+            worker.calls += 1
+            task = asyncio.create_task(self._recycle(worker))
+            self._recycling.add(task)
+            task.add_done_callback(self._recycling.discard)
+
+    async def gather(self, user_queries: List[str], return_exceptions: bool = False) -> List[Any]:
+        """Run several queries concurrently (bounded by the pool size), results in input order."""
+        return await asyncio.gather(*(self(q) for q in user_queries), return_exceptions=return_exceptions)
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = self.stats["calls"] or 1
+        return {
+            **self.stats,
+            "pool_size": self.pool_size,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "avg_wait_ms": round(self.stats["wait_ms_total"] / calls, 2),
+            "avg_run_ms": round(self.stats["run_ms_total"] / calls, 2),
+        }
@@ -0,0 +1,135 @@
+import os
+import secrets
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from .cache import Cache
+from .geo import rank_places
+from .places import PLACES_MAX_RESULTS, format_place, get_api_key, search_nearby
+
+# ===============================
+# CONFIGURATION
+# ===============================
+CURSOR_TTL = float(os.getenv("CURSOR_TTL", "900"))
+CURSOR_MAX_ENTRIES = int(os.getenv("CURSOR_MAX_ENTRIES", "10000"))
+RING_FACTOR = float(os.getenv("RING_FACTOR", "3"))
+MAX_RADIUS_M = 50000.0  # Places API limit for locationRestriction.circle.radius
+
+CURSORS = Cache("cursors", CURSOR_TTL, CURSOR_MAX_ENTRIES)
+# One lock per cursor being paged, dropped when its last holder is done
+_cursor_locks: Dict[str, List] = {}  # token -> [lock, holders]
+_cursor_locks_lock = threading.Lock()
+
+
+class CursorNotFound(KeyError):
+    """The cursor is unknown or has expired."""
+
+
+# ===============================
+# CURSORS
+# ===============================
+def open_cursor(args: Dict, places: List[Dict], radius: Optional[float] = None) -> Optional[str]:
+    """
+    Remember the search a pipeline run resolved (location, types, radius) and the
+    places already shown, so further pages can be fetched without the agent.
+    `args` are the `find_nearby_places` call arguments; `radius` overrides theirs
+    when an adaptive search settled on a wider ring.
+    """
+    req = args.get("req", args)
+    if not req.get("included_types") or req.get("latitude") is None or req.get("longitude") is None:
+        return None
+
+    state = {
+        "latitude": float(req["latitude"]),
+        "longitude": float(req["longitude"]),
+        "included_types": list(req["included_types"]),
+        "radius": float(radius or req.get("radius") or 500.0),
+        "page_size": int(req.get("max_result_count") or 10),
+        "distance_weight": req.get("distance_weight"),
+        "seen": [p["place_id"] for p in places if p.get("place_id")],
+        "drained": int(req.get("max_result_count") or 10) >= PLACES_MAX_RESULTS,
+        "buffer": [],
+        "exhausted": False,
+    }
+    token = secrets.token_urlsafe(16)
+    CURSORS.put(token, state)
+    return token
+
+
+def next_page(token: str) -> Dict:
+    """
+    Return the next page for a cursor.
+
+    Places left over from an earlier fetch are served first. Otherwise the current
+    ring is re-queried at full page size (searchNearby has no page token), then
+    the radius grows by RING_FACTOR up to 50 km, skipping places already shown.
+    """
+    with _cursor_held(token):
+        return _next_page(token)
+
+
+@contextmanager
+def _cursor_held(token: str):
+    """
+    Hold the cursor for one read-fetch-write: two requests for the same page
+    would otherwise both read the same state and serve the same places. The
+    lock is per process; with a shared cache backend, pages of one cursor
+    should be requested from one worker at a time.
+    """
+    with _cursor_locks_lock:
+        entry = _cursor_locks.setdefault(token, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _cursor_locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                _cursor_locks.pop(token, None)
+
+
+def _next_page(token: str) -> Dict:
+    cached = CURSORS.get(token)
+    if cached is None:
+        raise CursorNotFound(token)
+    state, _ = cached
+
+    api_key = get_api_key()
+    seen = set(state["seen"])
+    buffer = state["buffer"]
+    upstream_calls = 0
+
+    while len(buffer) < state["page_size"] and not state["exhausted"]:
+        if state["drained"]:
+            if state["radius"] >= MAX_RADIUS_M:
+                state["exhausted"] = True
+                break
+            state["radius"] = min(state["radius"] * RING_FACTOR, MAX_RADIUS_M)
+
+        places = search_nearby(
+            state["latitude"], state["longitude"], state["included_types"],
+            state["radius"], PLACES_MAX_RESULTS, api_key,
+        )
+        upstream_calls += 1
+        state["drained"] = True
+
+        fresh = [p for p in places if p.get("id") not in seen]
+        seen.update(p.get("id") for p in fresh)
+        buffer.extend(rank_places(
+            fresh, state["latitude"], state["longitude"], state["radius"], state["distance_weight"]
+        ))
+
+    page, state["buffer"] = buffer[:state["page_size"]], buffer[state["page_size"]:]
+    state["seen"] = list(seen)
+    has_more = bool(state["buffer"]) or not state["exhausted"]
+
+    CURSORS.put(token, state)
+
+    return {
+        "places": [format_place(p, api_key) for p in page],
+        "radius": state["radius"],
+        "cursor": token if has_more else None,
+        "upstream_calls": upstream_calls,
+    }
@@ -0,0 +1,37 @@
+import os
+from typing import Any, Dict, Optional
+
+from .logs import get_logger
+
+log = get_logger("pipeline")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# End the run at the find_nearby_places result instead of letting the
+# recommender write a summary turn that the API never returns.
+STOP_AT_TOOL_RESULT = os.getenv("STOP_AT_TOOL_RESULT", "1") == "1"
+# One-shot sessions are deleted once the run is over unless this is set
+KEEP_SESSIONS = os.getenv("KEEP_SESSIONS", "0") == "1"
+
+RESULT_TOOL = "find_nearby_places"
+
+
+def end_at_tool_result(tool, args: Dict[str, Any], tool_context, tool_response) -> Optional[Dict]:
+    """
+    `after_tool_callback` for the recommender: marks the places result as the
+    final response, so the flow ends there and no summary model call is made.
+    """
+    if tool.name == RESULT_TOOL:
+        tool_context.actions.skip_summarization = True
+    return None
+
+
+async def release_session(session_service, app_name: str, user_id: str, session_id: str) -> None:
+    """Delete a finished one-shot session so the session store doesn't grow per request."""
+    if KEEP_SESSIONS:
+        return
+    try:
+        await session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    except Exception as e:
+        log.warning("Session cleanup failed", session_id=session_id, error=str(e))
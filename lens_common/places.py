@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import threading
+import contextvars
+import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, List, Optional, Dict, Tuple
+
+from .cache import get_cache
+from .cassette import exchange_http
+from .circuit_breaker import STALE_RESULTS, CircuitOpenError, get_breaker, location_key
+from .costs import charge
+from .geo import rank_places
+from .metrics import record_stage
+from .upstream import LIMITERS, http_session
+
+PLACES_TIMEOUT = float(os.getenv("PLACES_TIMEOUT", "10"))
+# Adaptive mode: search the requested radius and wider rings at once, keep the smallest with enough places
+ADAPTIVE_SEARCH = os.getenv("ADAPTIVE_SEARCH", "0") == "1"
+ADAPTIVE_RADII = [float(r) for r in os.getenv("ADAPTIVE_RADII", "500,1500,5000").split(",") if r.strip()]
+ADAPTIVE_MIN_RESULTS = int(os.getenv("ADAPTIVE_MIN_RESULTS", "3"))
+ADAPTIVE_WORKERS = int(os.getenv("ADAPTIVE_WORKERS", "16"))
+
+# ===============================
+# BUILD PHOTO URL
+# ===============================
+def build_photo_url(photo_name: str, api_key: str, max_width: int = 800) -> str:
+    return (
+        f"https://places.googleapis.com/v1/{photo_name}/media"
+        f"?maxWidthPx={max_width}&key={api_key}"
+    )
+
+# ===============================
+# PLACES API
+# ===============================
+PLACES_ENDPOINT = os.getenv("PLACES_ENDPOINT", "https://places.googleapis.com/v1/places:searchNearby")
+PLACES_FIELD_MASK = (
+    "places.id,places.displayName,places.formattedAddress,"
+    "places.location,places.rating,places.types,"
+    "places.photos.name,places.priceLevel,places.currentOpeningHours.openNow"
+)
+# Places API priceLevel values, cheapest first
+PRICE_LEVELS = {
+    "PRICE_LEVEL_FREE": 0,
+    "PRICE_LEVEL_INEXPENSIVE": 1,
+    "PRICE_LEVEL_MODERATE": 2,
+    "PRICE_LEVEL_EXPENSIVE": 3,
+    "PRICE_LEVEL_VERY_EXPENSIVE": 4,
+}
+# Largest page a single searchNearby call can return
+PLACES_MAX_RESULTS = 20
+
+
+class PlacesAPIError(Exception):
+    """A failed searchNearby call; `upstream_fault` is False for our own 4xx mistakes."""
+
+    def __init__(self, message: str, upstream_fault: bool = True):
+        super().__init__(message)
+        self.upstream_fault = upstream_fault
+
+
+def get_api_key() -> str:
+    api_key = os.environ.get("GOOGLE_PLACES_API_KEY")
+    if not api_key:
+        raise ValueError("Missing GOOGLE_PLACES_API_KEY in environment variables")
+    return api_key
+
+
+def places_cache_key(
+    latitude: float, longitude: float, included_types: List[str], radius: float, max_result_count: int,
+) -> str:
+    """Key of a searchNearby answer in the "places" cache."""
+    return location_key(latitude, longitude, ",".join(sorted(included_types)), radius, max_result_count)
+
+
+def search_nearby(
+    latitude: float,
+    longitude: float,
+    included_types: List[str],
+    radius: float,
+    max_result_count: int,
+    api_key: str,
+) -> List[Dict]:
+    """
+    One searchNearby call behind the Places circuit breaker and rate limiter.
+    Returns the raw `places` list; raises CircuitOpenError or PlacesAPIError.
+    Answers are cached for PLACES_CACHE_TTL per rounded location, types and radius.
+    """
+    cache_key = places_cache_key(latitude, longitude, included_types, radius, max_result_count)
+    cached = get_cache("places").get(cache_key)
+    if cached is not None:
+        return cached[0]
+
+    breaker = get_breaker("places")
+    if not breaker.allow():
+        raise CircuitOpenError("places", breaker.retry_after())
+
+    headers = {
+        "Content-Type": "application/json",
+        "X-Goog-Api-Key": api_key,
+        "X-Goog-FieldMask": PLACES_FIELD_MASK,
+    }
+    body = {
+        "includedTypes": included_types,
+        "maxResultCount": max_result_count,
+        "locationRestriction": {
+            "circle": {
+                "center": {"latitude": latitude, "longitude": longitude},
+                "radius": radius,
+            }
+        },
+    }
+
+    charge("places", places_calls=1)
+    try:
+        LIMITERS["places"].acquire()
+        res = exchange_http("places", body, lambda: http_session().post(
+            PLACES_ENDPOINT, headers=headers, data=json.dumps(body), timeout=PLACES_TIMEOUT
+        ))
+        res.raise_for_status()
+        places = res.json().get("places", [])
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else 500
+        if status < 500 and status != 429:
+            # Client errors are our fault, not the upstream's; don't trip the breaker.
+            breaker.record_success()
+            raise PlacesAPIError(f"Places API call failed: {e}", upstream_fault=False)
+        breaker.record_failure()
+        raise PlacesAPIError(f"Places API call failed: {e}")
+    except Exception as e:
+        breaker.record_failure()
+        raise PlacesAPIError(f"Places API call failed: {e}")
+
+    breaker.record_success()
+    get_cache("places").put(cache_key, places)
+    return places
+
+
+# ===============================
+# ADAPTIVE RADIUS
+# ===============================
+_ring_pool: Optional[ThreadPoolExecutor] = None
+_ring_pool_lock = threading.Lock()
+
+
+def _ring_executor() -> ThreadPoolExecutor:
+    global _ring_pool
+    if _ring_pool is None:
+        with _ring_pool_lock:
+            if _ring_pool is None:
+                _ring_pool = ThreadPoolExecutor(max_workers=ADAPTIVE_WORKERS, thread_name_prefix="places-ring")
+    return _ring_pool
+
+
+def search_adaptive(
+    latitude: float,
+    longitude: float,
+    included_types: List[str],
+    radius: float,
+    max_result_count: int,
+    api_key: str,
+) -> Tuple[List[Dict], float]:
+    """
+    Search the requested radius and every wider ADAPTIVE_RADII ring concurrently.
+    Returns the raw places and radius of the smallest ring with at least
+    ADAPTIVE_MIN_RESULTS places, as soon as that ring and all smaller ones have
+    answered; rings that haven't started their call by then are cancelled (a call
+    already in flight finishes in the background and only fills the cache).
+    Without such a ring the fullest answered ring wins; if every ring failed the
+    smallest ring's error is raised.
+    """
+    started = time.perf_counter()
+    rings = sorted({float(radius)} | {r for r in ADAPTIVE_RADII if r > radius})
+    enough = max(1, min(ADAPTIVE_MIN_RESULTS, max_result_count))
+    settled = threading.Event()
+
+    def search_ring(ring: float) -> Optional[List[Dict]]:
+        if settled.is_set():
+            return None
+        return search_nearby(latitude, longitude, included_types, ring, max_result_count, api_key)
+
+    # Each ring runs in a copy of the caller's context, so its call is charged to this request
+    futures = [_ring_executor().submit(contextvars.copy_context().run, search_ring, ring) for ring in rings]
+    chosen = None
+    try:
+        while True:
+            # Smallest ring first; a ring still running blocks every wider one
+            running = None
+            for i, future in enumerate(futures):
+                if not future.done():
+                    running = future
+                    break
+                if future.exception() is None and len(future.result()) >= enough:
+                    chosen = i
+                    break
+            if chosen is not None or running is None:
+                break
+            wait([f for f in futures if not f.done()], return_when=FIRST_COMPLETED)
+    finally:
+        settled.set()
+        # Wider rings still queued are dropped; one already on the wire can't be
+        # stopped, so it is counted as still running and only fills the cache
+        pending = [future for future in futures if not future.done()]
+        cancelled = sum(future.cancel() for future in pending)
+        still_running = len(pending) - cancelled
+
+    if chosen is None:
+        answered = [i for i, future in enumerate(futures) if future.exception() is None]
+        if not answered:
+            raise futures[0].exception()
+        chosen = max(answered, key=lambda i: (len(futures[i].result()), i))
+
+    record_stage(
+        "places_adaptive", (time.perf_counter() - started) * 1000,
+        rings=len(rings), widened=int(chosen > 0), cancelled=cancelled, still_running=still_running,
+    )
+    return futures[chosen].result(), rings[chosen]
+
+
+def format_place(p: Dict, api_key: str) -> Dict:
+    """Client-facing entry for one ranked raw place."""
+    # Extract photo
+    photo_name = p.get("photos", [{}])[0].get("name") if p.get("photos") else None
+    photo_url = build_photo_url(photo_name, api_key) if photo_name else None
+
+    return {
+        "place_id": p.get("id"),
+        "name": p.get("displayName", {}).get("text", "N/A"),
+        "address": p.get("formattedAddress", "N/A"),
+        "rating": p.get("rating", "N/A"),
+        "types": ", ".join(t.replace("_", " ").title() for t in p.get("types", [])),
+        "photo": photo_url,
+        "distance_m": p.get("distance_m"),
+        "price_level": PRICE_LEVELS.get(p.get("priceLevel")),
+        "open_now": (p.get("currentOpeningHours") or {}).get("openNow"),
+    }
+
+# ===============================
+# MAIN FUNCTION
+# ===============================
+def search_places(req: Any, insight: Optional[Dict] = None) -> Dict:
+    """
+    Body of each app's `find_nearby_places` tool: search, rank and format the
+    places for `req` (the app's NearbyPlaceRequest), answering from the last
+    known good result while Places is down. `insight` (MomentLens) is returned
+    alongside the places, even when there are none.
+    """
+    api_key = get_api_key()
+    stale_key = location_key(
+        req.latitude, req.longitude, req.image_label, ",".join(sorted(req.included_types))
+    )
+
+    search = search_adaptive if ADAPTIVE_SEARCH else search_nearby
+    try:
+        places = search(
+            req.latitude, req.longitude, req.included_types, req.radius, req.max_result_count, api_key
+        )
+    except CircuitOpenError:
+        return serve_stale(stale_key, "Places API temporarily unavailable (circuit open).")
+    except PlacesAPIError as e:
+        return serve_stale(stale_key, str(e)) if e.upstream_fault else {"error": str(e)}
+
+    radius = req.radius
+    if ADAPTIVE_SEARCH:
+        places, radius = places
+
+    # Rank by distance/rating in one pass before slicing so callers never re-sort
+    places = rank_places(places, req.latitude, req.longitude, radius, req.distance_weight)
+    results = [format_place(p, api_key) for p in places[:req.max_result_count]]
+
+    if insight is None:
+        result = {"places": results} if results else {"message": "No places found."}
+    else:
+        result = {**insight, "places": results}
+    if ADAPTIVE_SEARCH and results:
+        result["search_radius_m"] = radius
+    STALE_RESULTS["places"].put(stale_key, result)
+    return result
+
+
+# ===============================
+# DEGRADED MODE
+# ===============================
+def serve_stale(stale_key: str, error: str) -> Dict:
+    """Return the last known good result for this location/label, marked stale."""
+    cached = STALE_RESULTS["places"].get(stale_key)
+    if cached is None:
+        return {"error": error}
+    result, age = cached
+    return {**result, "stale": True, "stale_age_s": round(age, 1)}
@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .logs import get_logger
+
+log = get_logger("profiling")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # share of uploads profiled
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")  # X-Profile trigger and admin endpoints; empty disables both
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_TRACE_FRAMES = int(os.getenv("PROFILE_TRACE_FRAMES", "10"))
+
+PROFILE_HEADER = "x-profile"
+ADMIN_TOKEN_HEADER = "x-admin-token"
+TOP_N = 25
+
+# A thread whose innermost frame is in one of these is waiting, not working
+IDLE_FILES = {"selectors.py", "threading.py", "queue.py", "socket.py", "ssl.py"}
+IDLE_FUNCTIONS = {("thread.py", "_worker")}  # idle executor worker blocked in a C queue get
+
+_labels: Dict[Any, str] = {}
+
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def _is_idle(code) -> bool:
+    name = os.path.basename(code.co_filename)
+    return name in IDLE_FILES or (name, code.co_name) in IDLE_FUNCTIONS
+
+
+# ===============================
+# CPU SAMPLER
+# ===============================
+class StackSampler:
+    """
+    Statistical CPU profile: a background thread records every other thread's
+    stack each `interval_ms`. The event loop thread's waits are kept (as I/O
+    wait), other threads' waits are dropped.
+    """
+
+    def __init__(self, loop_thread: int, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.loop_thread = loop_thread
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                idle = _is_idle(frame.f_code)
+                if idle and ident != self.loop_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                if idle:
+                    stack.append("(waiting for I/O)")
+                thread = "event-loop" if ident == self.loop_thread else names.get(ident, str(ident))
+                self.stacks[";".join([thread] + stack)] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Collapsed stacks (`thread;outer;...;inner count`), the input format of flamegraph tools."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def top(self) -> Dict[str, List[Dict[str, Any]]]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        interval_ms = self.interval * 1000
+        row = lambda label, count: {"function": label, "samples": count, "approx_ms": round(count * interval_ms, 1)}
+        return {
+            "self": [row(label, count) for label, count in own.most_common(TOP_N)],
+            "total": [row(label, count) for label, count in total.most_common(TOP_N)],
+        }
+
+
+# ===============================
+# PROFILE OF ONE REQUEST
+# ===============================
+_active = threading.Lock()  # one profile at a time: tracemalloc and the sampler are process-wide
+
+
+class RequestProfile:
+    """CPU samples plus a tracemalloc allocation diff around one request."""
+
+    def __init__(self, path: str, reason: str):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.path = path
+        self.reason = reason
+        self.sampler = StackSampler(threading.get_ident())
+        self._started_tracing = False
+        self._before = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+            self._started_tracing = True
+        self._before = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self, status: Optional[int] = None) -> Dict[str, Any]:
+        self.sampler.stop()
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        # Leave out the profiler's own bookkeeping
+        ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(ignore).compare_to(self._before.filter_traces(ignore), "lineno")
+        allocations = [
+            {
+                "where": str(stat.traceback[0]) if stat.traceback else "?",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in diff[:TOP_N]
+        ]
+        report = {
+            "id": self.id,
+            "path": self.path,
+            "reason": self.reason,
+            "status": status,
+            "recorded_at": time.time(),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "samples": self.sampler.samples,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "cpu": self.sampler.top(),
+            "memory": {
+                "net_kb": round(sum(s.size_diff for s in diff) / 1024, 1),
+                "traced_peak_kb": round(peak / 1024, 1),
+                "top": allocations,
+            },
+        }
+        save_profile(report, self.sampler.folded())
+        return report
+
+
+def should_profile(header: Optional[str]) -> Optional[str]:
+    """Why this request gets profiled ("header" or "sampled"), or None."""
+    if PROFILE_TOKEN and header and header == PROFILE_TOKEN:
+        return "header"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def begin_profile(path: str, reason: str) -> Optional[RequestProfile]:
+    """Start profiling the current request, or None while another profile is running."""
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        profile = RequestProfile(path, reason)
+        profile.start()
+    except Exception:
+        _active.release()
+        raise
+    return profile
+
+
+def end_profile(profile: RequestProfile, status: Optional[int]) -> None:
+    try:
+        profile.stop(status)
+    except Exception as e:
+        log.warning("Profile failed", profile_id=profile.id, error=str(e))
+    finally:
+        _active.release()
+
+
+# ===============================
+# STORAGE
+# ===============================
+def _profile_path(profile_id: str, ext: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{os.path.basename(profile_id)}.{ext}")
+
+
+def save_profile(report: Dict[str, Any], folded: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(_profile_path(report["id"], "json"), "w") as f:
+        json.dump(report, f, indent=1)
+    with open(_profile_path(report["id"], "folded"), "w") as f:
+        f.write(folded)
+    # Keep only the newest PROFILE_KEEP profiles
+    for old in list_profiles()[PROFILE_KEEP:]:
+        for ext in ("json", "folded"):
+            try:
+                os.remove(_profile_path(old["id"], ext))
+            except OSError:
+                pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first, without their CPU and memory detail."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.append({k: report.get(k) for k in ("id", "path", "reason", "status", "recorded_at", "elapsed_ms", "samples")})
+    return sorted(profiles, key=lambda p: p["recorded_at"] or 0, reverse=True)
+
+
+def profile_file(profile_id: str, fmt: str = "json") -> Optional[str]:
+    """Path of a stored profile (`json` report or `folded` stacks), or None."""
+    if fmt not in ("json", "folded"):
+        return None
+    path = _profile_path(profile_id, fmt)
+    return path if os.path.exists(path) else None
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token == PROFILE_TOKEN
+
+
+# ===============================
+# MIDDLEWARE
+# ===============================
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request to `paths` when it carries
+    `X-Profile: <PROFILE_TOKEN>` or is picked at PROFILE_SAMPLE_RATE. The
+    response gets an `X-Profile-Id` header naming the stored profile. Samples
+    cover the whole process, so requests running at the same time show up too.
+    """
+
+    def __init__(self, app, paths=("/api/upload",)):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            await self.app(scope, receive, send)
+            return
+        path, root = scope.get("path", ""), scope.get("root_path", "")
+        path = path[len(root):] if root and path.startswith(root) else path
+        header = dict(scope.get("headers") or []).get(PROFILE_HEADER.encode(), b"").decode(errors="ignore")
+        reason = should_profile(header) if path in self.paths else None
+        profile = begin_profile(path, reason) if reason else None
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # Diffing snapshots and writing files stays off the event loop
+            await asyncio.to_thread(end_profile, profile, status)
@@ -0,0 +1,269 @@
+import os
+import re
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from .cache import Cache
+from .cassette import CassetteMiss, exchange_async
+from .circuit_breaker import get_breaker
+from .costs import charge
+from .logs import get_logger
+from .metrics import record_stage
+
+log = get_logger("translation")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+TRANSLATION_MODEL = os.getenv("TRANSLATION_MODEL", "gemini-2.5-flash")
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", str(7 * 86400)))
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "10"))
+
+DEFAULT_LANG = "en"
+TRANSLATIONS = Cache("translations", TRANSLATION_CACHE_TTL)
+
+BATCH_TRANSLATION_INSTRUCTION = """
+Translate each string in the JSON array below from English into the language with code `{lang}`.
+Rules:
+1. Return ONLY a JSON array of strings, same length and order as the input.
+2. Keep proper nouns, street addresses, numbers and Markdown formatting unchanged.
+3. Keep the tone friendly and natural; do not add notes or explanations.
+"""
+
+# ===============================
+# LANGUAGE DETECTION
+# ===============================
+# Unicode script (first word of the character name) -> language
+SCRIPT_LANGS = {
+    "HIRAGANA": "ja", "KATAKANA": "ja", "HANGUL": "ko", "CJK": "zh", "CYRILLIC": "ru",
+    "ARABIC": "ar", "DEVANAGARI": "hi", "GREEK": "el", "HEBREW": "he", "THAI": "th",
+}
+# Short high-frequency words that are distinctive per Latin-script language
+STOPWORDS = {
+    "en": {"the", "and", "is", "of", "to", "in", "with", "for", "near", "sky", "clear", "clouds", "rain"},
+    "es": {"el", "la", "los", "las", "y", "es", "de", "con", "cielo", "nubes", "lluvia", "cerca", "muy"},
+    "fr": {"le", "la", "les", "et", "est", "de", "avec", "ciel", "nuages", "pluie", "près", "très", "dégagé"},
+    "de": {"der", "die", "das", "und", "ist", "mit", "himmel", "wolken", "regen", "klar", "sehr", "nähe"},
+    "pt": {"o", "os", "as", "e", "é", "de", "com", "céu", "nuvens", "chuva", "perto", "muito", "limpo"},
+    "it": {"il", "lo", "gli", "e", "è", "di", "con", "cielo", "nuvole", "pioggia", "vicino", "molto", "sereno"},
+    "sw": {"na", "ya", "wa", "kwa", "ni", "mvua", "mawingu", "anga", "karibu", "sana", "safi"},
+    "nl": {"de", "het", "en", "is", "van", "met", "lucht", "wolken", "regen", "helder", "dichtbij", "zeer"},
+}
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+_LANG_RE = re.compile(r"^[a-z]{2,3}$")
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    Best-guess language of a short text without any model or network call:
+    non-Latin scripts are recognised from Unicode character names, Latin-script
+    languages by stopword overlap. Returns None when there is nothing to go on.
+    """
+    letters = [c for c in text if c.isalpha()]
+    if not letters:
+        return None
+
+    scripts: Dict[str, int] = {}
+    for c in letters:
+        if ord(c) < 0x250:
+            continue  # Basic Latin / Latin-1 / Latin Extended
+        script = unicodedata.name(c, "").split(" ")[0]
+        if script in SCRIPT_LANGS:
+            scripts[script] = scripts.get(script, 0) + 1
+    if sum(scripts.values()) > len(letters) * 0.3:
+        if "HIRAGANA" in scripts or "KATAKANA" in scripts:
+            return "ja"
+        return SCRIPT_LANGS[max(scripts, key=scripts.get)]
+
+    words = [w.lower() for w in _WORD_RE.findall(text)]
+    scores = {lang: sum(w in vocab for w in words) for lang, vocab in STOPWORDS.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else None
+
+
+def parse_accept_language(header: Optional[str]) -> Optional[str]:
+    """Primary subtag of the highest-weighted entry of an Accept-Language header."""
+    if not header:
+        return None
+    best, best_q = None, -1.0
+    for entry in header.split(","):
+        tag, _, params = entry.strip().partition(";")
+        lang = tag.split("-")[0].strip().lower()
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        if _LANG_RE.match(lang) and q > best_q:
+            best, best_q = lang, q
+    return best
+
+
+def resolve_language(explicit: Optional[str] = None, accept_language: Optional[str] = None, sample_text: str = "") -> str:
+    """Explicit `lang` wins, then Accept-Language, then detection on any user text; English otherwise."""
+    if explicit and _LANG_RE.match(explicit.split("-")[0].lower()):
+        return explicit.split("-")[0].lower()
+    return parse_accept_language(accept_language) or detect_language(sample_text) or DEFAULT_LANG
+
+
+# ===============================
+# TRANSLATION
+# ===============================
+_client = None
+
+
+def _genai_client():
+    global _client
+    if _client is None:
+        from google import genai
+        _client = genai.Client()
+    return _client
+
+
+def _cache_key(lang: str, text: str) -> str:
+    return f"{lang}:{hashlib.sha256(text.encode()).hexdigest()[:24]}"
+
+
+async def _translate_with_model(texts: List[str], lang: str) -> Optional[List[str]]:
+    """One batched model call for all novel strings; None if it fails or returns junk."""
+    breaker = get_breaker("gemini")
+    if not breaker.allow():
+        return None
+
+    from google.genai import types
+
+    prompt = BATCH_TRANSLATION_INSTRUCTION.format(lang=lang) + "\n" + json.dumps(texts, ensure_ascii=False)
+
+    async def generate() -> str:
+        response = await asyncio.wait_for(
+            _genai_client().aio.models.generate_content(
+                model=TRANSLATION_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(response_mime_type="application/json", temperature=0),
+            ),
+            TRANSLATION_TIMEOUT,
+        )
+        return response.text or ""
+
+    charge("translation", model_calls=1)
+    try:
+        text = await exchange_async("gemini", {"model": TRANSLATION_MODEL, "prompt": prompt}, generate)
+    except Exception as e:
+        if not isinstance(e, CassetteMiss):
+            breaker.record_failure()
+        log.warning("Translation failed", lang=lang, error=str(e))
+        return None
+    breaker.record_success()
+
+    try:
+        translated = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(translated, list) or len(translated) != len(texts):
+        return None
+    return [str(t) for t in translated]
+
+
+async def translate_many(texts: List[str], lang: str) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Translate English strings into `lang`, reusing cached translations; only
+    strings never seen before go to the model, in a single call. On any failure
+    the English text is returned. Also returns the stage stats for this call.
+    """
+    started = time.perf_counter()
+    stats = {"strings": len(texts), "cache_hits": 0, "model_strings": 0, "model_calls": 0}
+    if lang == DEFAULT_LANG or not texts:
+        return list(texts), stats
+
+    translated: Dict[str, str] = {}
+    novel: List[str] = []
+    for text in dict.fromkeys(texts):
+        cached = TRANSLATIONS.get(_cache_key(lang, text))
+        if cached is not None:
+            translated[text] = cached[0]
+            stats["cache_hits"] += 1
+        else:
+            novel.append(text)
+
+    if novel:
+        stats["model_strings"] = len(novel)
+        stats["model_calls"] = 1
+        result = await _translate_with_model(novel, lang)
+        if result is not None:
+            for source, target in zip(novel, result):
+                translated[source] = target
+                TRANSLATIONS.put(_cache_key(lang, source), target)
+
+    stats["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    record_stage("translation", stats["ms"], **{k: v for k, v in stats.items() if k != "ms"})
+    return [translated.get(t, t) for t in texts], stats
+
+
+# ===============================
+# RESPONSE LOCALISATION
+# ===============================
+# Free-text fields of an agent response; place names and addresses stay as they are
+TEXT_FIELDS = ("text", "message", "error")
+LIST_FIELDS = ("category", "keywords")
+
+
+async def localize_response(response: Dict, lang: str) -> Dict:
+    """
+    Return a copy of an `/api/upload` response with its user-facing strings
+    translated and a `translation` block with the language and stage stats.
+    English responses are returned untouched (no model call, no cache lookups).
+    """
+    if lang == DEFAULT_LANG:
+        return response
+
+    # The agent response may be shared with the result caches; never mutate it
+    response = dict(response)
+    if "agent_response" in response:
+        response["agent_response"] = copy.deepcopy(response["agent_response"])
+    agent = response.get("agent_response")
+    slots: List[Tuple[object, object, Optional[int]]] = []  # (container, key, list index or None)
+    texts: List[str] = []
+
+    def collect(container, key, index=None):
+        value = container[key] if index is None else container[key][index]
+        if isinstance(value, str) and value.strip():
+            slots.append((container, key, index))
+            texts.append(value)
+
+    if isinstance(agent, str):
+        collect(response, "agent_response")
+    elif isinstance(agent, dict):
+        for field in TEXT_FIELDS:
+            if field in agent:
+                collect(agent, field)
+        for field in LIST_FIELDS:
+            for i in range(len(agent.get(field) or [])):
+                collect(agent, field, i)
+        for place in agent.get("places") or []:
+            # "Cafe, Coffee Shop" -> one recurring string per type name
+            if isinstance(place.get("types"), str) and place["types"]:
+                place["types"] = place["types"].split(", ")
+                for i in range(len(place["types"])):
+                    collect(place, "types", i)
+    if "error" in response:
+        collect(response, "error")
+
+    translated, stats = await translate_many(texts, lang)
+    for (container, key, index), value in zip(slots, translated):
+        if index is None:
+            container[key] = value
+        else:
+            container[key][index] = value
+    if isinstance(agent, dict):
+        for place in agent.get("places") or []:
+            if isinstance(place.get("types"), list):
+                place["types"] = ", ".join(place["types"])
+
+    response["translation"] = {"lang": lang, **stats}
+    return response
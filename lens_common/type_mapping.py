@@ -1,3 +1,5 @@
+import re
+from typing import List, Optional
 
 TYPE_MAPPING = {
     "headphones": ["electronics_store", "shopping_mall"],
@@ -68,4 +70,23 @@ TYPE_MAPPING = {
     "airport": ["airport", "international_airport"],
     "bus station": ["bus_station", "bus_stop"],
     "train station": ["train_station", "light_rail_station", "subway_station"],
-}
\ No newline at end of file
+}
+
+
+def types_for_label(label: str) -> Optional[List[str]]:
+    """
+    Place types for an object label from TYPE_MAPPING, without a model call.
+    Labels are tried in order (comma-separated, as the vision stage writes them);
+    the first whose text is a known object, or contains one as a word (plural
+    allowed, the longest wins), decides. None if no label maps.
+    """
+    for part in label.split(","):
+        text = " ".join(re.findall(r"[a-z0-9]+", part.lower()))
+        if not text:
+            continue
+        if text in TYPE_MAPPING:
+            return list(TYPE_MAPPING[text])
+        known = [key for key in TYPE_MAPPING if re.search(rf"\b{re.escape(key)}(?:s|es)?\b", text)]
+        if known:
+            return list(TYPE_MAPPING[max(known, key=len)])
+    return None
@@ -0,0 +1,80 @@
+import os
+import time
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ===============================
+# CONFIGURATION
+# ===============================
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+PLACES_QPS = float(os.getenv("PLACES_QPS", "0"))  # 0 disables the limiter
+
+
+# ===============================
+# RATE LIMITER
+# ===============================
+class RateLimiter:
+    """Blocking token bucket; `rate` tokens per second with a burst of `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping if needed. Returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take one token if one is available right now; never waits."""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+        return True
+
+
+# ===============================
+# SHARED RESOURCES
+# ===============================
+_http: Optional[requests.Session] = None
+_http_lock = threading.Lock()
+
+LIMITERS: Dict[str, RateLimiter] = {
+    "places": RateLimiter(PLACES_QPS),
+}
+
+
+def http_session() -> requests.Session:
+    """Process-wide pooled HTTP session for Places and Maps calls."""
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http = session
+    return _http
+
@@ -1,59 +1,151 @@
 # main.py
 
 import os
+import sys
 import uuid
+import json
+import time
 import asyncio
-from typing import Dict, Optional
-from fastapi import FastAPI
+from typing import Dict, List, Optional, Tuple
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-import googlemaps
-import google.generativeai as genai
 from contextlib import asynccontextmanager
-from momentLens_agent.agent import root_agent
-from google.adk.sessions import DatabaseSessionService
-from google.adk.runners import Runner
-from google.genai import types
+
+# The shared tools live in lens_common/: one level up in the repository, next
+# to main.py in the Docker images
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.isdir(os.path.join(ROOT, "lens_common")) and ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Heavy SDKs (google.adk, google.genai, googlemaps, geopy) and the agent tree are
+# imported by `init_clients()` in the background so the server binds its port first.
+from lens_common.circuit_breaker import (
+    STALE_FLAG, STALE_KEY, CircuitOpenError, breaker_status, get_breaker, location_key,
+)
+from lens_common.admission import (
+    CLIENT_ID_HEADER, AdmissionMiddleware, admission_controller, admission_status, client_key,
+)
+from lens_common.cache import cache_status, get_cache
+from lens_common.cassette import CassetteMiss, cassette_status, exchange
+from lens_common.costs import charge, charge_event, cost_summary, track_costs
+from lens_common.executor import run_blocking, shutdown_executors, start_executors
+from lens_common.jobs import JobQueue, QueueFull
+from lens_common.logs import RequestIdMiddleware, get_logger, log_status, stop_logging
+from lens_common.metrics import record_stage
+from lens_common.profiling import ADMIN_TOKEN_HEADER, ProfilingMiddleware, is_admin
+from lens_common.pipeline import STOP_AT_TOOL_RESULT, release_session
+from momentLens_agent.tools.prefetch import PREFETCH, Prefetcher
+from lens_common.upstream import http_session
 
 # ===========================================
 # 1️⃣ LOAD CONFIGURATION
 # ===========================================
 load_dotenv()
 
-DB_URL = "sqlite:///./sessions.db"
+DB_URL = os.getenv("SESSION_DB_URL", "sqlite:///./sessions.db")
 APP_NAME = "MomentLens"
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+PREWARM_URLS = ["https://places.googleapis.com/", "https://maps.googleapis.com/"]
+
+log = get_logger("main")
 
 gmaps = None
-if GOOGLE_MAPS_API_KEY:
+geolocator = None
+
+def init_clients() -> Dict[str, float]:
+    """
+    Import the agent tree and SDKs and configure the upstream clients.
+    Blocking; runs in a worker thread during warm-up. Returns per-step seconds.
+    """
+    global gmaps, geolocator
+    timings = {}
+
+    started = time.perf_counter()
+    from google.adk.runners import Runner  # noqa: F401
+    from momentLens_agent.agent import root_agent  # noqa: F401
+    timings["agents_s"] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    if GOOGLE_MAPS_API_KEY and gmaps is None:
+        try:
+            import googlemaps
+            gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY, requests_session=http_session())
+            log.info("Google Maps client initialized")
+        except Exception as e:
+            log.error("Google Maps client initialization failed", error=str(e))
+
+    try:
+        from geopy.geocoders import Nominatim
+        geolocator = Nominatim(user_agent="nearlens", timeout=10)
+    except Exception as e:
+        log.warning("Nominatim initialization failed", error=str(e))
+    timings["maps_s"] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
     try:
-        gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
-        print("✅ Google Maps client initialized.")
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        log.info("Gemini API configured")
     except Exception as e:
-        print(f"❌ Google Maps client initialization failed: {str(e)}")
+        log.error("Failed to configure Gemini API", error=str(e))
+    timings["gemini_s"] = round(time.perf_counter() - started, 3)
+
+    return timings
+
+def prewarm_connections() -> None:
+    """Open pooled TLS connections to the upstreams so the first request skips the handshakes."""
+    for url in PREWARM_URLS:
+        try:
+            http_session().head(url, timeout=5)
+        except Exception as e:
+            log.warning("Pre-warm failed", url=url, error=str(e))
+
+async def warm_up(app: FastAPI, session_service=None) -> None:
+    started = time.perf_counter()
+    timings = await asyncio.to_thread(init_clients)
+
+    if session_service is None:
+        try:
+            from google.adk.sessions import DatabaseSessionService
+            session_service = await asyncio.to_thread(DatabaseSessionService, db_url=DB_URL)
+            log.info("Database session service initialized")
+        except Exception as e:
+            log.error("Database session service initialization failed", error=str(e))
+    app.state.session_service = session_service
+
+    await asyncio.to_thread(prewarm_connections)
+    timings["total_s"] = round(time.perf_counter() - started, 3)
+    app.state.warmup_timings = timings
+    log.info("Warm-up complete", **timings)
+
+def start_warmup(app: FastAPI, session_service=None) -> None:
+    """Schedule warm-up on the running loop; requests await it via `ensure_ready`."""
+    app.state.warmup = asyncio.create_task(warm_up(app, session_service))
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("✅ Gemini API configured successfully.")
-except Exception as e:
-    print(f"❌ Failed to configure Gemini API: {str(e)}")
+async def ensure_ready(app: FastAPI) -> None:
+    await asyncio.shield(app.state.warmup)
 
 # ===========================================
 # 2️⃣ FASTAPI APP SETUP
 # ===========================================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Application starting up...")
-    try:
-        app.state.session_service = DatabaseSessionService(db_url=DB_URL)
-        print("✅ Database session service initialized")
-    except Exception as e:
-        print(f"❌ Database session service initialization failed: {str(e)}")
+    log.info("Application starting up")
+    start_executors()
+    start_warmup(app)
+    # Jobs recovered from JOB_DB_PATH run now, not when the next one is submitted
+    job_queue.start()
     yield
-    print("Application shutting down...")
+    log.info("Application shutting down")
+    await job_queue.stop()
+    await prefetcher.stop()
+    await shutdown_executors()
+    stop_logging()
 
 app = FastAPI(
     title="NearLens API",
@@ -62,6 +154,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Uploads and route searches are admitted (or turned away with 429/503) before their body is read
+app.add_middleware(AdmissionMiddleware, paths=("/api/upload", "/api/route"), batch_paths=("/api/jobs",))
+# Opt-in CPU/allocation profiles of single uploads (X-Profile header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -69,6 +165,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost: every request gets an ID for its log records and one access log line
+app.add_middleware(RequestIdMiddleware, name=APP_NAME)
+
+# Routes let these propagate: the same 503 and Retry-After wherever they're raised
+async def retry_later(request: Request, exc: Exception) -> JSONResponse:
+    """An open upstream breaker or a full job queue, from any route: 503 with when to retry."""
+    log.warning("Request rejected", path=request.url.path, error=str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"error": str(exc), "retry_after": round(exc.retry_after, 1)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    )
+
+app.add_exception_handler(CircuitOpenError, retry_later)
+app.add_exception_handler(QueueFull, retry_later)
 
 # ===========================================
 # 3️⃣ DATA MODELS
@@ -78,37 +189,78 @@ class UploadPayload(BaseModel):
     longitude: float
     time: str
     weather: dict
+    lang: Optional[str] = None  # response language; defaults to Accept-Language / detected from weather text
+    latency_budget_ms: Optional[float] = None  # tight budgets route stages to lighter models; else X-Latency-Budget-Ms
+
+class FollowUpPayload(BaseModel):
+    session: str  # the `session` of an earlier /api/upload response
+    refine: List[str] = []  # "cheaper", "closer", "open_now", "top_rated"
+    message: Optional[str] = None  # free text, searched for the same refinements
+    lang: Optional[str] = None
+
+class RoutePayload(BaseModel):
+    points: Optional[List[List[float]]] = None  # [[latitude, longitude], ...] in travel order
+    polyline: Optional[str] = None  # or the route as an encoded polyline (Directions/Routes format)
+    time: str
+    weather: dict
+    included_types: Optional[List[str]] = None  # Places types; else the agents pick them once, mid-route
+    radius_m: Optional[float] = Field(None, gt=0, le=50_000)  # radius of each search circle (ROUTE_RADIUS_M)
+    corridor_m: Optional[float] = Field(None, gt=0)  # how far off the route a place may be (ROUTE_CORRIDOR_M)
+    max_results: Optional[int] = Field(None, gt=0)
+    lang: Optional[str] = None
+    latency_budget_ms: Optional[float] = None
 
 # ===========================================
 # 4️⃣ HELPER FUNCTIONS
 # ===========================================
 def get_location_name(lat: float, lon: float) -> str:
     """Get human-readable location name using Nominatim first, then Google Maps as fallback."""
+    # Resolved names are cached for GEOCODE_CACHE_TTL per ~110 m cell;
+    # the lookup is one cassette exchange in record/replay mode
+    cache_key = location_key(lat, lon)
+    cached = get_cache("geocode").get(cache_key)
+    if cached is not None:
+        return cached[0]
+
+    address = exchange("geocode", {"latitude": lat, "longitude": lon}, lambda: reverse_geocode(lat, lon))
+    if address:
+        get_cache("geocode").put(cache_key, address)
+        return address
+    return "Unknown location"
+
+
+def reverse_geocode(lat: float, lon: float) -> Optional[str]:
+    """Uncached lookup behind `get_location_name`; None if neither service knows the place."""
     try:
-        from geopy.geocoders import Nominatim
-        geolocator = Nominatim(user_agent="nearlens", timeout=10)
+        charge("geocode", geocode_calls=1)
         location = geolocator.reverse((lat, lon))
         if location and location.address:
             return location.address
     except Exception as e:
-        print(f"⚠️ Nominatim failed: {str(e)}")
+        log.warning("Nominatim reverse geocode failed", error=str(e))
 
     if gmaps:
         try:
+            charge("geocode", geocode_calls=1)
             reverse_geocode = gmaps.reverse_geocode((lat, lon))
             if reverse_geocode and len(reverse_geocode) > 0:
                 return reverse_geocode[0].get('formatted_address', 'Unknown location')
         except Exception as e:
-            print(f"⚠️ Google Maps reverse geocode failed: {str(e)}")
+            log.warning("Google Maps reverse geocode failed", error=str(e))
 
-    return "Unknown location"
+    return None
 
 async def get_agent_final_output(
-    session_service, user_id: str, session_id: str, input_message: types.Content
+    session_service, user_id: str, session_id: str, input_message: "types.Content",
+    call_args: Optional[Dict] = None,
 ) -> Optional[dict]:
     """
     Execute agent pipeline and return final response dictionary.
+    If `call_args` is given it receives the `find_nearby_places` call arguments.
     """
+    from google.adk.runners import Runner
+    from momentLens_agent.agent import root_agent
+
     runner = Runner(
         app_name=APP_NAME,
         agent=root_agent,
@@ -122,35 +274,76 @@ async def get_agent_final_output(
     )
 
     final_result = None
-    async for event in events:
-        if event.is_final_response() and event.content and event.content.parts:
-            # You can extract places and text if returned by agent
-            text_parts = [p.text for p in event.content.parts if p.text]
-            final_text = "\n".join(text_parts) if text_parts else None
-            final_result = {"text": final_text, "places": []}  # default empty places
-
-        # Process function responses (like find_nearby_places)
-        responses = event.get_function_responses()
-        if responses:
-            for response in responses:
-                if response.name == "find_nearby_places":
-                    result_dict = response.response
-                    final_result = result_dict
-                    print(final_result)
-                    return final_result
+    tool_done = False
+    served_stale = False
+    started = time.perf_counter()
+    try:
+        async for event in events:
+            charge_event(event)
+            if event.actions and event.actions.state_delta.get(STALE_FLAG):
+                served_stale = True
 
-# ===========================================
-# 5️⃣ ROUTES
-# ===========================================
-@app.get("/")
-async def home():
-    return {"message": "Welcome to NearLens API 👁️", "status": "running"}
+            if event.is_final_response() and event.content and event.content.parts:
+                # You can extract places and text if returned by agent
+                text_parts = [p.text for p in event.content.parts if p.text]
+                final_text = "\n".join(text_parts) if text_parts else None
+                final_result = {"text": final_text, "places": []}  # default empty places
 
-@app.post("/api/upload")
-async def upload_data(payload: UploadPayload):
+            # Process function calls (arguments)
+            calls = event.get_function_calls()
+            if calls and call_args is not None:
+                for call in calls:
+                    if call.name == "find_nearby_places":
+                        call_args.update(call.args or {})
+
+            # Process function responses (like find_nearby_places)
+            responses = event.get_function_responses()
+            if responses:
+                for response in responses:
+                    if response.name == "find_nearby_places":
+                        result_dict = response.response
+                        final_result = {**result_dict, "stale": True} if served_stale else result_dict
+                        log.payload("Places tool result", final_result)
+                        tool_done = True
+            # With STOP_AT_TOOL_RESULT the tool event is the final one and the run
+            # ends by itself; otherwise stop reading before the summary turn.
+            if tool_done and not STOP_AT_TOOL_RESULT:
+                break
+        if tool_done:
+            return final_result
+    except (CircuitOpenError, CassetteMiss):
+        # A replay miss is a gap in the recording, not a model failure
+        raise
+    except Exception:
+        # Tool errors come back as dicts, so anything escaping the runner is a model failure
+        get_breaker("gemini").record_failure()
+        raise
+    finally:
+        # Close the run here, in this task, rather than whenever the abandoned
+        # generator gets collected; any model work still pending is cancelled.
+        await events.aclose()
+        record_stage("agent_run", (time.perf_counter() - started) * 1000)
+
+def open_results_cursor(search_args: Dict, final_output) -> Optional[str]:
+    """Cursor for `/api/places/next`, or None if the run produced no live places."""
+    if not search_args or not isinstance(final_output, dict) or not final_output.get("places"):
+        return None
+    if final_output.get("stale"):
+        return None
+    from lens_common.pagination import open_cursor
+    return open_cursor(search_args, final_output["places"], final_output.get("search_radius_m"))
+
+async def run_moment_pipeline(payload: UploadPayload, call_args: Optional[Dict] = None) -> Dict:
     """
-    Handle location + weather payload and run AI agent analysis.
+    Run the agent pipeline for one location payload and build the API response.
+    If `call_args` is given it receives the `find_nearby_places` call arguments.
+    Raises CircuitOpenError while an upstream breaker is open.
     """
+    await ensure_ready(app)
+    from google.genai import types
+    from lens_common.followup import open_followup
+    from lens_common.model_tiers import deadline_state
+
     session_service = app.state.session_service
     user_id = f"user-{uuid.uuid4()}"
     session_id = f"session-{uuid.uuid4()}"
@@ -159,40 +352,275 @@ async def upload_data(payload: UploadPayload):
         await session_service.create_session(
             app_name=APP_NAME,
             user_id=user_id,
-            session_id=session_id
+            session_id=session_id,
+            # Last-known-good results are keyed by location
+            state={
+                STALE_KEY: location_key(payload.latitude, payload.longitude, "moment"),
+                **deadline_state(payload.latency_budget_ms),
+            },
         )
-        print(f"✅ Created one-shot session: {session_id}")
+        log.debug("Created one-shot session", session_id=session_id)
     except Exception as e:
-        print(f"❌ Session creation failed: {str(e)}")
+        log.error("Session creation failed", error=str(e))
         return {"error": f"Failed to initialize session: {str(e)}"}
 
+    parts = [
+        types.Part.from_text(text="Analyze user's coordinates for nearby insights."),
+        types.Part.from_text(text=f"User's coordinates: lat={payload.latitude}, lon={payload.longitude}"),
+    ]
+
+    input_message = types.Content(
+        role="user",
+        parts=parts
+    )
+
+    search_args: Dict = {} if call_args is None else call_args
     try:
-        parts = [
-            types.Part.from_text(text="Analyze user's coordinates for nearby insights."),
-            types.Part.from_text(text=f"User's coordinates: lat={payload.latitude}, lon={payload.longitude}"),
-        ]
-
-        input_message = types.Content(
-            role="user",
-            parts=parts
+        final_output = await get_agent_final_output(
+            session_service, user_id, session_id, input_message, call_args=search_args
         )
+    finally:
+        await release_session(session_service, APP_NAME, user_id, session_id)
 
-        final_output = await get_agent_final_output(session_service, user_id, session_id, input_message)
+    return {
+        "status": "success",
+        "latitude_input": payload.latitude,
+        "longitude_input": payload.longitude,
+        "agent_response": final_output if final_output else {"text": "No response generated.", "places": []},
+        "cursor": open_results_cursor(search_args, final_output),
+        "session": open_followup(search_args, final_output),
+    }
 
-        return {
-            "status": "success",
-            "latitude_input": payload.latitude,
-            "longitude_input": payload.longitude,
-            "agent_response": final_output if final_output else {"text": "No response generated.", "places": []},
-        }
+async def run_moment_job(payload: Dict) -> Dict:
+    """Job queue handler: the same pipeline as `/api/upload`."""
+    # Batch work waits for its share of the in-flight budget
+    async with track_costs("job", detach=True), admission_controller().batch(None):
+        return await run_moment_pipeline(UploadPayload(**payload))
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return {"error": f"Processing failed: {str(e)}"}
+job_queue = JobQueue(run_moment_job, app=APP_NAME)
+
+async def run_prefetch(latitude: float, longitude: float, context: Dict) -> Tuple[Dict, Dict]:
+    """
+    Prefetch handler: the pipeline for a point ahead of a moving client, as
+    batch work. Returns the response and its search arguments.
+    """
+    search_args: Dict = {}
+    async with track_costs("prefetch", detach=True), admission_controller().batch(None):
+        payload = UploadPayload(**{**context, "latitude": latitude, "longitude": longitude})
+        result = await run_moment_pipeline(payload, call_args=search_args)
+    return result, search_args
+
+prefetcher = Prefetcher(run_prefetch)
+
+async def resolve_route_types(route, payload: RoutePayload) -> Tuple[Optional[List[str]], Dict]:
+    """
+    Place types for a route search: one pipeline run at the route's midpoint
+    picks them the way an upload would. Returns them (None if the agents
+    didn't search) and that run's moment insight (text, category, keywords).
+    """
+    latitude, longitude = route.point_at(route.length_m / 2)
+    search_args: Dict = {}
+    result = await run_moment_pipeline(UploadPayload(
+        latitude=latitude, longitude=longitude, time=payload.time, weather=payload.weather,
+        latency_budget_ms=payload.latency_budget_ms,
+    ), call_args=search_args)
+    req = search_args.get("req", search_args)
+    agent = result.get("agent_response")
+    insight = {k: agent[k] for k in ("text", "category", "keywords") if k in agent} if isinstance(agent, dict) else {}
+    return req.get("included_types") or None, insight
+
+# ===========================================
+# 5️⃣ ROUTES
+# ===========================================
+@app.get("/")
+async def home():
+    return {"message": "Welcome to NearLens API 👁️", "status": "running"}
+
+@app.post("/api/upload")
+async def upload_data(payload: UploadPayload, request: Request):
+    """
+    Handle location + weather payload and run AI agent analysis.
+    The response is translated when the user's language isn't English.
+    With PREFETCH on, a position inside a cell prefetched along the client's
+    (IP address, X-Client-Id within it) trajectory, at the same hour and
+    weather, is answered without running the agents.
+    """
+    from lens_common.model_tiers import LATENCY_BUDGET_HEADER, request_budget_ms
+    from lens_common.translation import localize_response, resolve_language
+
+    weather_text = " ".join(str(v) for v in payload.weather.values() if isinstance(v, str))
+    user_lang = resolve_language(payload.lang, request.headers.get("accept-language"), weather_text)
+    payload.latency_budget_ms = request_budget_ms(payload.latency_budget_ms, request.headers.get(LATENCY_BUDGET_HEADER))
+    async with track_costs("upload"):
+        if PREFETCH:
+            from lens_common.followup import open_followup
+
+            context = payload.model_dump(include={"time", "weather"})
+            prefetched = prefetcher.lookup(payload.latitude, payload.longitude, context)
+            client = client_key(request.client.host if request.client else None, request.headers.get(CLIENT_ID_HEADER))
+            prefetcher.observe(client, payload.latitude, payload.longitude, context)
+            if prefetched is not None:
+                # A prefetch is shared by every client in its cell: each one gets its own cursor and session
+                result, search_args = prefetched
+                result.update(
+                    latitude_input=payload.latitude, longitude_input=payload.longitude,
+                    cursor=open_results_cursor(search_args, result["agent_response"]),
+                    session=open_followup(search_args, result["agent_response"]),
+                )
+                return await localize_response(result, user_lang)
+        try:
+            result = await run_moment_pipeline(payload)
+            return await localize_response(result, user_lang)
+
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            log.exception("Moment processing failed", error=str(e))
+            return await localize_response({"error": f"Processing failed: {str(e)}"}, user_lang)
+
+@app.post("/api/jobs", status_code=202)
+async def submit_moment_job(payload: UploadPayload):
+    """
+    Queue a payload for background analysis and return its job ID right away.
+    Poll `/api/jobs/{job_id}` or subscribe to `/api/jobs/{job_id}/events` for the result.
+    """
+    return await job_queue.submit(payload.model_dump())
+
+@app.get("/api/jobs/metrics")
+async def job_metrics():
+    """Queue depth, wait time and service time of the upload job queue."""
+    return job_queue.metrics()
+
+@app.get("/api/jobs/{job_id}")
+async def get_upload_job(job_id: str, wait: float = 0):
+    """Job status and, once done, its result. `wait` long-polls up to that many seconds (max 30)."""
+    job = await job_queue.wait(job_id, min(wait, 30.0)) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job."})
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_upload_job(job_id: str):
+    """Server-sent events: the job's status now, and again when it finishes."""
+    if job_queue.get(job_id) is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job."})
+
+    async def events():
+        job = job_queue.get(job_id)
+        yield f"data: {json.dumps(job)}\n\n"
+        while job and job["status"] not in ("done", "failed"):
+            job = await job_queue.wait(job_id, 15.0)
+            if job and job["status"] in ("done", "failed"):
+                yield f"data: {json.dumps(job)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/api/places/next")
+async def next_places(cursor: str):
+    """
+    Fetch the next page of places for a cursor returned by `/api/upload`.
+    Reuses the resolved place types and location; never calls the agent.
+    """
+    from lens_common.pagination import CursorNotFound, next_page
+    from lens_common.places import PlacesAPIError
+
+    try:
+        async with track_costs("next_page"):
+            return await run_blocking(next_page, cursor)
+    except CursorNotFound:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired cursor."})
+    except PlacesAPIError as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+
+@app.post("/api/followup")
+async def follow_up_session(payload: FollowUpPayload, request: Request):
+    """
+    Refine the places of an earlier `/api/upload` by its `session`: cheaper,
+    closer, open now or top rated, given in `refine` or found in `message`.
+    Reuses the label, types, location and Places answer of that run: never
+    calls the agent, and makes at most one Places call.
+    """
+    from lens_common.followup import FollowUpNotFound, follow_up, parse_refinements
+    from lens_common.places import PlacesAPIError
+    from lens_common.translation import localize_response, resolve_language
+
+    refinements = list(payload.refine) + (parse_refinements(payload.message) if payload.message else [])
+    if not refinements:
+        return JSONResponse(status_code=400, content={"error": "No refinement given or recognised in the message."})
+    user_lang = resolve_language(payload.lang, request.headers.get("accept-language"), payload.message or "")
+    try:
+        async with track_costs("followup"):
+            result = await run_blocking(follow_up, payload.session, refinements)
+            return await localize_response(result, user_lang)
+    except FollowUpNotFound:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired session."})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except PlacesAPIError as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+
+@app.post("/api/route")
+async def route_search(payload: RoutePayload, request: Request):
+    """
+    Places along a route (`points` or an encoded `polyline`) instead of at one
+    point: the fewest search circles covering `corridor_m` either side of the
+    route are searched concurrently, and the places they find are returned
+    once each, in the order the route passes them (`route_m`), with how far
+    off the route they are (`offset_m`). Without `included_types` the agents
+    run once, at the route's midpoint, to pick the types.
+    """
+    from lens_common.model_tiers import LATENCY_BUDGET_HEADER, request_budget_ms
+    from lens_common.places import PlacesAPIError
+    from momentLens_agent.tools.route import Route, RouteError, search_route
+    from lens_common.translation import localize_response, resolve_language
+
+    try:
+        route = Route.parse(payload.points, payload.polyline)
+    except RouteError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+    weather_text = " ".join(str(v) for v in payload.weather.values() if isinstance(v, str))
+    user_lang = resolve_language(payload.lang, request.headers.get("accept-language"), weather_text)
+    payload.latency_budget_ms = request_budget_ms(payload.latency_budget_ms, request.headers.get(LATENCY_BUDGET_HEADER))
+    try:
+        async with track_costs("route"):
+            included_types, insight, type_source = payload.included_types, {}, "client"
+            if not included_types:
+                included_types, insight = await resolve_route_types(route, payload)
+                type_source = "model"
+            if not included_types:
+                return JSONResponse(
+                    status_code=502,
+                    content={"error": "Could not pick place types for this route; pass included_types."},
+                )
+            found = await search_route(
+                route, included_types, payload.radius_m, payload.corridor_m, payload.max_results
+            )
+            places = found.pop("places")
+            result = {
+                "status": "success",
+                "included_types": included_types,
+                "type_source": type_source,
+                **found,
+                "agent_response": {**insight, "places": places}
+                if places else {**insight, "places": [], "message": "No places found along this route."},
+            }
+            return await localize_response(result, user_lang)
+    except RouteError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+    except PlacesAPIError as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: waits for imports, clients and pooled connections to be warm."""
+    await ensure_ready(app)
+    return {"status": "ready", "warmup": app.state.warmup_timings}
 
 @app.get("/api/debug")
 async def debug():
+    await ensure_ready(app)
     lat, lon = 0.3476, 32.5827
     location = get_location_name(lat, lon)
     return {
@@ -202,6 +630,72 @@ async def debug():
         "geocoding": "OK" if location != "Unknown location" else "Failed",
     }
 
+@app.get("/api/breakers")
+async def breakers():
+    """Current state of the per-upstream circuit breakers."""
+    return breaker_status()
+
+@app.get("/api/metrics/stages")
+async def stage_stats():
+    """Latency percentiles and counters of the measured pipeline stages."""
+    from lens_common.metrics import stage_metrics
+    return stage_metrics()
+
+@app.get("/api/cache")
+async def cache_stats():
+    """Backend, hit/miss counters and TTLs of the shared caches."""
+    return await asyncio.to_thread(cache_status)
+
+@app.get("/api/admin/profiles")
+async def list_request_profiles(request: Request):
+    """Stored request profiles, newest first. Requires X-Admin-Token = PROFILE_TOKEN."""
+    from lens_common.profiling import list_profiles
+
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return JSONResponse(status_code=403, content={"error": "Admin token required"})
+    return {"profiles": await asyncio.to_thread(list_profiles)}
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_request_profile(profile_id: str, request: Request, format: str = "json"):
+    """
+    One stored profile: `format=json` for the report (top functions, allocation
+    diff) or `format=folded` for collapsed stacks to feed a flame graph tool.
+    """
+    from lens_common.profiling import profile_file
+
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return JSONResponse(status_code=403, content={"error": "Admin token required"})
+    path = profile_file(profile_id, format)
+    if path is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown profile or format"})
+    media_type = "application/json" if format == "json" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+@app.get("/api/admission")
+async def admission_stats():
+    """In-flight bytes against the budget and admitted/rejected counters."""
+    return admission_status()
+
+@app.get("/api/prefetch")
+async def prefetch_stats():
+    """Trajectory prefetch: hit ratio, runs started/skipped for budget, and tracked clients."""
+    return prefetcher.snapshot()
+
+@app.get("/api/costs")
+async def cost_stats(window_s: float = 86400):
+    """Gemini tokens, tool calls and Places/geocoding calls per request and per stage over the window."""
+    return await cost_summary(window_s, APP_NAME)
+
+@app.get("/api/logs")
+async def log_stats():
+    """Log level and format, queued records and records dropped because the queue was full."""
+    return log_status()
+
+@app.get("/api/cassette")
+async def cassette_stats():
+    """Record/replay mode, store path and recorded exchanges per upstream."""
+    return await asyncio.to_thread(cassette_status)
+
 # ===========================================
 # 6️⃣ RUN SERVER
 # ===========================================
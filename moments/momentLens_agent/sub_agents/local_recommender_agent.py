@@ -1,12 +1,23 @@
 import json
 from google.adk.agents import Agent
 from momentLens_agent.tools.places_tool import find_nearby_places
-from momentLens_agent.tools.instructions import LOCAL_RECOMMENDER_AGENT_INSTRUCTION
+from momentLens_agent.tools.instructions import (
+    LOCAL_RECOMMENDER_AGENT_INSTRUCTION, LOCAL_RECOMMENDER_TOOL_ONLY_INSTRUCTION,
+)
+from lens_common.model_guard import guard_model
+from lens_common.pipeline import STOP_AT_TOOL_RESULT, end_at_tool_result
+from lens_common.model_tiers import stage_model
+
+recommender_before_model, recommender_after_model = guard_model("recommender")
 
 local_recommender_agent = Agent(
     name="momentlens_local_recommender",
-    model="gemini-2.5-flash",
+    model=stage_model("recommender"),
     description="Finds nearby services and places based on the received inferred moment insights",
-    instruction=LOCAL_RECOMMENDER_AGENT_INSTRUCTION,
+    # Without the summary step when the run ends at the tool result
+    instruction=LOCAL_RECOMMENDER_TOOL_ONLY_INSTRUCTION if STOP_AT_TOOL_RESULT else LOCAL_RECOMMENDER_AGENT_INSTRUCTION,
     tools=[find_nearby_places],
+    before_model_callback=recommender_before_model,
+    after_model_callback=recommender_after_model,
+    after_tool_callback=end_at_tool_result if STOP_AT_TOOL_RESULT else None,
 )
@@ -1,13 +1,19 @@
 from google.adk.agents import Agent
 from momentLens_agent.tools.instructions import MOMENT_ANALYZER_AGENT_INSTRUCTION
 from google.adk.tools import google_search
+from lens_common.model_guard import guard_model
+from lens_common.model_tiers import stage_model
 
 
+vision_before_model, vision_after_model = guard_model("vision")
+
 vision_analyzer_agent = Agent(
     name="momentlens_vision_analyzer",
-    model="gemini-2.5-flash",
+    model=stage_model("vision"),
     description="Analyze the current moment based on location, time, weather, and local context, and generate actionable insights.",
     instruction=MOMENT_ANALYZER_AGENT_INSTRUCTION,
     output_key="moment_analyzer_labels",
     tools=[google_search],
+    before_model_callback=vision_before_model,
+    after_model_callback=vision_after_model,
 )
@@ -1,9 +1,10 @@
 from google.adk.agents import Agent
 from momentLens_agent.tools.instructions import TRANSLATOR_AGENT_INSTRUCTION
+from lens_common.model_tiers import stage_model
 
 translator_agent = Agent(
     name="momentlens_translator_agent",
-    model="gemini-2.5-flash",
+    model=stage_model("translator"),
     description="Handles language translation for MomentLens.",
     instruction=TRANSLATOR_AGENT_INSTRUCTION,
 )
@@ -1,7 +1,9 @@
-import os, json, requests
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 
+from lens_common import places
+from lens_common.executor import run_blocking
+
 
 # ===============================
 # INPUT MODEL (moment insight + places request)
@@ -20,92 +22,30 @@ class NearbyPlaceRequest(BaseModel):
     included_types: List[str]
     radius: Optional[float] = 500.0
     max_result_count: Optional[int] = 10
-
-# ===============================
-# BUILD PHOTO URL
-# ===============================
-def build_photo_url(photo_name: str, api_key: str, max_width: int = 800) -> str:
-    return (
-        f"https://places.googleapis.com/v1/{photo_name}/media"
-        f"?maxWidthPx={max_width}&key={api_key}"
-    )
+    # Ranking blend: 1.0 = closest first, 0.0 = best rated first (default from RANK_DISTANCE_WEIGHT)
+    distance_weight: Optional[float] = None
 
 
 # ===============================
 # MAIN FUNCTION
 # ===============================
-def find_nearby_places(req: NearbyPlaceRequest) -> Dict:
-    if isinstance(req, dict):
-        req = NearbyPlaceRequest(**req)
-
-    api_key = os.environ.get("GOOGLE_PLACES_API_KEY")
-    if not api_key:
-        raise ValueError("Missing GOOGLE_PLACES_API_KEY")
+# The agent's tool. ADK runs sync tools on the event loop itself, so the
+# blocking search goes to the I/O pool and other requests keep moving.
+async def find_nearby_places(req: NearbyPlaceRequest) -> Dict:
+    return await run_blocking(search_places, req)
 
-    endpoint = "https://places.googleapis.com/v1/places:searchNearby"
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": api_key,
-        "X-Goog-FieldMask": (
-            "places.displayName,places.formattedAddress,"
-            "places.location,places.rating,places.types,"
-            "places.photos.name"
-        ),
-    }
+def search_places(req: NearbyPlaceRequest) -> Dict:
+    if isinstance(req, dict):
+        req = NearbyPlaceRequest(**req)
 
-    body = {
-        "includedTypes": req.included_types,
-        "maxResultCount": req.max_result_count,
-        "locationRestriction": {
-            "circle": {
-                "center": {"latitude": req.latitude, "longitude": req.longitude},
-                "radius": req.radius,
-            }
-        },
+    # ===============================
+    # RETURN BOTH: insight + places
+    # ===============================
+    insight = {
+        "text": req.text,
+        "category": req.category,
+        "place_type": req.place_type,
+        "keywords": req.keywords,
     }
-
-    try:
-        res = requests.post(endpoint, headers=headers, data=json.dumps(body))
-        res.raise_for_status()
-        data = res.json()
-        places = data.get("places", [])
-
-        results = []
-        for p in places[:8]:
-
-            # Extract photo
-            photo_name = (
-                p["photos"][0]["name"]
-                if p.get("photos") else None
-            )
-
-            photo_url = (
-                build_photo_url(photo_name, api_key)
-                if photo_name else None
-            )
-
-            # Build place entry
-            results.append({
-                "name": p.get("displayName", {}).get("text", "N/A"),
-                "address": p.get("formattedAddress", "N/A"),
-                "rating": p.get("rating", "N/A"),
-                "types": ", ".join(
-                    t.replace("_", " ").title() for t in p.get("types", [])
-                ),
-                "photo": photo_url,
-            })
-
-        # ===============================
-        # RETURN BOTH: insight + places
-        # ===============================
-        return {
-            "text": req.text,
-            "category": req.category,
-            "place_type": req.place_type,
-            "keywords": req.keywords,
-            "places": results,
-        }
-
-    except Exception as e:
-        return {"error": f"Places API call failed: {e}"}
+    return places.search_places(req, insight)
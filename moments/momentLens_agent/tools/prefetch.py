@@ -0,0 +1,233 @@
+import os
+import re
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from lens_common.cache import Cache
+from lens_common.circuit_breaker import location_key
+from lens_common.logs import get_logger
+from lens_common.metrics import record_stage
+from lens_common.upstream import RateLimiter
+
+log = get_logger("prefetch")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+PREFETCH = os.getenv("PREFETCH", "0") == "1"
+PREFETCH_HORIZON_S = float(os.getenv("PREFETCH_HORIZON_S", "60"))  # how far ahead a trajectory is followed
+PREFETCH_CELLS = int(os.getenv("PREFETCH_CELLS", "2"))  # upcoming cells prefetched per position update
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", "180"))
+# Budget: runs started per minute (with a burst of PREFETCH_MAX_IN_FLIGHT) and runs at once
+PREFETCH_PER_MINUTE = float(os.getenv("PREFETCH_PER_MINUTE", "30"))
+PREFETCH_MAX_IN_FLIGHT = int(os.getenv("PREFETCH_MAX_IN_FLIGHT", "2"))
+PREFETCH_CLIENTS = int(os.getenv("PREFETCH_CLIENTS", "10000"))  # tracked trajectories (LRU)
+
+TRACK_POINTS = 5
+TRACK_WINDOW_S = 120.0  # positions older than this say nothing about the current heading
+MIN_SPEED_MPS = 0.5  # standing still: nothing to prefetch
+MAX_SPEED_MPS = 70.0  # faster than this is a GPS jump, not movement
+STEP_M = 40.0  # spacing of the points sampled along the predicted path
+METERS_PER_DEG = 111_320.0
+
+
+def cell_of(latitude: float, longitude: float) -> str:
+    """The ~110 m cell (see `location_key`) results are prefetched and looked up by."""
+    return location_key(latitude, longitude)
+
+
+def moment_key(cell: str, context: Dict[str, Any]) -> str:
+    """
+    A prefetched result's key: its cell, the hour of the payload's `time` and
+    its weather. A moment's insight depends on all three, so a result is only
+    served to a client in the same cell, hour and weather it was made for.
+    """
+    time_text = str(context.get("time") or "")
+    hour = re.search(r"(\d{1,2}):\d{2}", time_text)
+    bucket = f"h{int(hour.group(1))}" if hour else _normalize(time_text)
+    weather = context.get("weather") or {}
+    if isinstance(weather, dict):
+        conditions = ",".join(f"{k}={_normalize(v)}" for k, v in sorted(weather.items()))
+    else:
+        conditions = _normalize(weather)
+    return f"{cell}|{bucket}|{conditions}"
+
+
+def _normalize(value: Any) -> str:
+    # Readings to the unit (a 0.3° change is the same weather), text case-insensitive
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(round(value))
+    return str(value).strip().lower()
+
+
+# ===============================
+# TRAJECTORIES
+# ===============================
+class TrajectoryTracker:
+    """Recent positions per client, and where each client is heading."""
+
+    def __init__(self, max_clients: int = PREFETCH_CLIENTS):
+        self.max_clients = max_clients
+        self._tracks: "OrderedDict[str, Deque[Tuple[float, float, float]]]" = OrderedDict()
+
+    def observe(self, client: str, latitude: float, longitude: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        track = self._tracks.pop(client, None) or deque(maxlen=TRACK_POINTS)
+        track.append((now, latitude, longitude))
+        self._tracks[client] = track
+        while len(self._tracks) > self.max_clients:
+            self._tracks.popitem(last=False)
+
+    def velocity(self, client: str) -> Optional[Tuple[float, float]]:
+        """Mean `(north, east)` velocity in m/s over the recent track, or None when not moving."""
+        track = self._tracks.get(client)
+        if not track or len(track) < 2:
+            return None
+        t1, lat1, lon1 = track[-1]
+        recent = [p for p in track if t1 - p[0] <= TRACK_WINDOW_S]
+        t0, lat0, lon0 = recent[0]
+        if t1 - t0 <= 0:
+            return None
+        north = (lat1 - lat0) * METERS_PER_DEG / (t1 - t0)
+        east = (lon1 - lon0) * METERS_PER_DEG * math.cos(math.radians(lat1)) / (t1 - t0)
+        speed = math.hypot(north, east)
+        if speed < MIN_SPEED_MPS or speed > MAX_SPEED_MPS:
+            return None
+        return north, east
+
+    def upcoming_cells(self, client: str, count: int = PREFETCH_CELLS) -> List[Tuple[str, float, float]]:
+        """
+        The next `count` cells along the client's current heading within
+        PREFETCH_HORIZON_S, nearest first, as `(cell, latitude, longitude)`.
+        """
+        velocity = self.velocity(client)
+        if velocity is None:
+            return []
+        north, east = velocity
+        _, lat, lon = self._tracks[client][-1]
+        speed = math.hypot(north, east)
+        current = cell_of(lat, lon)
+        seen, cells = {current}, []
+        steps = int(speed * PREFETCH_HORIZON_S / STEP_M)
+        for i in range(1, steps + 1):
+            t = i * STEP_M / speed
+            p_lat = lat + north * t / METERS_PER_DEG
+            p_lon = lon + east * t / (METERS_PER_DEG * math.cos(math.radians(lat)))
+            cell = cell_of(p_lat, p_lon)
+            if cell not in seen:
+                seen.add(cell)
+                cells.append((cell, p_lat, p_lon))
+                if len(cells) >= count:
+                    break
+        return cells
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+
+# ===============================
+# PREFETCHER
+# ===============================
+class Prefetcher:
+    """
+    Runs the pipeline ahead of moving clients: on each position update the next
+    cells along the client's heading are analysed in the background (within the
+    run budget) and their responses kept for PREFETCH_TTL. An upload from a
+    prefetched cell, at the same hour and weather, is answered from there
+    without running the agents.
+
+    `run(latitude, longitude, context)` produces `(response, call_args)` for a
+    point: the response and its `find_nearby_places` call arguments. `context`
+    is the rest of the client's latest payload (time, weather). The response's
+    per-client tokens (`cursor`, `session`) are never stored: each hit gets the
+    call arguments back to open its own.
+    """
+
+    def __init__(self, run: Callable[[float, float, Dict[str, Any]], Awaitable[Tuple[Dict[str, Any], Dict[str, Any]]]]):
+        self.run = run
+        self.tracker = TrajectoryTracker()
+        self.results = Cache("prefetch", PREFETCH_TTL)
+        self.budget = RateLimiter(PREFETCH_PER_MINUTE / 60, burst=max(1, PREFETCH_MAX_IN_FLIGHT))
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.counters = {
+            "lookups": 0, "hits": 0, "scheduled": 0, "completed": 0, "failed": 0,
+            "skipped_cached": 0, "skipped_in_flight": 0, "skipped_budget": 0,
+        }
+
+    def lookup(
+        self, latitude: float, longitude: float, context: Dict[str, Any],
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        The prefetched response for this point's cell, hour and weather, marked
+        `prefetched` and without tokens, and its call arguments; or None.
+        """
+        self.counters["lookups"] += 1
+        cached = self.results.get(moment_key(cell_of(latitude, longitude), context))
+        if cached is None:
+            return None
+        (result, call_args), age = cached
+        self.counters["hits"] += 1
+        return {**result, "prefetched": True, "prefetch_age_s": round(age, 1)}, call_args
+
+    def observe(self, client: str, latitude: float, longitude: float, context: Dict[str, Any]) -> int:
+        """Record a position and start prefetches for the cells ahead. Returns how many were started."""
+        self.tracker.observe(client, latitude, longitude)
+        started = 0
+        for cell, p_lat, p_lon in self.tracker.upcoming_cells(client):
+            key = moment_key(cell, context)
+            if key in self._in_flight:
+                self.counters["skipped_in_flight"] += 1
+                continue
+            if self.results.get(key) is not None:
+                self.counters["skipped_cached"] += 1
+                continue
+            if len(self._in_flight) >= PREFETCH_MAX_IN_FLIGHT or not self.budget.try_acquire():
+                self.counters["skipped_budget"] += 1
+                continue
+            self._in_flight[key] = asyncio.create_task(self._prefetch(key, p_lat, p_lon, context))
+            self.counters["scheduled"] += 1
+            started += 1
+        return started
+
+    async def _prefetch(self, key: str, latitude: float, longitude: float, context: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        try:
+            result, call_args = await self.run(latitude, longitude, context)
+            response = result.get("agent_response") if isinstance(result, dict) else None
+            # Only complete, live answers are worth serving later
+            if isinstance(response, dict) and response.get("places") and not response.get("stale"):
+                shared = {k: v for k, v in result.items() if k not in ("cursor", "session")}
+                self.results.put(key, [shared, call_args])
+                self.counters["completed"] += 1
+            else:
+                self.counters["failed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.counters["failed"] += 1
+            log.warning("Prefetch failed", key=key, error=str(e))
+        finally:
+            self._in_flight.pop(key, None)
+            record_stage("prefetch", (time.perf_counter() - started) * 1000)
+
+    async def stop(self) -> None:
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups, completed = self.counters["lookups"], self.counters["completed"]
+        return {
+            "enabled": PREFETCH,
+            **self.counters,
+            # Share of uploads answered from a prefetch, and prefetches that were used (at least once, on average)
+            "hit_ratio": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            "use_ratio": round(min(1.0, self.counters["hits"] / completed), 3) if completed else 0.0,
+            "in_flight": len(self._in_flight),
+            "tracked_clients": len(self.tracker),
+            "budget": {"per_minute": PREFETCH_PER_MINUTE, "max_in_flight": PREFETCH_MAX_IN_FLIGHT},
+        }
@@ -0,0 +1,256 @@
+import os
+import math
+import time
+import asyncio
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lens_common.circuit_breaker import CircuitOpenError
+from lens_common.executor import run_blocking, run_cpu
+from lens_common.geo import EARTH_RADIUS_M
+from lens_common.logs import get_logger
+from lens_common.metrics import record_stage
+from lens_common.places import PLACES_MAX_RESULTS, PlacesAPIError, format_place, get_api_key, search_nearby
+
+log = get_logger("route")
+
+# ===============================
+# CONFIGURATION
+# ===============================
+ROUTE_RADIUS_M = float(os.getenv("ROUTE_RADIUS_M", "500"))  # radius of each search circle
+ROUTE_CORRIDOR_M = float(os.getenv("ROUTE_CORRIDOR_M", "250"))  # how far off the route a place may be
+ROUTE_MAX_CIRCLES = int(os.getenv("ROUTE_MAX_CIRCLES", "25"))  # longer routes get wider circles instead
+ROUTE_MAX_POINTS = int(os.getenv("ROUTE_MAX_POINTS", "5000"))
+ROUTE_CONCURRENCY = int(os.getenv("ROUTE_CONCURRENCY", "8"))  # searches in flight per route
+ROUTE_MAX_RESULTS = int(os.getenv("ROUTE_MAX_RESULTS", "60"))
+
+MAX_SEARCH_RADIUS_M = 50_000.0  # searchNearby's limit
+LOCATE_CHUNK = 64  # places projected onto the route at once (bounds the places x segments arrays)
+
+
+class RouteError(ValueError):
+    """The route can't be searched as given (malformed, too many points, too long)."""
+
+
+# ===============================
+# POLYLINES
+# ===============================
+def decode_polyline(encoded: str, precision: int = 5) -> List[Tuple[float, float]]:
+    """`(lat, lon)` points of an encoded polyline (Google's format, as Directions/Routes return it)."""
+    points, index, lat, lon = [], 0, 0, 0
+    factor = 10 ** precision
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                if index >= len(encoded):
+                    raise RouteError("Malformed polyline: it ends inside a coordinate.")
+                byte = ord(encoded[index]) - 63
+                index += 1
+                if not 0 <= byte < 64:
+                    raise RouteError("Malformed polyline: unexpected character.")
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / factor, lon / factor))
+    return points
+
+
+# ===============================
+# ROUTE GEOMETRY
+# ===============================
+class Route:
+    """
+    A polyline in travel order, measured on a local plane (equirectangular
+    around its mean latitude): good to metres over the lengths searched here.
+    """
+
+    def __init__(self, points: Sequence[Sequence[float]]):
+        coords = np.asarray(points, dtype=float)
+        if coords.ndim != 2 or coords.shape[1] != 2 or len(coords) == 0:
+            raise RouteError("A route needs at least one [latitude, longitude] point.")
+        if len(coords) > ROUTE_MAX_POINTS:
+            raise RouteError(f"A route may have at most {ROUTE_MAX_POINTS} points.")
+        if not np.isfinite(coords).all() or (np.abs(coords[:, 0]) > 90).any() or (np.abs(coords[:, 1]) > 180).any():
+            raise RouteError("Route points must be valid [latitude, longitude] pairs.")
+        # Repeated points add zero-length segments and nothing else
+        keep = np.ones(len(coords), dtype=bool)
+        keep[1:] = (np.diff(coords, axis=0) != 0).any(axis=1)
+        self.coords = coords[keep]
+        self.cos_lat = math.cos(math.radians(float(self.coords[:, 0].mean())))
+        self.xy = self._plane(self.coords[:, 0], self.coords[:, 1])
+        self.segments = np.diff(self.xy, axis=0)
+        self.segment_m = np.hypot(self.segments[:, 0], self.segments[:, 1])
+        self.cumulative_m = np.concatenate([[0.0], np.cumsum(self.segment_m)])
+        self.length_m = float(self.cumulative_m[-1])
+
+    @classmethod
+    def parse(cls, points: Optional[List[List[float]]], polyline: Optional[str]) -> "Route":
+        """A route from a list of `[lat, lon]` points or an encoded polyline (exactly one of them)."""
+        if (points is None) == (polyline is None):
+            raise RouteError("Give the route as either `points` or `polyline`.")
+        return cls(points if points is not None else decode_polyline(polyline))
+
+    def _plane(self, lats, lons) -> np.ndarray:
+        scale = EARTH_RADIUS_M * math.pi / 180
+        return np.column_stack([np.asarray(lons) * scale * self.cos_lat, np.asarray(lats) * scale])
+
+    def point_at(self, distance_m: float) -> Tuple[float, float]:
+        """`(lat, lon)` of the point `distance_m` along the route."""
+        lat = np.interp(distance_m, self.cumulative_m, self.coords[:, 0])
+        lon = np.interp(distance_m, self.cumulative_m, self.coords[:, 1])
+        return float(lat), float(lon)
+
+    def locate(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each point, how far along the route its nearest route point is and
+        how far off the route it is, both in metres.
+        """
+        xy = self._plane(lats, lons)
+        if not len(self.segments):
+            return np.zeros(len(xy)), np.hypot(*(xy - self.xy[0]).T)
+
+        starts = self.xy[:-1]
+        lengths_sq = np.maximum(self.segment_m ** 2, 1e-12)
+        along = np.empty(len(xy))
+        offset = np.empty(len(xy))
+        for lo in range(0, len(xy), LOCATE_CHUNK):
+            chunk = xy[lo:lo + LOCATE_CHUNK, None, :] - starts[None]  # (chunk, segments, 2)
+            t = np.clip((chunk * self.segments[None]).sum(axis=2) / lengths_sq, 0.0, 1.0)
+            gap = chunk - t[..., None] * self.segments[None]
+            dist = np.hypot(gap[..., 0], gap[..., 1])
+            nearest = dist.argmin(axis=1)
+            rows = np.arange(len(nearest))
+            offset[lo:lo + LOCATE_CHUNK] = dist[rows, nearest]
+            along[lo:lo + LOCATE_CHUNK] = self.cumulative_m[nearest] + t[rows, nearest] * self.segment_m[nearest]
+        return along, offset
+
+
+def cover(route: Route, radius_m: float, corridor_m: float) -> Tuple[List[Tuple[float, float]], float]:
+    """
+    The fewest search circles, centred on the route, that cover the band
+    `corridor_m` either side of it, and their radius.
+
+    A circle of radius r covers 2·sqrt(r² - w²) of a band of half-width w, so
+    ceil(length / that) circles are needed; they are spread evenly so the
+    overlap is shared out. Routes that would need more than ROUTE_MAX_CIRCLES
+    get exactly that many, with the radius grown to still cover the band; each
+    search still returns at most PLACES_MAX_RESULTS places, so the caller
+    reports such a route as truncated.
+    """
+    if corridor_m >= radius_m:
+        raise RouteError("corridor_m must be smaller than the search radius.")
+    span_m = 2 * math.sqrt(radius_m ** 2 - corridor_m ** 2)
+    count = max(1, math.ceil(route.length_m / span_m - 1e-9))
+    if count > ROUTE_MAX_CIRCLES:
+        count = ROUTE_MAX_CIRCLES
+        radius_m = math.hypot(route.length_m / count / 2, corridor_m)
+        if radius_m > MAX_SEARCH_RADIUS_M:
+            raise RouteError(
+                f"Route of {route.length_m / 1000:.0f} km is too long to cover with {ROUTE_MAX_CIRCLES} searches."
+            )
+    step = route.length_m / count
+    return [route.point_at((i + 0.5) * step) for i in range(count)], radius_m
+
+
+# ===============================
+# CORRIDOR SEARCH
+# ===============================
+async def search_route(
+    route: Route,
+    included_types: List[str],
+    radius_m: Optional[float] = None,
+    corridor_m: Optional[float] = None,
+    max_results: Optional[int] = None,
+) -> Dict:
+    """
+    Places of `included_types` within `corridor_m` of the route, in the order
+    they are passed. The covering circles are searched concurrently (at most
+    ROUTE_CONCURRENCY at a time, each a cached searchNearby on the I/O pool);
+    a place found by several overlapping circles is kept once. With more than
+    `max_results` places, the ones closest to the route are kept.
+
+    `truncated` says places along the route may be missing: the circles were
+    widened past `radius_m` to fit ROUTE_MAX_CIRCLES, or some circles returned
+    a full page (`saturated_circles`) and may have had more.
+
+    Circles that fail are skipped and counted; raises CircuitOpenError or
+    PlacesAPIError only when every circle failed.
+    """
+    radius_m = radius_m or ROUTE_RADIUS_M
+    corridor_m = ROUTE_CORRIDOR_M if corridor_m is None else corridor_m
+    max_results = max_results or ROUTE_MAX_RESULTS
+    requested_radius_m = radius_m
+    circles, radius_m = cover(route, radius_m, corridor_m)
+    widened = radius_m > requested_radius_m
+    api_key = get_api_key()
+
+    started = time.perf_counter()
+    gate = asyncio.Semaphore(ROUTE_CONCURRENCY)
+
+    async def search(latitude: float, longitude: float) -> List[Dict]:
+        async with gate:
+            return await run_blocking(
+                search_nearby, latitude, longitude, included_types, radius_m, PLACES_MAX_RESULTS, api_key
+            )
+
+    answers = await asyncio.gather(*(search(lat, lon) for lat, lon in circles), return_exceptions=True)
+    failures = [a for a in answers if isinstance(a, BaseException)]
+    for failure in failures:
+        if not isinstance(failure, (CircuitOpenError, PlacesAPIError)):
+            raise failure
+    if failures and len(failures) == len(answers):
+        raise failures[0]
+    if failures:
+        log.warning("Route searches failed", failed=len(failures), circles=len(circles), error=str(failures[0]))
+
+    saturated = sum(1 for a in answers if not isinstance(a, BaseException) and len(a) >= PLACES_MAX_RESULTS)
+    if widened or saturated:
+        log.warning(
+            "Route search truncated", circles=len(circles), radius_m=round(radius_m),
+            requested_radius_m=requested_radius_m, saturated=saturated,
+        )
+
+    unique: Dict[str, Dict] = {}
+    for places in answers:
+        if isinstance(places, BaseException):
+            continue
+        for p in places:
+            if p.get("id") and p["id"] not in unique and "location" in p:
+                unique[p["id"]] = p
+    candidates = list(unique.values())
+
+    places: List[Dict] = []
+    if candidates:
+        lats = np.array([p["location"]["latitude"] for p in candidates], dtype=float)
+        lons = np.array([p["location"]["longitude"] for p in candidates], dtype=float)
+        along, offset = await run_cpu(route.locate, lats, lons)
+        inside = [i for i in np.argsort(offset, kind="stable") if offset[i] <= corridor_m][:max_results]
+        for i in sorted(inside, key=lambda i: along[i]):
+            entry = format_place(candidates[i], api_key)
+            entry.pop("distance_m", None)
+            entry.update(route_m=round(float(along[i])), offset_m=round(float(offset[i]), 1))
+            places.append(entry)
+
+    record_stage(
+        "route_search", (time.perf_counter() - started) * 1000,
+        circles=len(circles), failed=len(failures), found=len(candidates), places=len(places),
+        widened=int(widened), saturated=saturated,
+    )
+    return {
+        "route_m": round(route.length_m),
+        "radius_m": round(radius_m, 1),
+        "requested_radius_m": requested_radius_m,
+        "corridor_m": corridor_m,
+        "circles": [{"latitude": round(lat, 6), "longitude": round(lon, 6)} for lat, lon in circles],
+        "failed_circles": len(failures),
+        "saturated_circles": saturated,
+        "truncated": widened or saturated > 0,
+        "places": places,
+    }
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The shared tools import as `lens_common` from the repository root; each app
+# imports its agent package from its own directory (see host/main.py)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, "backend"), os.path.join(ROOT, "moments"), ROOT):
+    sys.path.insert(0, path)
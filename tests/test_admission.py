@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from lens_common.admission import AdmissionController, AdmissionMiddleware
+from lens_common import admission
+
+
+async def echo(request):
+    return JSONResponse({"bytes": len(await request.body())})
+
+
+def build(controller, monkeypatch):
+    monkeypatch.setattr(admission, "CONTROLLER", controller)
+    routes = [Route("/api/upload", echo, methods=["POST"]), Route("/api/jobs", echo, methods=["POST"])]
+    return AdmissionMiddleware(Starlette(routes=routes), batch_paths=("/api/jobs",))
+
+
+def post(controller, monkeypatch, content):
+    app = build(controller, monkeypatch)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/upload", content=content)
+
+    return asyncio.run(main())
+
+
+def test_declared_length_is_admitted_and_released(monkeypatch):
+    controller = AdmissionController(max_bytes=1024 * 1024)
+    res = post(controller, monkeypatch, b"x" * 1000)
+    assert res.status_code == 200 and res.json() == {"bytes": 1000}
+    assert controller.bytes_in_flight == 0
+
+
+def test_chunked_body_is_refused_before_it_is_read(monkeypatch):
+    """Without Content-Length a streamed body could exceed any charge, past the byte budget."""
+    async def chunks():
+        for _ in range(4):
+            yield b"x" * 1024
+
+    controller = AdmissionController(max_bytes=1024 * 1024)
+    res = post(controller, monkeypatch, chunks())
+    assert res.status_code == 411
+    assert controller.stats["rejected_no_length"] == 1
+    assert controller.bytes_in_flight == 0
+
+
+def test_job_submission_waits_in_the_batch_lane_before_its_body_is_read(monkeypatch):
+    controller = AdmissionController(max_bytes=1024 * 1024, batch_share=0.5)
+    app = build(controller, monkeypatch)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async with controller.batch(400 * 1024):  # a running job fills the batch lane
+                submit = asyncio.create_task(client.post("/api/jobs", content=b"x" * 1000))
+                await asyncio.sleep(0.05)
+                assert not submit.done() and controller.stats["batch_waits"] == 1
+            res = await submit
+            too_large = await client.post("/api/jobs", content=b"x" * (2 * 1024 * 1024))
+            return res, too_large
+
+    res, too_large = asyncio.run(main())
+    assert res.status_code == 200 and res.json() == {"bytes": 1000}
+    assert too_large.status_code == 413
+    assert controller.bytes_in_flight == 0 and controller.snapshot()["clients_in_flight"] == 0
+
+
+def test_client_limit_is_keyed_on_the_peer_not_the_client_id_header():
+    scope = {"client": ("203.0.113.7", 5000), "headers": [(b"x-client-id", b"someone-else"), (b"content-length", b"10")]}
+    assert admission._client_and_length(scope) == ("203.0.113.7", 10)
+    assert admission.client_key("203.0.113.7", "phone-1") == "203.0.113.7/phone-1"
@@ -0,0 +1,61 @@
+import time
+import threading
+
+import pytest
+
+from bench.cache_backends import RedisStandIn
+from lens_common.cache import Cache, MemoryBackend, RedisBackend, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryBackend()
+    elif request.param == "sqlite":
+        yield SQLiteBackend(str(tmp_path / "cache.db"))
+    else:
+        server = RedisStandIn()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield RedisBackend(server.url)
+        server.shutdown()
+        server.server_close()
+
+
+def test_entries_come_back_with_their_age_until_the_ttl(backend):
+    cache = Cache("test", ttl=0.3, backend=backend)
+    cache.put("a", {"places": [1, 2]})
+    cache.put("short", "x", ttl=0.05)
+    value, age = cache.get("a")
+    assert value == {"places": [1, 2]} and 0 <= age < 0.2
+    assert cache.get("missing") is None
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("a", max_age=0.05) is None and cache.get("a") is not None
+    time.sleep(0.25)
+    assert cache.get("a") is None
+    assert (cache.stats["hits"], cache.stats["sets"], cache.stats["errors"]) == (2, 2, 0)
+
+
+def test_delete_and_namespaces(backend):
+    places, geocode = Cache("places", 60, backend=backend), Cache("geocode", 60, backend=backend)
+    places.put("k", 1)
+    geocode.put("k", 2)
+    places.delete("k")
+    assert places.get("k") is None and geocode.get("k")[0] == 2
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = Cache("lru", 60, backend=MemoryBackend(max_entries=2))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a")[0] == 1 and cache.get("c")[0] == 3
+
+
+def test_backend_failure_is_a_miss_not_an_error():
+    cache = Cache("down", 60, backend=RedisBackend("redis://127.0.0.1:1/0", timeout=0.1))
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats["errors"] == 2 and cache.stats["misses"] == 0
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from lens_common import cassette
+from lens_common.cassette import CassetteMiss, CassetteStore, ReplayedError, exchange
+
+
+@pytest.fixture
+def tape(tmp_path, monkeypatch):
+    monkeypatch.setattr(cassette, "_store", CassetteStore(str(tmp_path / "upstream.db")))
+    monkeypatch.setattr(cassette, "CASSETTE_TIMING", False)
+
+    def mode(name):
+        monkeypatch.setattr(cassette, "CASSETTE_MODE", name)
+
+    return mode
+
+
+def test_recorded_exchanges_replay_in_order_without_calling_upstream(tape):
+    tape("record")
+    answers = iter(["first", "second"])
+    for call_id in ("a", "b"):
+        exchange("places", {"q": "cafe", "id": call_id}, lambda: next(answers))
+    with pytest.raises(RuntimeError):
+        exchange("places", {"q": "bar"}, lambda: (_ for _ in ()).throw(RuntimeError("quota")))
+
+    tape("replay")
+    upstream = lambda: pytest.fail("replay called upstream")
+    # Call ids are ignored, and repeats of one request come back round-robin
+    assert [exchange("places", {"q": "cafe", "id": "z"}, upstream) for _ in range(3)] == ["first", "second", "first"]
+    with pytest.raises(ReplayedError, match="quota"):
+        exchange("places", {"q": "bar"}, upstream)
+    with pytest.raises(CassetteMiss):
+        exchange("places", {"q": "museum"}, upstream)
+    assert cassette.cassette_store().stats == {"recorded": 3, "replayed": 4, "misses": 1}
+
+
+def test_long_strings_are_matched_by_digest(tape):
+    tape("record")
+    photo = "x" * (cassette.MAX_INLINE_CHARS + 1)
+    exchange("gemini", {"image": photo}, lambda: {"text": "a bridge"})
+    tape("replay")
+    assert exchange("gemini", {"image": photo}, None) == {"text": "a bridge"}
+    with pytest.raises(CassetteMiss):
+        exchange("gemini", {"image": photo + "y"}, None)
+
+
+def test_without_a_mode_the_call_goes_straight_through(tape):
+    tape("")
+    assert exchange("places", {"q": "cafe"}, lambda: "live") == "live"
+    assert cassette.cassette_status() == {"mode": "off"}
+
+
+def test_a_replay_miss_does_not_count_against_the_model_breaker(tape, monkeypatch):
+    from lens_common import translation
+    from lens_common.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker("gemini")
+    monkeypatch.setattr(translation, "get_breaker", lambda name: breaker)
+    tape("replay")
+    assert asyncio.run(translation._translate_with_model(["Closed now"], "it")) is None
+    assert breaker.snapshot()["failures"] == 0
@@ -0,0 +1,78 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from lens_common import places
+from lens_common.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def tripped(reset_timeout: float) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", min_calls=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    return breaker
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = tripped(0.05)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_abandoned_probe_is_replaced_after_reset_timeout():
+    """A probe that never records an outcome (e.g. cancelled) must not wedge the breaker."""
+    breaker = tripped(0.05)
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_opens_at_the_error_rate_once_enough_calls_are_seen():
+    breaker = CircuitBreaker("test", error_rate=0.5, window=4, min_calls=4, reset_timeout=60)
+    for outcome in (False, True, False):
+        breaker.record_success() if outcome else breaker.record_failure()
+    assert breaker.state == CLOSED  # 2 of 3 failed, but fewer than min_calls
+    breaker.record_success()
+    assert breaker.state == CLOSED  # 2 of 4 is at the rate, but only a failure trips it
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    assert 59 < breaker.retry_after() <= 60 and breaker.snapshot()["rejected"] == 1
+
+
+def test_failed_probe_reopens():
+    breaker = tripped(0.05)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+
+@pytest.fixture
+def request_for(monkeypatch):
+    monkeypatch.setenv("GOOGLE_PLACES_API_KEY", "test")
+    monkeypatch.setattr(places, "ADAPTIVE_SEARCH", False)
+    return lambda latitude: SimpleNamespace(
+        latitude=latitude, longitude=2.35, image_label="cafe", included_types=["cafe"],
+        radius=500.0, max_result_count=10, distance_weight=None,
+    )
+
+
+def test_last_known_good_places_are_served_stale_while_open(monkeypatch, request_for):
+    live = [{"id": "a", "displayName": {"text": "Cafe A"}, "location": {"latitude": 10.0, "longitude": 2.35}}]
+    monkeypatch.setattr(places, "search_nearby", lambda *args: live)
+    fresh = places.search_places(request_for(10.0))
+    assert fresh["places"][0]["name"] == "Cafe A" and "stale" not in fresh
+
+    def circuit_open(*args):
+        raise CircuitOpenError("places", 30)
+
+    monkeypatch.setattr(places, "search_nearby", circuit_open)
+    stale = places.search_places(request_for(10.0))
+    assert stale["stale"] and stale["places"] == fresh["places"] and stale["stale_age_s"] >= 0
+    assert "error" in places.search_places(request_for(11.0))  # nothing known for this location
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from lens_common import costs
+from lens_common.costs import CostLedger, charge, track_costs
+from lens_common.logs import request_context
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.setattr(costs, "COST_LEDGER", True)
+    monkeypatch.setattr(costs, "_ledger", CostLedger(str(tmp_path / "costs.db")))
+    return costs._ledger
+
+
+async def flushed():
+    while costs._flushing:
+        await asyncio.gather(*costs._flushing)
+
+
+def test_charges_go_to_the_enclosing_request_per_stage(ledger):
+    async def main():
+        charge("places", places_calls=1)  # outside any request: dropped
+        with request_context(app="NearLens"):
+            async with track_costs("upload") as cost:
+                charge("vision", model_calls=1, prompt_tokens=300, output_tokens=20)
+                async with track_costs("nested") as inner:
+                    charge("places", places_calls=2)
+                async with track_costs("prefetch", detach=True) as background:
+                    charge("places", places_calls=5)
+        await flushed()
+        return cost, inner, background
+
+    cost, inner, background = asyncio.run(main())
+    assert inner is cost and background is not cost
+    assert cost.app == "NearLens" and cost.stages["places"]["places_calls"] == 2
+    assert cost.totals()["prompt_tokens"] == 300 and background.totals()["places_calls"] == 5
+
+
+def test_summary_is_per_app(ledger):
+    async def main():
+        for app, calls in (("NearLens", 1), ("NearLens", 3), ("MomentLens", 10)):
+            with request_context(app=app):
+                async with track_costs("upload"):
+                    charge("places", places_calls=calls)
+        await flushed()
+
+    asyncio.run(main())
+    near = ledger.summary(3600, app="NearLens")
+    assert near["requests"] == 2 and near["totals"]["places_calls"] == 4
+    assert near["kinds"]["upload"]["mean"]["places_calls"] == 2.0
+    assert near["stages"]["places"]["per_request"] == {"places_calls": 2.0}
+    assert ledger.summary(3600)["totals"]["places_calls"] == 14
+
+
+def test_disabled_ledger_tracks_nothing(ledger, monkeypatch):
+    monkeypatch.setattr(costs, "COST_LEDGER", False)
+
+    async def main():
+        async with track_costs("upload") as cost:
+            charge("places", places_calls=1)
+        return cost
+
+    assert asyncio.run(main()) is None and ledger.summary(3600)["requests"] == 0
+
+
+def test_summary_of_a_disabled_ledger_creates_no_file(tmp_path, monkeypatch):
+    path = tmp_path / "costs.db"
+    monkeypatch.setattr(costs, "COST_LEDGER", False)
+    monkeypatch.setattr(costs, "COST_DB_PATH", str(path))
+    monkeypatch.setattr(costs, "_ledger", None)
+    assert asyncio.run(costs.cost_summary(3600))["enabled"] is False
+    assert not path.exists()
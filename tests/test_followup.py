@@ -0,0 +1,72 @@
+import pytest
+
+from lens_common import followup
+from lens_common.cache import get_cache
+from lens_common.followup import FollowUpNotFound, follow_up, open_followup, parse_refinements
+from lens_common.places import places_cache_key
+
+ARGS = {"req": {"image_label": "coffee", "latitude": 45.0, "longitude": 7.0, "included_types": ["cafe"], "max_result_count": 3}}
+CANDIDATES = [
+    # id, metres north of the search point, rating, price, open now
+    {"id": "near-pricey", "north_m": 50, "rating": 3.5, "priceLevel": "PRICE_LEVEL_EXPENSIVE", "open": True},
+    {"id": "far-cheap", "north_m": 400, "rating": 4.9, "priceLevel": "PRICE_LEVEL_INEXPENSIVE", "open": False},
+    {"id": "mid-cheap", "north_m": 200, "rating": 4.2, "priceLevel": "PRICE_LEVEL_INEXPENSIVE", "open": True},
+    {"id": "mid-moderate", "north_m": 250, "rating": 4.0, "priceLevel": "PRICE_LEVEL_MODERATE", "open": True},
+]
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """A session over CANDIDATES, as the run's own search left them in the Places cache."""
+    monkeypatch.setenv("GOOGLE_PLACES_API_KEY", "test")
+    raw = [
+        {
+            "id": c["id"], "rating": c["rating"], "priceLevel": c["priceLevel"],
+            "currentOpeningHours": {"openNow": c["open"]},
+            "location": {"latitude": 45.0 + c["north_m"] / 111_320, "longitude": 7.0},
+        }
+        for c in CANDIDATES
+    ]
+    get_cache("places").put(places_cache_key(45.0, 7.0, ["cafe"], 500.0, 3), raw)
+    return open_followup(ARGS, {"places": [{"place_id": "near-pricey"}]})
+
+
+def ids(answer):
+    return [p["place_id"] for p in answer["agent_response"].get("places", [])]
+
+
+def test_free_text_is_parsed_into_refinements():
+    assert parse_refinements("Anything cheaper that's open now?") == ["cheaper", "open_now"]
+    assert parse_refinements("thanks!") == []
+
+
+def test_refinements_accumulate_and_orderings_replace_each_other(session):
+    closer = follow_up(session, ["closer"])
+    assert ids(closer) == ["near-pricey", "mid-cheap", "mid-moderate"] and closer["upstream_calls"] == 0
+    cheaper = follow_up(closer["session"], ["cheaper"])
+    assert cheaper["refinements"] == ["closer", "cheaper"]
+    assert ids(cheaper) == ["mid-cheap", "far-cheap"]  # at or below the median price, cheapest first
+    top = follow_up(cheaper["session"], ["top_rated", "open_now"])
+    assert top["refinements"] == ["cheaper", "top_rated", "open_now"]
+    assert ids(top) == ["mid-cheap", "mid-moderate"]  # "cheaper" is now relative to the open places
+
+
+def test_each_turn_gets_a_new_session_and_leaves_the_old_one_alone(session):
+    first = follow_up(session, ["open_now"])
+    again = follow_up(session, ["cheaper"])
+    assert first["session"] != session and again["refinements"] == ["cheaper"]
+
+
+def test_evicted_candidates_are_searched_again(session, monkeypatch):
+    state = dict(followup.SESSIONS.get(session)[0], candidates=None)
+    followup.SESSIONS.put(session, state)
+    monkeypatch.setattr(followup, "search_nearby", lambda *args: [{"id": "fresh", "location": {"latitude": 45.0, "longitude": 7.0}}])
+    answer = follow_up(session, ["closer"])
+    assert ids(answer) == ["fresh"] and answer["upstream_calls"] == 1
+
+
+def test_unknown_refinements_and_sessions_are_rejected(session):
+    with pytest.raises(ValueError):
+        follow_up(session, ["fancier"])
+    with pytest.raises(FollowUpNotFound):
+        follow_up("no-such-session", ["closer"])
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from lens_common.jobs import DONE, JobQueue, QueueFull
+
+
+async def echo(payload):
+    return {"echo": payload["n"]}
+
+
+def test_full_queue_sheds_with_an_estimated_wait():
+    async def main():
+        release = asyncio.Event()
+
+        async def blocked(payload):
+            await release.wait()
+
+        queue = JobQueue(blocked, workers=1, max_depth=2, db_path="")
+        for n in range(3):  # one running, two waiting
+            await queue.submit({"n": n})
+            await asyncio.sleep(0)
+        with pytest.raises(QueueFull) as shed:
+            await queue.submit({"n": 3})
+        release.set()
+        await queue.stop()
+        return queue, shed.value
+
+    queue, shed = asyncio.run(main())
+    assert shed.depth == 2 and shed.retry_after >= 1
+    assert queue.counters["submitted"] == 3 and queue.counters["shed"] == 1
+
+
+def test_finished_jobs_are_evicted_on_submit(monkeypatch):
+    async def main():
+        queue = JobQueue(echo, workers=1, result_ttl=60, db_path="")
+        first = await queue.submit({"n": 1})
+        await queue.wait(first["job_id"], 1)
+        queue._jobs[first["job_id"]]["finished_at"] -= 120  # finished two TTLs ago
+        await queue.submit({"n": 2})
+        await queue.stop()
+        return queue, first["job_id"]
+
+    queue, first_id = asyncio.run(main())
+    assert queue.get(first_id) is None
+
+
+def test_durable_jobs_are_recovered_after_a_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+
+    async def interrupted():
+        never = asyncio.Event()
+
+        async def stuck(payload):
+            await never.wait()
+
+        queue = JobQueue(stuck, workers=1, db_path=db_path)
+        submitted = await queue.submit({"n": 7})
+        await asyncio.sleep(0.05)
+        await queue.stop()  # the process dies while the job runs
+        return submitted["job_id"]
+
+    async def restarted(job_id):
+        queue = JobQueue(echo, workers=1, db_path=db_path)
+        queue.start()
+        job = await queue.wait(job_id, 1)
+        await queue.stop()
+        return queue, job
+
+    job_id = asyncio.run(interrupted())
+    queue, job = asyncio.run(restarted(job_id))
+    assert queue.counters["recovered"] == 1
+    assert job["status"] == DONE and job["result"] == {"echo": 7}
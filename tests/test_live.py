@@ -0,0 +1,54 @@
+import io
+import random
+
+from PIL import Image
+
+from nearLens_agent.tools.live import FrameGate, frame_hash, hamming
+
+
+def jpeg(seed, noise=0):
+    """A 64x64 scene of coloured blocks, optionally with pixel noise on top."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", (64, 64))
+    for x in range(0, 64, 16):
+        for y in range(0, 64, 16):
+            img.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + 16, y + 16))
+    if noise:
+        jitter = random.Random(noise)
+        img.putdata([tuple(max(0, min(255, c + jitter.randint(-3, 3))) for c in p) for p in img.getdata()])
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def test_noise_keeps_the_hash_and_a_new_scene_does_not():
+    scene = frame_hash(jpeg(1))
+    assert hamming(scene, frame_hash(jpeg(1, noise=7))) <= 6
+    assert hamming(scene, frame_hash(jpeg(2))) > 6
+
+
+def test_gate_skips_unchanged_frames_until_invalidated():
+    gate = FrameGate(rate=1000, threshold=6)
+    scene, other = frame_hash(jpeg(1)), frame_hash(jpeg(2))
+    assert gate.admit(scene)
+    gate.mark_analysed(scene)
+    assert not gate.admit(frame_hash(jpeg(1, noise=7))) and gate.stats["frames_unchanged"] == 1
+    assert gate.admit(other)
+    gate.invalidate()  # the user moved
+    assert gate.admit(scene)
+
+
+def test_throttle_waits_out_the_interval():
+    gate = FrameGate(rate=0.5)
+    assert gate.wait_time() == 0
+    gate.mark_analysed(0)
+    assert 1.9 < gate.wait_time() <= 2.0
+
+
+def test_results_are_pushed_only_when_the_labels_change():
+    gate = FrameGate()
+    assert gate.labels_changed({"req": {"image_label": "Coffee ", "included_types": ["cafe", "bakery"]}})
+    assert not gate.labels_changed({"image_label": "coffee", "included_types": ["bakery", "cafe"]})
+    assert gate.labels_changed({"image_label": "coffee", "included_types": ["cafe"]})
+    gate.reset_labels()
+    assert gate.labels_changed({"image_label": "coffee", "included_types": ["cafe"]}) and gate.stats["pushes"] == 3
@@ -0,0 +1,36 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models import LlmRequest
+
+from lens_common import circuit_breaker
+from lens_common.circuit_breaker import STALE_FLAG, STALE_KEY, STALE_RESULTS, CircuitBreaker
+from lens_common.model_guard import guard_model
+
+ARGS = {"req": {"image_label": "headphones", "latitude": 0.35, "longitude": 32.58, "included_types": ["electronics_store"]}}
+
+
+@pytest.fixture
+def open_breaker(monkeypatch):
+    breaker = CircuitBreaker("gemini", min_calls=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setitem(circuit_breaker.BREAKERS, "gemini", breaker)
+    return breaker
+
+
+@pytest.mark.parametrize("stored", [("find_nearby_places", ARGS), ["find_nearby_places", ARGS]])
+def test_recommender_replays_last_tool_call_while_open(open_breaker, stored):
+    """Tuples from the memory backend and lists from JSON backends both replay."""
+    key = f"test:replay:{type(stored).__name__}"
+    STALE_RESULTS["tool_args"].put(key, stored)
+    context = SimpleNamespace(state={STALE_KEY: key})
+    before_model, _ = guard_model("recommender")
+
+    response = asyncio.run(before_model(context, LlmRequest()))
+
+    call = response.content.parts[0].function_call
+    assert call.name == "find_nearby_places"
+    assert call.args == ARGS
+    assert context.state[STALE_FLAG] is True
+    assert open_breaker.rejected == 1
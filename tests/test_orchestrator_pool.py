@@ -0,0 +1,46 @@
+import asyncio
+
+from google.adk.agents import LlmAgent
+
+from lens_common.metrics import stage_metrics
+from lens_common.orchestrator_tools import WorkerAgentTool
+
+
+def test_failed_recycle_does_not_starve_waiters(monkeypatch):
+    """pool_size=1: a caller waiting for the only worker gets a new one when its recycle fails."""
+    tool = WorkerAgentTool("test", LlmAgent(name="worker", model="gemini-2.5-flash"), pool_size=1)
+
+    async def run(worker, query):
+        await asyncio.sleep(0.01)
+        return {"query": query}
+
+    async def delete_session(**kwargs):
+        raise RuntimeError("session store down")
+
+    monkeypatch.setattr(tool, "_run", run)
+
+    async def main():
+        first = await tool._acquire()
+        monkeypatch.setattr(first.runner.session_service, "delete_session", delete_session)
+        tool._idle.put_nowait(first)
+        return await asyncio.wait_for(tool.gather(["a", "b"]), timeout=5)
+
+    assert asyncio.run(main()) == [{"query": "a"}, {"query": "b"}]
+    assert tool.stats["runners_created"] == 2
+
+
+def test_calls_are_recorded_per_worker_agent(monkeypatch):
+    tool = WorkerAgentTool("test", LlmAgent(name="pooled", model="gemini-2.5-flash"), pool_size=1)
+
+    async def run(worker, query):
+        return {"query": query}
+
+    monkeypatch.setattr(tool, "_run", run)
+
+    async def main():
+        await tool.gather(["a", "b", "c"])
+        await asyncio.gather(*tool._recycling)
+
+    asyncio.run(main())
+    stage = stage_metrics()["worker_pooled"]
+    assert stage["count"] == 3 and stage["cold_starts"] == 1 and stage["errors"] == 0
@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lens_common import pagination
+from lens_common.pagination import CursorNotFound, next_page, open_cursor
+
+ARGS = {"req": {"latitude": 48.85, "longitude": 2.35, "included_types": ["cafe"], "max_result_count": 5}}
+
+
+@pytest.fixture
+def places_by_ring(monkeypatch):
+    """Each ring answers with 20 places, the first 10 shared with the ring inside it."""
+    calls = []
+
+    def search_nearby(latitude, longitude, included_types, radius, max_result_count, api_key):
+        calls.append(radius)
+        time.sleep(0.05)  # long enough for a second request to read the same state
+        ring = len(calls) - 1
+        return [
+            {"id": f"p{i}", "location": {"latitude": latitude, "longitude": longitude}, "rating": 4.0}
+            for i in range(ring * 10, ring * 10 + 20)
+        ]
+
+    monkeypatch.setattr(pagination, "search_nearby", search_nearby)
+    monkeypatch.setattr(pagination, "get_api_key", lambda: "test")
+    return calls
+
+
+def test_pages_skip_shown_places_and_widen_the_ring(places_by_ring):
+    token = open_cursor(ARGS, [{"place_id": "p0"}, {"place_id": "p1"}], radius=500)
+    first = next_page(token)
+    second = next_page(token)
+    shown = [p["place_id"] for p in first["places"] + second["places"]]
+    assert len(shown) == len(set(shown)) == 10 and "p0" not in shown
+    assert places_by_ring == [500]  # the second page came from the first fetch's leftovers
+    next_page(token)  # leaves 3 of the first ring's 18 fresh places, short of a page
+    page = next_page(token)
+    assert page["radius"] == 500 * pagination.RING_FACTOR and len(places_by_ring) == 2
+
+
+def test_concurrent_requests_for_one_cursor_get_different_pages(places_by_ring):
+    token = open_cursor(ARGS, [], radius=500)
+    with ThreadPoolExecutor(2) as pool:
+        pages = list(pool.map(lambda _: next_page(token), range(2)))
+    ids = [p["place_id"] for page in pages for p in page["places"]]
+    assert len(ids) == len(set(ids)) == 10
+    assert places_by_ring == [500]
+    assert not pagination._cursor_locks
+
+
+def test_unknown_cursor_is_reported():
+    with pytest.raises(CursorNotFound):
+        next_page("no-such-cursor")
@@ -0,0 +1,41 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from lens_common import places
+from lens_common.metrics import stage_metrics
+
+
+class TwoWorkers:
+    """Runs the first two rings; later ones stay queued until cancelled."""
+
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        return self.pool.submit(fn, *args) if self.submitted <= 2 else Future()
+
+
+def test_adaptive_search_counts_only_rings_it_could_cancel(monkeypatch):
+    calls = []
+
+    def search_nearby(latitude, longitude, included_types, radius, max_result_count, api_key):
+        calls.append(radius)
+        # The wider ring is on the wire by the time the first one answers, and still after
+        time.sleep(0.05 if radius == 500 else 0.3)
+        return [{"id": f"{radius}-{i}"} for i in range(3)]
+
+    executor = TwoWorkers()
+    monkeypatch.setattr(places, "search_nearby", search_nearby)
+    monkeypatch.setattr(places, "ADAPTIVE_RADII", [500.0, 1500.0, 5000.0])
+    monkeypatch.setattr(places, "_ring_executor", lambda: executor)
+    before = stage_metrics().get("places_adaptive", {})
+
+    found, radius = places.search_adaptive(45.0, 7.0, ["cafe"], 500, 5, "test")
+    after = stage_metrics()["places_adaptive"]
+    executor.pool.shutdown(wait=True)
+    assert radius == 500 and len(found) == 3
+    assert after["cancelled"] - before.get("cancelled", 0) == 1
+    assert after["still_running"] - before.get("still_running", 0) == 1
+    assert sorted(calls) == [500, 1500]
@@ -0,0 +1,28 @@
+import asyncio
+
+from momentLens_agent.tools.prefetch import Prefetcher, cell_of, moment_key
+
+EVENING = {"time": "2026-05-01T18:05:00", "weather": {"condition": "Clear", "temp_c": 21.2}}
+SEARCH_ARGS = {"req": {"latitude": 48.85, "longitude": 2.35, "included_types": ["cafe"]}}
+
+
+def test_moment_key_separates_hours_and_weather_but_not_minutes():
+    cell = cell_of(48.85, 2.35)
+    later_same_hour = {"time": "2026-05-01T18:40:00", "weather": {"condition": "clear", "temp_c": 20.9}}
+    assert moment_key(cell, EVENING) == moment_key(cell, later_same_hour)
+    assert moment_key(cell, EVENING) != moment_key(cell, {**EVENING, "time": "2026-05-01T08:05:00"})
+    assert moment_key(cell, EVENING) != moment_key(cell, {**EVENING, "weather": {"condition": "Rain", "temp_c": 21}})
+
+
+def test_prefetched_answer_is_stored_without_tokens_and_only_for_its_moment():
+    async def run(latitude, longitude, context):
+        response = {"agent_response": {"places": [{"place_id": "a"}]}, "cursor": "c-1", "session": "s-1"}
+        return response, SEARCH_ARGS
+
+    prefetcher = Prefetcher(run)
+    asyncio.run(prefetcher._prefetch(moment_key(cell_of(48.85, 2.35), EVENING), 48.85, 2.35, EVENING))
+
+    result, call_args = prefetcher.lookup(48.85, 2.35, EVENING)
+    assert result["prefetched"] and "cursor" not in result and "session" not in result
+    assert call_args == SEARCH_ARGS
+    assert prefetcher.lookup(48.85, 2.35, {**EVENING, "weather": {"condition": "Snow"}}) is None
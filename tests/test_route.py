@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from momentLens_agent.tools import route as route_tool
+from momentLens_agent.tools.route import Route, RouteError, cover, search_route
+
+# About 5.6 km through Paris, then a 330 km route east along the equator
+CITY = Route([[48.85, 2.29], [48.85, 2.33], [48.87, 2.35]])
+LONG = Route([[0.0, 0.0], [0.0, 3.0]])
+
+
+def test_cover_uses_fewest_circles_at_the_requested_radius():
+    circles, radius = cover(CITY, 500, 250)
+    assert radius == 500
+    assert len(circles) == 7  # ceil(5588 m / (2 * sqrt(500² - 250²)))
+
+
+def test_cover_widens_circles_past_the_cap_and_rejects_past_the_places_limit():
+    circles, radius = cover(LONG, 500, 250)
+    assert len(circles) == route_tool.ROUTE_MAX_CIRCLES and radius > 500
+    with pytest.raises(RouteError):
+        cover(Route([[0.0, 0.0], [0.0, 40.0]]), 500, 250)
+
+
+@pytest.fixture
+def places_on_route(monkeypatch):
+    """Every search answers with one full page of places on its own centre, as searchNearby would cap it."""
+    def search_nearby(latitude, longitude, included_types, radius, max_result_count, api_key):
+        return [
+            {"id": f"{latitude:.5f},{longitude:.5f}#{i}", "location": {"latitude": latitude, "longitude": longitude}}
+            for i in range(max_result_count)
+        ]
+
+    monkeypatch.setattr(route_tool, "search_nearby", search_nearby)
+    monkeypatch.setattr(route_tool, "get_api_key", lambda: "test")
+
+
+def test_widened_route_is_reported_truncated(places_on_route):
+    result = asyncio.run(search_route(LONG, ["cafe"], 500, 250, 10))
+    assert result["truncated"] is True
+    assert result["radius_m"] > result["requested_radius_m"] == 500
+    assert len(result["places"]) == 10
+    assert [p["route_m"] for p in result["places"]] == sorted(p["route_m"] for p in result["places"])
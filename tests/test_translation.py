@@ -0,0 +1,52 @@
+import asyncio
+
+from lens_common import translation
+from lens_common.translation import detect_language, parse_accept_language, resolve_language, translate_many
+
+
+def test_scripts_and_stopwords_identify_the_language():
+    assert detect_language("晴れ、近くのカフェ") == "ja"
+    assert detect_language("맑은 하늘") == "ko"
+    assert detect_language("Ясное небо") == "ru"
+    assert detect_language("cielo despejado y muy cerca") == "es"
+    assert detect_language("ciel dégagé avec nuages") == "fr"
+    assert detect_language("Starbucks 42") is None
+    assert detect_language("") is None
+
+
+def test_accept_language_takes_the_highest_weight():
+    assert parse_accept_language("en-US;q=0.5, de-DE;q=0.9, fr;q=0.7") == "de"
+    assert parse_accept_language("pt-BR,pt;q=0.9") == "pt"
+    assert parse_accept_language("*, xx-invalid-;q=abc") is None
+    assert parse_accept_language(None) is None
+
+
+def test_explicit_language_then_header_then_detection():
+    assert resolve_language("ES-mx", "fr", "the sky") == "es"
+    assert resolve_language(None, "fr-CA", "cielo despejado y muy cerca") == "fr"
+    assert resolve_language(None, None, "cielo despejado y muy cerca") == "es"
+    assert resolve_language(None, None, "") == "en"
+
+
+def test_only_novel_strings_go_to_the_model_once(monkeypatch):
+    batches = []
+
+    async def model(texts, lang):
+        batches.append(list(texts))
+        return [f"[{lang}] {t}" for t in texts]
+
+    monkeypatch.setattr(translation, "_translate_with_model", model)
+    first, stats = asyncio.run(translate_many(["Cafe", "Park", "Cafe"], "sw"))
+    assert first == ["[sw] Cafe", "[sw] Park", "[sw] Cafe"] and batches == [["Cafe", "Park"]]
+    second, stats = asyncio.run(translate_many(["Park", "Museum"], "sw"))
+    assert second == ["[sw] Park", "[sw] Museum"] and batches[-1] == ["Museum"]
+    assert stats["cache_hits"] == 1 and stats["model_calls"] == 1
+
+
+def test_failed_model_call_keeps_the_english_text(monkeypatch):
+    async def model(texts, lang):
+        return None
+
+    monkeypatch.setattr(translation, "_translate_with_model", model)
+    assert asyncio.run(translate_many(["Closed now"], "it"))[0] == ["Closed now"]
+    assert asyncio.run(translate_many(["Closed now"], "en"))[1]["model_calls"] == 0
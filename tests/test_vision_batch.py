@@ -0,0 +1,59 @@
+import asyncio
+
+from google.genai import types
+
+from nearLens_agent.tools.vision_batch import VisionBatcher
+
+
+def image(n):
+    return types.Part.from_bytes(data=bytes([n]) * 16, mime_type="image/jpeg")
+
+
+def batcher(answer, **kwargs):
+    """A batcher whose model call labels each image with `answer(images)`."""
+    calls = []
+    vision = VisionBatcher(**kwargs)
+
+    async def call(model, instruction, images):
+        calls.append(len(images))
+        return answer(images), types.GenerateContentResponseUsageMetadata(prompt_token_count=300, candidates_token_count=30)
+
+    vision._call = call
+    return vision, calls
+
+
+def label_all(vision, images, model="m"):
+    async def main():
+        return await asyncio.gather(*(vision.label(model, "describe", img) for img in images))
+
+    return asyncio.run(main())
+
+
+def test_full_batches_are_split_off_and_the_rest_waits_for_the_window():
+    vision, calls = batcher(lambda images: [f"label {img.inline_data.data[0]}" for img in images], window_ms=20, max_size=3)
+    results = label_all(vision, [image(n) for n in range(5)])
+    assert calls == [3, 2]
+    assert [labels for labels, _ in results] == [f"label {n}" for n in range(5)]
+    assert results[0][1].prompt_token_count == 100 and results[4][1].prompt_token_count == 150
+    assert vision.snapshot()["model_calls_saved"] == 3
+
+
+def test_models_batch_separately_and_a_lone_image_calls_alone():
+    vision, calls = batcher(lambda images: ["x"] * len(images), window_ms=10)
+
+    async def main():
+        return await asyncio.gather(
+            vision.label("flash", "describe", image(1)),
+            vision.label("flash", "describe", image(2)),
+            vision.label("pro", "describe", image(3)),
+        )
+
+    first, second, alone = asyncio.run(main())
+    assert calls == [2] and first[0] == second[0] == "x" and alone is None
+    assert vision.stats["solo"] == 1
+
+
+def test_an_unusable_answer_falls_back_for_every_image():
+    vision, calls = batcher(lambda images: None, window_ms=10)
+    assert label_all(vision, [image(1), image(2)]) == [None, None]
+    assert vision.stats["failed_batches"] == 1 and vision.stats["fallbacks"] == 2